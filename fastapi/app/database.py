@@ -1,21 +1,154 @@
-from sqlalchemy import create_engine
+import asyncio
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.utils.metrics import timed_pool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
 
-# Create database engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# GET routes read through a pool of read-only connections; everything that
+# writes goes through the writer pool. With SQLite the writer pool defaults to
+# a single connection, so writers queue in the pool (up to the pool timeout)
+# instead of failing with "database is locked", and in WAL mode readers never
+# wait for them. Every writer, request or not, holds that connection until
+# its session closes: sync routes run on the threadpool, and the sync pools
+# refuse checkouts from the event loop thread, where waiting for the
+# connection would stall every other request. Raise DATABASE_WRITE_POOL_SIZE
+# only on a database that takes concurrent writers.
+DATABASE_READ_POOL_SIZE = int(os.getenv("DATABASE_READ_POOL_SIZE", "8"))
+DATABASE_WRITE_POOL_SIZE = int(os.getenv("DATABASE_WRITE_POOL_SIZE", "1"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "0"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+
+# Background jobs (app.utils.jobs) run on a pool of their own, a connection
+# per JOB_WORKERS thread, so a running job never holds the request writer.
+# Like every writer they begin with BEGIN IMMEDIATE, so on SQLite a job's
+# open transaction holds the write lock until it commits.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+DATABASE_JOB_POOL_SIZE = max(JOB_WORKERS, 1)
+
+# Pragmas applied to every SQLite connection
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB rather than pages
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "foreign_keys": "ON" if os.getenv("SQLITE_FOREIGN_KEYS", "1") == "1" else "OFF",
+}
+
+# Serve the ticket, comment, feature request and search routes from async
+# implementations over an AsyncSession instead of the sync threadpool ones
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "0") == "1"
+
+# Async drivers for each sync URL scheme we support
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _is_memory(url: str) -> bool:
+    return _is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+class ThreadPoolQueuePool(QueuePool):
+    """QueuePool for the sync engines, refusing checkouts on the event loop"""
+
+    def _do_get(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return super()._do_get()
+        raise RuntimeError(
+            "Sync database session used on the event loop; "
+            "use a sync route or run_in_threadpool"
+        )
+
+def _engine_options(url: str, pool_size: int, read_only: bool, pool_class, pool_name: str) -> dict:
+    options = {}
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    elif read_only:
+        options["execution_options"] = {"postgresql_readonly": True}
+    if not _is_memory(url):
+        options.update(
+            # Timed for the checkout wait metrics, under pool_name
+            poolclass=timed_pool(pool_class),
+            pool_logging_name=pool_name,
+            pool_size=pool_size,
+            max_overflow=DATABASE_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+        )
+    return options
+
+def _configure_sqlite(engine, read_only: bool) -> None:
+    """Apply SQLITE_PRAGMAS (and query_only for readers) on every new connection.
+
+    Writers begin their transactions with BEGIN IMMEDIATE, taking SQLite's
+    write lock up front: a second writer (the async writer pool, a job, a
+    manage command, another worker process) then waits for it up to
+    busy_timeout, where a deferred transaction that read first would fail on
+    upgrading.
+    """
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        if not read_only:
+            # The driver stops issuing its own BEGIN; see _begin_immediate
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    if not read_only:
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+def _create_engines(url: str, create, pool_class, name_prefix: str = "") -> tuple:
+    """(writer, reader) engines for a URL; one shared engine for in-memory SQLite"""
+    writer = create(url, **_engine_options(url, DATABASE_WRITE_POOL_SIZE, False, pool_class, f"{name_prefix}write"))
+    if _is_memory(url):
+        reader = writer
+    else:
+        reader = create(url, **_engine_options(url, DATABASE_READ_POOL_SIZE, True, pool_class, f"{name_prefix}read"))
+    if _is_sqlite(url):
+        # Async engines take event listeners on their sync_engine
+        _configure_sqlite(getattr(writer, "sync_engine", writer), read_only=False)
+        if reader is not writer:
+            _configure_sqlite(getattr(reader, "sync_engine", reader), read_only=True)
+    return writer, reader
+
+# Create database engines
+engine, read_engine = _create_engines(SQLALCHEMY_DATABASE_URL, create_engine, ThreadPoolQueuePool)
+
+if _is_memory(SQLALCHEMY_DATABASE_URL):
+    job_engine = engine
+else:
+    job_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        **_engine_options(SQLALCHEMY_DATABASE_URL, DATABASE_JOB_POOL_SIZE, False, ThreadPoolQueuePool, "jobs")
+    )
+    if _is_sqlite(SQLALCHEMY_DATABASE_URL):
+        _configure_sqlite(job_engine, read_only=False)
 
 # Base class for ORM models
 Base = declarative_base()
 
-# Create a session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+JobSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=job_engine)
 
-# Dependency to get the database session
+# Dependency to get the database session (routes that write)
 def get_db():
     db = SessionLocal()
     try:
@@ -23,6 +156,63 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get a read-only database session (GET routes)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver"""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS[scheme.split('+')[0]]}://{rest}"
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+
+# The async engines have their own writer pool: an aiosqlite connection
+# cannot serve the sync sessions, nor a sqlite3 one the async sessions. So
+# with DATABASE_ASYNC=1 SQLite has two writer connections, one per pool, and
+# they serialize on the database's write lock (BEGIN IMMEDIATE, waiting up to
+# SQLITE_BUSY_TIMEOUT_MS) rather than in a pool.
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine, async_read_engine = _create_engines(
+        to_async_url(SQLALCHEMY_DATABASE_URL), create_async_engine, AsyncAdaptedQueuePool, "async_"
+    )
+    # Objects stay loaded after commit: an async session cannot lazily
+    # refresh them later, e.g. while the response is being serialized
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, autoflush=False, expire_on_commit=False
+    )
+
+# Async dependency to get the database session (routes that write)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Async dependency to get a read-only database session (GET routes)
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def dispose_engines():
+    """Close pooled connections on shutdown (aiosqlite keeps a thread per connection)"""
+    if async_engine is not None:
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+    engine.dispose()
+    read_engine.dispose()
+    job_engine.dispose()
+
 def init_db():
     """Initialize the database by creating tables if they don't exist"""
     Base.metadata.create_all(bind=engine)
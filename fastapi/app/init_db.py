@@ -2,6 +2,8 @@ from app.database import engine, Base
 from app.models.user import User
 from app.models.ticket import Ticket
 from app.models.comment import Comment
+import app.utils.search_index  # registers the FTS create/drop hooks
+import app.utils.migrations  # registers schema upgrades
 
 def init_db():
     # Drop all tables first
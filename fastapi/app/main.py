@@ -1,16 +1,29 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import user, ticket, comment, health, feature_request, stats, search, upload, dashboard
-from app.database import engine, Base, init_db
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from app.routes import admin, changes, export, metrics, user, ticket, comment, health, feature_request, stats, search, stream, upload, upload_session, dashboard
+from app.database import DATABASE_ASYNC, dispose_engines, init_db
+from app.utils import fast_json, jobs, migrations  # noqa: F401 - registers schema upgrades on create_all
+from app.utils.stream import hub
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.metrics import METRICS_ENABLED, MetricsMiddleware
+from app.utils.sql_context import SQLContextMiddleware
+from app.utils.sql_budget import SQL_STATEMENT_BUDGETS_ENABLED, StatementBudgetMiddleware
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Serve tickets, comments, feature requests and search from the AsyncSession
+# implementations when the async engine is enabled
+if DATABASE_ASYNC:
+    from app.routes import ticket_async as ticket, comment_async as comment
+    from app.routes import feature_request_async as feature_request, search_async as search
 
 # Initialize FastAPI app
 app = FastAPI(
     title="SupportSync API",
     description="A ticketing system API with user management and feature requests",
-    version="1.0.0"
+    version="1.0.0",
+    # Encode the other routes' responses with orjson too
+    default_response_class=ORJSONResponse if fast_json.FAST_JSON else JSONResponse
 )
 
 # Configure CORS
@@ -20,12 +33,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Head-Seq", "ETag", "Last-Modified", "Location", "Upload-Offset", "Upload-Length", "X-Profile-Id"],
 )
 
-# Initialize database
+# Fail requests that exceed their endpoint's SQL statement budget (test runs)
+if SQL_STATEMENT_BUDGETS_ENABLED:
+    app.add_middleware(StatementBudgetMiddleware)
+
+# Profile requests on demand (X-Profile header, sampling rate) for GET /admin/profiles
+app.add_middleware(ProfilingMiddleware)
+
+# Count and time requests for GET /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# The per-request SQL record the middlewares above read; outermost
+app.add_middleware(SQLContextMiddleware)
+
+# Create the tables on the threadpool: the sync pools refuse the event loop
 @app.on_event("startup")
 async def startup_event():
-    init_db()
+    await run_in_threadpool(init_db)
+    # Run queued background jobs in this process
+    if jobs.JOB_WORKERS:
+        jobs.worker.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # End open streams so shutdown doesn't wait on idle connections
+    hub.close_all()
+    jobs.worker.stop()
+    await dispose_engines()
 
 # Include routers
 app.include_router(health.router, prefix="/api", tags=["Health"])
@@ -36,7 +74,15 @@ app.include_router(feature_request.router, prefix="/api", tags=["Feature Request
 app.include_router(stats.router, prefix="/api", tags=["Statistics"])
 app.include_router(search.router, prefix="/api", tags=["Search"])
 app.include_router(upload.router, prefix="/api", tags=["Upload"])
+app.include_router(upload_session.router, prefix="/api", tags=["Upload"])
 app.include_router(dashboard.router, prefix="/api", tags=["Dashboard"])
+app.include_router(admin.router, prefix="/api", tags=["Admin"])
+app.include_router(export.router, prefix="/api", tags=["Export"])
+app.include_router(stream.router, prefix="/api", tags=["Stream"])
+app.include_router(changes.router, prefix="/api", tags=["Changes"])
+# Unprefixed, where Prometheus scrapes by default
+if METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["Metrics"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,163 @@
+import argparse
+import sys
+from app.database import engine, Base, ReadSessionLocal
+from app.utils import blobs, changes, content_types, counters, fast_json, importer, jobs, migrations, query_plans, resumable, search_index, upvotes  # noqa: F401 - migrations registers schema upgrades, changes, content_types and resumable their jobs
+
+def rebuild_search_index(args):
+    """Rebuild the full-text search tables from tickets and feature requests"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        counts = search_index.rebuild_search_index(connection)
+    for name, count in counts.items():
+        print(f"{name}: {count} rows indexed")
+
+def repair_upvote_counts(args):
+    """Recompute feature request upvote counters from the upvotes table"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        fixed = upvotes.recount_upvotes(connection)
+    print(f"{fixed} feature request upvote counters repaired")
+
+def reconcile_counters(args):
+    """Rebuild the dashboard and stats counters from the source tables"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        total = counters.reconcile_counters(connection)
+    print(f"{total} counters rebuilt")
+
+def migrate_uploads(args):
+    """Move attachment files into the content-addressed blob store"""
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        counts = blobs.migrate_uploads(connection)
+    print(
+        f"{counts['moved']} files moved, {counts['deduplicated']} duplicates removed, "
+        f"{counts['missing']} missing"
+    )
+
+def collect_upload_sessions(args):
+    """Delete resumable upload sessions idle for longer than UPLOAD_SESSION_TTL_HOURS"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        removed = resumable.collect_abandoned(connection)
+    print(f"{removed} abandoned upload sessions removed")
+
+def prune_changes(args):
+    """Delete change log entries older than CHANGES_RETENTION_DAYS"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        removed = changes.prune_changes(connection)
+    print(f"{removed} changes pruned")
+
+def run_jobs(args):
+    """Run the background jobs that are due, then exit (when JOB_WORKERS=0)"""
+    Base.metadata.create_all(bind=engine)
+    worker = jobs.JobWorker(concurrency=1)
+    worker.housekeeping()
+    print(f"{worker.run_pending()} jobs run")
+
+def import_data(args):
+    """Import users, tickets or comments from a CSV or NDJSON file (stop the server first)"""
+    Base.metadata.create_all(bind=engine)
+    try:
+        totals = importer.import_file(
+            args.kind, args.path,
+            batch_size=args.batch_size,
+            transaction_size=args.transaction_size,
+            force=args.force
+        )
+    except importer.AlreadyImported as exc:
+        print(f"{exc}; use --force to import it again")
+        return 1
+    print(
+        f"{totals['imported']} {args.kind} imported, {totals['matched']} matched, "
+        f"{totals['rejected']} rejected in {totals['seconds']}s ({totals['rows_per_second']:,} rows/s)"
+    )
+    if totals["rejected"]:
+        print(f"Rejected records: {args.path}.rejects.ndjson")
+    return 0
+
+def _import_data_arguments(parser):
+    parser.add_argument("kind", choices=list(importer.IMPORTERS))
+    parser.add_argument("path", help="CSV file, or NDJSON file (.ndjson or .jsonl)")
+    parser.add_argument("--batch-size", type=int, default=importer.IMPORT_BATCH_SIZE, help="Records per INSERT")
+    parser.add_argument("--transaction-size", type=int, default=importer.IMPORT_TRANSACTION_SIZE, help="Records per commit")
+    parser.add_argument("--force", action="store_true", help="Import a file again after a finished run")
+
+def benchmark_json(args):
+    """Compare the per-row cost of the default and FAST_JSON list responses"""
+    from app.models.feature_request import FeatureRequest
+    from app.models.ticket import Ticket
+    from app.routes.feature_request import FEATURE_REQUEST_CHILDREN, FEATURE_REQUEST_LOAD
+    from app.routes.ticket import TICKET_LOAD
+    from app.schemas.feature_request import FeatureRequestResponse
+    from app.schemas.ticket import TicketResponse
+
+    Base.metadata.create_all(bind=engine)
+    cases = {
+        "tickets": (TicketResponse, Ticket, TICKET_LOAD, None),
+        "feature-requests": (FeatureRequestResponse, FeatureRequest, FEATURE_REQUEST_LOAD, FEATURE_REQUEST_CHILDREN),
+    }
+    status = 0
+    with ReadSessionLocal() as db:
+        for name, (schema, model, load_options, children) in cases.items():
+            results = fast_json.benchmark(db, schema, model, load_options, children, limit=args.limit, repeat=args.repeat)
+            default, fast = results["default"], results["fast_json"]
+            for path, result in results.items():
+                print(
+                    f"{name} {path}: {result['total_us_per_row']} us/row "
+                    f"(load {result['load_us_per_row']}, serialize {result['serialize_us_per_row']}) "
+                    f"over {result['rows']} rows"
+                )
+            if default["body"] != fast["body"]:
+                print(f"{name}: responses differ")
+                status = 1
+            elif fast["total_us_per_row"]:
+                print(f"{name}: {default['total_us_per_row'] / fast['total_us_per_row']:.1f}x faster, same JSON")
+    return status
+
+def _benchmark_json_arguments(parser):
+    parser.add_argument("--limit", type=int, default=100, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=50, help="Pages timed per path")
+
+def check_query_plans(args):
+    """Fail if any hot query shape falls back to a full table scan or a sort (SQLite)"""
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        scans = query_plans.check_query_plans(connection)
+    for name, steps in scans.items():
+        print(f"{name}: {'; '.join(steps)}")
+    print(f"{len(query_plans.HOT_QUERIES) - len(scans)}/{len(query_plans.HOT_QUERIES)} query plans use an index")
+    return 1 if scans else 0
+
+COMMANDS = {
+    "rebuild-search-index": rebuild_search_index,
+    "repair-upvote-counts": repair_upvote_counts,
+    "reconcile-counters": reconcile_counters,
+    "migrate-uploads": migrate_uploads,
+    "collect-upload-sessions": collect_upload_sessions,
+    "prune-changes": prune_changes,
+    "run-jobs": run_jobs,
+    "import-data": import_data,
+    "benchmark-json": benchmark_json,
+    "check-query-plans": check_query_plans,
+}
+
+# Commands that take arguments of their own
+ARGUMENTS = {
+    "import-data": _import_data_arguments,
+    "benchmark-json": _benchmark_json_arguments,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SupportSync maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=command.__doc__)
+        if name in ARGUMENTS:
+            ARGUMENTS[name](subparser)
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# Import every model so that relationship() targets given by name resolve as
+# soon as any one model is imported (loader options touch mapped attributes
+# at import time, which configures all mappers).
+from app.models.user import User
+from app.models.ticket import Ticket
+from app.models.comment import Comment
+from app.models.feature_request import FeatureRequest, FeatureRequestComment, feature_request_upvotes
+from app.models.attachment import Attachment
+from app.models.counter import Counter
+from app.models.blob import Blob
+from app.models.upload_session import UploadSession, UploadChunk
+from app.models.job import Job
+from app.models.import_run import ImportRun, ImportKey
+from app.models.change import Change
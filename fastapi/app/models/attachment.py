@@ -11,12 +11,13 @@ class Attachment(Base):
     file_path = Column(String, nullable=False)
     file_type = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)  # Size in bytes
-    created_at = Column(DateTime, default=datetime.utcnow)
+    content_sha256 = Column(String(64), nullable=True)  # Hex digest, computed while uploading
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Foreign keys
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=True)
-    feature_request_id = Column(Integer, ForeignKey("feature_requests.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=True, index=True)
+    feature_request_id = Column(Integer, ForeignKey("feature_requests.id"), nullable=True, index=True)
     
     # Relationships
     user = relationship("User", back_populates="attachments")
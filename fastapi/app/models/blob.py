@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    # Attachment content is stored once per distinct SHA-256 (see app.utils.blobs)
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)  # Size in bytes
+    ref_count = Column(Integer, nullable=False, default=0)  # Attachments stored under this hash
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Text
+from datetime import datetime
+from app.database import Base
+
+class Change(Base):
+    __tablename__ = "changes"
+    # AUTOINCREMENT so SQLite never hands out a seq again once old changes
+    # have been pruned
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    # One row per insert, update or delete of a logged entity, written in the
+    # same transaction as the write itself (see app.utils.changes)
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    entity = Column(String, nullable=False)  # ticket, comment, feature_request, ...
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)  # created, updated, deleted
+    fields = Column(Text, nullable=True)  # JSON list of the columns an update changed
+    refs = Column(Text, nullable=True)  # JSON {foreign key column: id} of the row
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
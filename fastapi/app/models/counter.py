@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+class Counter(Base):
+    __tablename__ = "counters"
+
+    # e.g. "tickets:total", "tickets:status:new", "comments:day:2024-03-28"
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
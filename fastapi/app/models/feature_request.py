@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,22 +9,33 @@ feature_request_upvotes = Table(
     'feature_request_upvotes',
     Base.metadata,
     Column('feature_request_id', Integer, ForeignKey('feature_requests.id'), primary_key=True),
-    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True)
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    # The primary key covers lookups by request; this one withdraws a user's upvotes
+    Index('ix_feature_request_upvotes_user_id', 'user_id')
 )
 
 class FeatureRequest(Base):
     __tablename__ = "feature_requests"
+    __table_args__ = (
+        # The list filters, followed by id, the order the list pages in
+        Index("ix_feature_requests_status_id", "status", "id"),
+        Index("ix_feature_requests_status_priority_id", "status", "priority", "id"),
+        Index("ix_feature_requests_priority_id", "priority", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
     status = Column(String(50), nullable=False, default="Proposed")  # Proposed, Under Review, Approved, Rejected
     priority = Column(String(50), nullable=False, default="Medium")  # Low, Medium, High
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    upvotes_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)  # Kept in step with feature_request_upvotes
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Set app-side to the microsecond (SQLite's now() has whole seconds): it
+    # is part of the request's ETag, which two updates in a second must change
+    updated_at = Column(DateTime(timezone=True), onupdate=datetime.utcnow)
     
     # Foreign keys
-    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Relationships
     requester = relationship("User", back_populates="feature_requests")
@@ -36,11 +48,6 @@ class FeatureRequest(Base):
     
     # Attachments relationship
     attachments = relationship("Attachment", back_populates="feature_request", cascade="all, delete-orphan")
-    
-    # Computed property for upvotes count
-    @property
-    def upvotes_count(self):
-        return len(self.upvoted_by)
 
 class FeatureRequestComment(Base):
     __tablename__ = "feature_request_comments"
@@ -51,8 +58,8 @@ class FeatureRequestComment(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Foreign keys
-    feature_request_id = Column(Integer, ForeignKey("feature_requests.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    feature_request_id = Column(Integer, ForeignKey("feature_requests.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Relationships
     feature_request = relationship("FeatureRequest", back_populates="comments")
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class ImportRun(Base):
+    __tablename__ = "import_runs"
+
+    # Progress of one input file through app.utils.importer, committed
+    # together with the rows it imported so an interrupted run resumes
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # users, tickets, comments
+    source = Column(String, nullable=False)  # Input path
+    fingerprint = Column(String, nullable=False, index=True)  # Size and hash of the head of the file
+    records_read = Column(Integer, nullable=False, default=0)  # Input records committed so far
+    imported = Column(Integer, nullable=False, default=0)
+    matched = Column(Integer, nullable=False, default=0)  # Already imported, or users that already existed
+    rejected = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class ImportKey(Base):
+    __tablename__ = "import_keys"
+
+    # Id of each imported row in the source system, so later files (and
+    # later runs) can refer to it
+    kind = Column(String, primary_key=True)
+    external_id = Column(String, primary_key=True)
+    local_id = Column(Integer, nullable=False)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from datetime import datetime
+from app.database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # The worker's "next due job" query
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    # Work queued to run after the request that created it (see app.utils.jobs)
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)  # Registered task name
+    payload = Column(Text, nullable=False, default="{}")  # JSON keyword arguments
+    idempotency_key = Column(String, nullable=True, unique=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    run_at = Column(DateTime, default=datetime.utcnow)  # Not before; pushed back on retry
+    started_at = Column(DateTime, nullable=True)
+    locked_until = Column(DateTime, nullable=True)  # Lease of the worker running it
+    finished_at = Column(DateTime, nullable=True, index=True)
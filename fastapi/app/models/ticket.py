@@ -1,17 +1,29 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # The list filters, each followed by id, the order lists page in
+        # /tickets/me and /tickets/assigned, optionally filtered by status
+        Index("ix_tickets_user_id_id", "user_id", "id"),
+        Index("ix_tickets_user_id_status_id", "user_id", "status", "id"),
+        Index("ix_tickets_assigned_to_id", "assigned_to", "id"),
+        Index("ix_tickets_assigned_to_status_id", "assigned_to", "status", "id"),
+        # Admin listing and search filters
+        Index("ix_tickets_status_id", "status", "id"),
+        Index("ix_tickets_status_priority_id", "status", "priority", "id"),
+        Index("ix_tickets_priority_id", "priority", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
     priority = Column(String, nullable=False, default="low")
     status = Column(String, nullable=False, default="new")
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     # User who created the ticket
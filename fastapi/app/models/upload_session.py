@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    # A resumable upload in progress (see app.utils.resumable); its data file
+    # lives in the upload temp directory until it is completed or collected
+    id = Column(String(32), primary_key=True)  # Random token, also names the data file
+    filename = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)
+    length = Column(Integer, nullable=False)  # Declared size in bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)  # Last chunk received
+
+    # Foreign keys
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=True)
+    feature_request_id = Column(Integer, ForeignKey("feature_requests.id", ondelete="CASCADE"), nullable=True)
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+
+    session_id = Column(String(32), ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    offset = Column(Integer, primary_key=True)
+    length = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=True)  # Set once the chunk is written and fsynced
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,90 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from app.database import get_read_db
+from app.models.user import User
+from app.schemas.profile import ProfileDetail, ProfileFormat, ProfileSummary, SamplingRate
+from app.schemas.slow_query import SlowQueryResponse, SlowQuerySort
+from app.utils import jobs, profiling
+from app.utils.slow_queries import slow_query_log
+from app.utils.security import get_current_user
+
+router = APIRouter()
+
+@router.get("/admin/jobs")
+def get_job_queue(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get background job queue depth, latency and recent failures"""
+    # Only admin can inspect the job queue
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return jobs.queue_stats(db)
+
+def _require_admin(current_user: User) -> None:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+@router.get("/admin/profiles", response_model=List[ProfileSummary])
+def list_profiles(current_user: User = Depends(get_current_user)):
+    """List the request profiles kept by this worker, newest first (admin only)"""
+    _require_admin(current_user)
+    return [profile.summary() for profile in profiling.store.list()]
+
+@router.get("/admin/profiles/{profile_id}", response_model=ProfileDetail)
+def get_profile(
+    profile_id: int,
+    format: ProfileFormat = Query(ProfileFormat.JSON),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a request profile, or download it as collapsed stacks or pstats (admin only)"""
+    _require_admin(current_user)
+    profile = profiling.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == ProfileFormat.COLLAPSED:
+        return PlainTextResponse(profile.collapsed())
+    if format == ProfileFormat.PSTATS:
+        return Response(
+            profile.pstats(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.pstats"'}
+        )
+    return {
+        **profile.summary(),
+        "interval": profile.interval,
+        "statement_log": profile.statements,
+        "statements_dropped": profile.statements_dropped,
+    }
+
+@router.put("/admin/profiles/sampling", response_model=SamplingRate)
+def set_profile_sampling(sampling: SamplingRate, current_user: User = Depends(get_current_user)):
+    """Set the fraction of this worker's requests that are profiled (admin only)"""
+    _require_admin(current_user)
+    profiling.store.sample_rate = sampling.rate
+    return {"rate": profiling.store.sample_rate}
+
+@router.get("/admin/slow-queries", response_model=List[SlowQueryResponse])
+def get_slow_queries(
+    sort: SlowQuerySort = Query(SlowQuerySort.TOTAL),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """List this worker's slow statements by fingerprint, with their plans (admin only)"""
+    _require_admin(current_user)
+    return slow_query_log.entries(sort.value, limit)
+
+@router.delete("/admin/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(current_user: User = Depends(get_current_user)):
+    """Empty this worker's slow query log (admin only)"""
+    _require_admin(current_user)
+    slow_query_log.clear()
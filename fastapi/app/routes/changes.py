@@ -0,0 +1,57 @@
+import time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
+from app.database import ReadSessionLocal
+from app.schemas.change import ChangeEntity, ChangeFeed
+from app.utils import changes
+from app.utils.security import authenticate_token, oauth2_scheme
+
+router = APIRouter()
+
+def _read_feed(since: int, limit: int, entities: Optional[List[str]]) -> dict:
+    # A session per read: a long poll must not hold a pooled connection
+    # while it waits
+    with ReadSessionLocal() as db:
+        feed = changes.read_changes(db, since, limit, entities)
+    if feed["oldest_seq"] is not None and since < feed["oldest_seq"] - 1:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Changes after this seq have been pruned; reload and read on from X-Head-Seq",
+            headers={"X-Head-Seq": str(feed["head_seq"])}
+        )
+    rows = feed["changes"]
+    return {
+        "changes": rows,
+        # Without rows, everything up to head_seq was read (or filtered out)
+        "last_seq": rows[-1].seq if rows else max(since, feed["head_seq"]),
+        "head_seq": feed["head_seq"],
+    }
+
+@router.get("/changes", response_model=ChangeFeed)
+async def get_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=changes.CHANGES_MAX_WAIT),
+    entity: Optional[List[ChangeEntity]] = Query(None),
+    token: str = Depends(oauth2_scheme)
+):
+    """Changes after seq `since`, oldest first; with `wait`, hold the request
+    open up to that many seconds until there is at least one (admin only)"""
+    current_user = await authenticate_token(token)
+    # Only admin can read the change log
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    entities = [value.value for value in entity] if entity else None
+    deadline = time.monotonic() + wait
+    while True:
+        version = changes.notifier.version
+        feed = await run_in_threadpool(_read_feed, since, limit, entities)
+        remaining = deadline - time.monotonic()
+        if feed["changes"] or remaining <= 0:
+            return feed
+        await changes.notifier.wait(version, min(remaining, changes.CHANGES_POLL_INTERVAL))
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.comment import Comment
 from app.models.ticket import Ticket
 from app.models.user import User
 from app.schemas.comment import CommentCreate, CommentResponse
 from app.utils.security import get_current_user
+from app.utils.sql_budget import statement_budget
 
 router = APIRouter()
 
@@ -45,9 +46,10 @@ def add_comment(
     return new_comment
 
 @router.get("/tickets/{ticket_id}/comments", response_model=list[CommentResponse])
+@statement_budget(3)
 def get_ticket_comments(
     ticket_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all comments for a ticket"""
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_async_read_db
+from app.models.comment import Comment
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.schemas.comment import CommentCreate, CommentResponse
+from app.utils.security import get_current_user_async
+from app.utils.sql_budget import statement_budget
+
+# Async versions of the routes in app.routes.comment (DATABASE_ASYNC=1)
+
+router = APIRouter()
+
+@router.post("/tickets/{ticket_id}/comments", response_model=CommentResponse)
+async def add_comment(
+    ticket_id: int,
+    comment_data: CommentCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Add a comment to a ticket"""
+    ticket = await db.get(Ticket, ticket_id)
+    
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    # Check permissions
+    if ticket.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    new_comment = Comment(
+        content=comment_data.content,
+        ticket_id=ticket_id,
+        user_id=current_user.id
+    )
+    
+    db.add(new_comment)
+    await db.commit()
+    await db.refresh(new_comment)
+    
+    return new_comment
+
+@router.get("/tickets/{ticket_id}/comments", response_model=list[CommentResponse])
+@statement_budget(3)
+async def get_ticket_comments(
+    ticket_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get all comments for a ticket"""
+    ticket = await db.get(Ticket, ticket_id)
+    
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    # Check permissions
+    if ticket.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    result = await db.execute(select(Comment).filter(Comment.ticket_id == ticket_id))
+    return result.scalars().all()
@@ -1,21 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, load_only
 from sqlalchemy import func, desc
 from typing import List, Dict
 from datetime import datetime, timedelta
-from app.database import get_db
+from app.database import get_read_db
 from app.models.ticket import Ticket
 from app.models.feature_request import FeatureRequest
 from app.models.user import User
 from app.models.comment import Comment
 from app.models.attachment import Attachment
+from app.utils import counters, queries
 from app.utils.security import get_current_user
+from app.utils.sql_budget import statement_budget
 
 router = APIRouter()
 
 @router.get("/dashboard/summary")
+@statement_budget(2)
 def get_dashboard_summary(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get dashboard summary statistics"""
@@ -26,76 +29,35 @@ def get_dashboard_summary(
             detail="Not enough permissions"
         )
 
-    # Get total counts
-    total_tickets = db.query(func.count(Ticket.id)).scalar()
-    total_feature_requests = db.query(func.count(FeatureRequest.id)).scalar()
-    total_users = db.query(func.count(User.id)).scalar()
-    total_comments = db.query(func.count(Comment.id)).scalar()
-    total_attachments = db.query(func.count(Attachment.id)).scalar()
-
-    # Get ticket statistics
-    tickets_by_status = db.query(
-        Ticket.status,
-        func.count(Ticket.id)
-    ).group_by(Ticket.status).all()
-    ticket_status_stats = {status: count for status, count in tickets_by_status}
-
-    # Get feature request statistics
-    requests_by_status = db.query(
-        FeatureRequest.status,
-        func.count(FeatureRequest.id)
-    ).group_by(FeatureRequest.status).all()
-    request_status_stats = {status: count for status, count in requests_by_status}
-
-    # Get user statistics
-    users_by_role = db.query(
-        User.role,
-        func.count(User.id)
-    ).group_by(User.role).all()
-    user_role_stats = {role: count for role, count in users_by_role}
-
-    # Get recent activity counts (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    
-    recent_tickets = db.query(func.count(Ticket.id)).filter(
-        Ticket.created_at >= seven_days_ago
-    ).scalar()
-    
-    recent_requests = db.query(func.count(FeatureRequest.id)).filter(
-        FeatureRequest.created_at >= seven_days_ago
-    ).scalar()
-    
-    recent_comments = db.query(func.count(Comment.id)).filter(
-        Comment.created_at >= seven_days_ago
-    ).scalar()
-    
-    recent_attachments = db.query(func.count(Attachment.id)).filter(
-        Attachment.created_at >= seven_days_ago
-    ).scalar()
+    # Read the precomputed counters (one query) instead of counting rows
+    counts = counters.read_counters(
+        db, "tickets", "feature_requests", "users", "comments", "attachments", days=7
+    )
 
     return {
         "total_counts": {
-            "tickets": total_tickets,
-            "feature_requests": total_feature_requests,
-            "users": total_users,
-            "comments": total_comments,
-            "attachments": total_attachments
+            "tickets": counts.get("tickets:total", 0),
+            "feature_requests": counts.get("feature_requests:total", 0),
+            "users": counts.get("users:total", 0),
+            "comments": counts.get("comments:total", 0),
+            "attachments": counts.get("attachments:total", 0)
         },
-        "ticket_status": ticket_status_stats,
-        "feature_request_status": request_status_stats,
-        "user_roles": user_role_stats,
+        "ticket_status": counters.breakdown(counts, "tickets:status"),
+        "feature_request_status": counters.breakdown(counts, "feature_requests:status"),
+        "user_roles": counters.breakdown(counts, "users:role"),
         "recent_activity": {
-            "tickets": recent_tickets,
-            "feature_requests": recent_requests,
-            "comments": recent_comments,
-            "attachments": recent_attachments
+            "tickets": counters.recent(counts, "tickets"),
+            "feature_requests": counters.recent(counts, "feature_requests"),
+            "comments": counters.recent(counts, "comments"),
+            "attachments": counters.recent(counts, "attachments")
         }
     }
 
 @router.get("/dashboard/activity")
+@statement_budget(6)
 def get_dashboard_activity(
     days: int = 7,  # Default to last 7 days
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get recent activity data"""
@@ -111,24 +73,28 @@ def get_dashboard_activity(
     start_date = end_date - timedelta(days=days)
 
     # Get recent tickets
-    recent_tickets = db.query(Ticket).join(User, Ticket.user_id == User.id).filter(
-        Ticket.created_at >= start_date
-    ).order_by(desc(Ticket.created_at)).limit(10).all()
+    recent_tickets = queries.recent_activity(db.query(Ticket), Ticket.user_id, start_date).options(
+        load_only(Ticket.id, Ticket.title, Ticket.status, Ticket.created_at),
+        contains_eager(Ticket.user).load_only(User.username)
+    ).all()
 
     # Get recent feature requests
-    recent_requests = db.query(FeatureRequest).join(User, FeatureRequest.requester_id == User.id).filter(
-        FeatureRequest.created_at >= start_date
-    ).order_by(desc(FeatureRequest.created_at)).limit(10).all()
+    recent_requests = queries.recent_activity(db.query(FeatureRequest), FeatureRequest.requester_id, start_date).options(
+        load_only(FeatureRequest.id, FeatureRequest.title, FeatureRequest.status, FeatureRequest.created_at),
+        contains_eager(FeatureRequest.requester).load_only(User.username)
+    ).all()
 
     # Get recent comments
-    recent_comments = db.query(Comment).join(User, Comment.user_id == User.id).filter(
-        Comment.created_at >= start_date
-    ).order_by(desc(Comment.created_at)).limit(10).all()
+    recent_comments = queries.recent_activity(db.query(Comment), Comment.user_id, start_date).options(
+        load_only(Comment.id, Comment.content, Comment.created_at),
+        contains_eager(Comment.user).load_only(User.username)
+    ).all()
 
     # Get recent attachments
-    recent_attachments = db.query(Attachment).join(User, Attachment.user_id == User.id).filter(
-        Attachment.created_at >= start_date
-    ).order_by(desc(Attachment.created_at)).limit(10).all()
+    recent_attachments = queries.recent_activity(db.query(Attachment), Attachment.user_id, start_date).options(
+        load_only(Attachment.id, Attachment.filename, Attachment.file_type, Attachment.created_at),
+        contains_eager(Attachment.user).load_only(User.username)
+    ).all()
 
     # Get most active users
     most_active_users = db.query(
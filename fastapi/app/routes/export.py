@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from typing import Optional
+from app.models.comment import Comment
+from app.models.feature_request import FeatureRequest, FeatureRequestComment
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.schemas.feature_request import FeatureRequestPriority, FeatureRequestStatus
+from app.schemas.ticket import Priority, Status
+from app.utils import queries
+from app.utils.export import ExportFormat, export_response
+from app.utils.security import get_current_user
+
+router = APIRouter()
+
+def _require_admin(current_user: User) -> None:
+    # Only admin can export
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+def _check_nesting(format: ExportFormat, include_comments: bool) -> None:
+    if include_comments and format != ExportFormat.NDJSON:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nested comments can only be exported as NDJSON"
+        )
+
+@router.get("/export/tickets")
+def export_tickets(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[Status] = None,
+    priority: Optional[Priority] = None,
+    search: Optional[str] = None,
+    assigned_to: Optional[int] = None,
+    include_comments: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all tickets matching the filters of GET /tickets (admin only)"""
+    _require_admin(current_user)
+    _check_nesting(format, include_comments)
+
+    statement = queries.filter_tickets(
+        select(*Ticket.__table__.c).order_by(Ticket.id),
+        assigned_to=assigned_to, status=status, priority=priority, search=search
+    )
+
+    children = None
+    if include_comments:
+        children = (
+            select(*Comment.__table__.c).order_by(Comment.ticket_id, Comment.id),
+            Comment.ticket_id,
+            "comments"
+        )
+    return export_response(statement, format, "tickets", children)
+
+@router.get("/export/comments")
+def export_comments(
+    format: ExportFormat = ExportFormat.NDJSON,
+    ticket_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all ticket comments (admin only)"""
+    _require_admin(current_user)
+
+    statement = select(*Comment.__table__.c).order_by(Comment.id)
+    if ticket_id:
+        statement = statement.where(Comment.ticket_id == ticket_id)
+    return export_response(statement, format, "comments")
+
+@router.get("/export/feature-requests")
+def export_feature_requests(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[FeatureRequestStatus] = None,
+    priority: Optional[FeatureRequestPriority] = None,
+    search: Optional[str] = None,
+    include_comments: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all feature requests matching the filters of GET /feature-requests (admin only)"""
+    _require_admin(current_user)
+    _check_nesting(format, include_comments)
+
+    statement = queries.filter_feature_requests(
+        select(*FeatureRequest.__table__.c).order_by(FeatureRequest.id),
+        status=status, priority=priority, search=search
+    )
+
+    children = None
+    if include_comments:
+        children = (
+            select(*FeatureRequestComment.__table__.c)
+            .order_by(FeatureRequestComment.feature_request_id, FeatureRequestComment.id),
+            FeatureRequestComment.feature_request_id,
+            "comments"
+        )
+    return export_response(statement, format, "feature-requests", children)
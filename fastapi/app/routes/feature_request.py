@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.feature_request import FeatureRequest, FeatureRequestComment
 from app.models.user import User
 from app.schemas.feature_request import (
@@ -9,10 +10,48 @@ from app.schemas.feature_request import (
     FeatureRequestWithComments, FeatureRequestCommentCreate, FeatureRequestCommentResponse,
     FeatureRequestStatus, FeatureRequestPriority
 )
+from app.utils import conditional, fast_json, queries, upvotes
+from app.utils.pagination import paginate
+from app.utils.sql_budget import statement_budget
 from app.utils.security import get_current_user
 
 router = APIRouter()
 
+# Loader strategy for FeatureRequestResponse: comments are batch-loaded for the
+# whole page and any other lazy load raises instead of issuing a query.
+FEATURE_REQUEST_LOAD = (selectinload(FeatureRequest.comments), raiseload("*"))
+
+# FAST_JSON: the comment columns nested under each feature request
+FEATURE_REQUEST_CHILDREN = (
+    FeatureRequestCommentResponse, FeatureRequestComment, FeatureRequestComment.feature_request_id, "comments"
+)
+
+def _feature_request_page(http_request: Request, db: Session, query, response: Response, **page):
+    """One page of feature requests, as ORM objects or (FAST_JSON) an encoded response,
+    or a 304 when the client's copy of the page is current"""
+    if "if-none-match" in http_request.headers:
+        versions = paginate(
+            conditional.feature_request_page_versions(query), response, keyset=(FeatureRequest.id,), **page
+        )
+        etag = conditional.page_etag(versions, response)
+        if conditional.is_not_modified(http_request.headers, etag):
+            return conditional.not_modified(conditional.validator_headers(etag))
+    if fast_json.FAST_JSON:
+        rows = paginate(
+            fast_json.rows(query, FeatureRequestResponse, FeatureRequest), response,
+            keyset=(FeatureRequest.id,), **page
+        )
+        items = fast_json.with_children(db, fast_json.as_dicts(rows), *FEATURE_REQUEST_CHILDREN)
+        response.headers.update(conditional.validator_headers(
+            conditional.page_etag(map(conditional.feature_request_item_version, items), response)
+        ))
+        return fast_json.json_response(items, response)
+    requests = paginate(query, response, keyset=(FeatureRequest.id,), **page)
+    response.headers.update(conditional.validator_headers(
+        conditional.page_etag(map(conditional.feature_request_item_version, requests), response)
+    ))
+    return requests
+
 @router.post("/feature-requests", response_model=FeatureRequestResponse)
 def create_feature_request(
     request_data: FeatureRequestCreate,
@@ -33,43 +72,55 @@ def create_feature_request(
     return new_request
 
 @router.get("/feature-requests", response_model=List[FeatureRequestResponse])
+@statement_budget(5)
 def get_feature_requests(
+    http_request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     status: Optional[FeatureRequestStatus] = None,
     priority: Optional[FeatureRequestPriority] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get feature requests with filtering and pagination"""
-    query = db.query(FeatureRequest)
-    
-    # Apply filters
-    if status:
-        query = query.filter(FeatureRequest.status == status)
-    if priority:
-        query = query.filter(FeatureRequest.priority == priority)
-    if search:
-        query = query.filter(
-            (FeatureRequest.title.ilike(f"%{search}%")) |
-            (FeatureRequest.description.ilike(f"%{search}%"))
-        )
+    query = queries.filter_feature_requests(
+        db.query(FeatureRequest).options(*FEATURE_REQUEST_LOAD), status=status, priority=priority, search=search
+    )
     
     # Apply pagination
-    total = query.count()
-    requests = query.offset(skip).limit(limit).all()
-    
-    return requests
+    return _feature_request_page(
+        http_request, db, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
 
 @router.get("/feature-requests/{request_id}", response_model=FeatureRequestWithComments)
+@statement_budget(4)
 def get_feature_request(
     request_id: int,
-    db: Session = Depends(get_db),
+    http_request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific feature request by ID"""
-    request = db.query(FeatureRequest).filter(FeatureRequest.id == request_id).first()
+    """Get a specific feature request by ID (304 when If-None-Match / If-Modified-Since still hold)"""
+    version = conditional.feature_request_version(db, request_id)
+    
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    headers = conditional.validator_headers(version.etag, version.last_modified)
+    if conditional.is_not_modified(http_request.headers, version.etag, version.last_modified):
+        return conditional.not_modified(headers)
+    response.headers.update(headers)
+    
+    request = db.query(FeatureRequest).options(*FEATURE_REQUEST_LOAD).filter(FeatureRequest.id == request_id).first()
     
     if not request:
         raise HTTPException(
@@ -133,6 +184,7 @@ def delete_feature_request(
             detail="Not enough permissions"
         )
     
+    upvotes.clear_upvotes(db, request_id)
     db.delete(request)
     db.commit()
     return {"message": "Feature request deleted successfully"}
@@ -152,18 +204,48 @@ def upvote_feature_request(
             detail="Feature request not found"
         )
     
+    already_upvoted = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="You have already upvoted this feature request"
+    )
+
     # Check if user has already upvoted
-    if current_user in request.upvoted_by:
+    if upvotes.has_upvoted(db, request_id, current_user.id):
+        raise already_upvoted
+    
+    # Add upvote (a concurrent duplicate trips the primary key)
+    try:
+        upvotes.add_upvote(db, request_id, current_user.id)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise already_upvoted
+    
+    return {"message": "Feature request upvoted successfully", "upvotes_count": request.upvotes_count}
+
+@router.delete("/feature-requests/{request_id}/upvote")
+def remove_feature_request_upvote(
+    request_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Withdraw an upvote from a feature request"""
+    request = db.query(FeatureRequest).filter(FeatureRequest.id == request_id).first()
+    
+    if not request:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already upvoted this feature request"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
         )
     
-    # Add upvote
-    request.upvoted_by.append(current_user)
+    if not upvotes.remove_upvote(db, request_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have not upvoted this feature request"
+        )
     db.commit()
     
-    return {"message": "Feature request upvoted successfully", "upvotes_count": request.upvotes_count}
+    return {"message": "Feature request upvote removed successfully", "upvotes_count": request.upvotes_count}
 
 @router.post("/feature-requests/{request_id}/comments", response_model=FeatureRequestCommentResponse)
 def add_feature_request_comment(
@@ -194,9 +276,10 @@ def add_feature_request_comment(
     return new_comment
 
 @router.get("/feature-requests/{request_id}/comments", response_model=List[FeatureRequestCommentResponse])
+@statement_budget(3)
 def get_feature_request_comments(
     request_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all comments for a feature request"""
@@ -0,0 +1,303 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_async_db, get_async_read_db
+from app.models.feature_request import FeatureRequest, FeatureRequestComment
+from app.models.user import User
+from app.routes.feature_request import FEATURE_REQUEST_CHILDREN, FEATURE_REQUEST_LOAD
+from app.schemas.feature_request import (
+    FeatureRequestCreate, FeatureRequestResponse, FeatureRequestUpdate,
+    FeatureRequestWithComments, FeatureRequestCommentCreate, FeatureRequestCommentResponse,
+    FeatureRequestStatus, FeatureRequestPriority
+)
+from app.utils import conditional, fast_json, queries, upvotes
+from app.utils.pagination import paginate_async
+from app.utils.sql_budget import statement_budget
+from app.utils.security import get_current_user_async
+
+# Async versions of the routes in app.routes.feature_request (DATABASE_ASYNC=1).
+# The upvote helpers are shared with the sync routes through run_sync().
+
+router = APIRouter()
+
+async def _feature_request_page(http_request: Request, db: AsyncSession, query, response: Response, **page):
+    """One page of feature requests, as ORM objects or (FAST_JSON) an encoded response,
+    or a 304 when the client's copy of the page is current"""
+    if "if-none-match" in http_request.headers:
+        versions = await paginate_async(
+            db, conditional.feature_request_page_versions(query), response, keyset=(FeatureRequest.id,), **page
+        )
+        etag = conditional.page_etag(versions, response)
+        if conditional.is_not_modified(http_request.headers, etag):
+            return conditional.not_modified(conditional.validator_headers(etag))
+    if fast_json.FAST_JSON:
+        rows = await paginate_async(
+            db, fast_json.rows(query, FeatureRequestResponse, FeatureRequest), response,
+            keyset=(FeatureRequest.id,), **page
+        )
+        items = await db.run_sync(fast_json.with_children, fast_json.as_dicts(rows), *FEATURE_REQUEST_CHILDREN)
+        response.headers.update(conditional.validator_headers(
+            conditional.page_etag(map(conditional.feature_request_item_version, items), response)
+        ))
+        return fast_json.json_response(items, response)
+    requests = await paginate_async(db, query, response, keyset=(FeatureRequest.id,), **page)
+    response.headers.update(conditional.validator_headers(
+        conditional.page_etag(map(conditional.feature_request_item_version, requests), response)
+    ))
+    return requests
+
+async def _get_feature_request(db: AsyncSession, request_id: int, options=()) -> Optional[FeatureRequest]:
+    # populate_existing reloads a request already in the session, e.g. after
+    # a commit, since an AsyncSession cannot lazily refresh it later on
+    result = await db.execute(
+        select(FeatureRequest).options(*options)
+        .filter(FeatureRequest.id == request_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+@router.post("/feature-requests", response_model=FeatureRequestResponse)
+async def create_feature_request(
+    request_data: FeatureRequestCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Create a new feature request"""
+    new_request = FeatureRequest(
+        title=request_data.title,
+        description=request_data.description,
+        priority=request_data.priority,
+        status=request_data.status,
+        requester_id=current_user.id
+    )
+    db.add(new_request)
+    await db.commit()
+    return await _get_feature_request(db, new_request.id, FEATURE_REQUEST_LOAD)
+
+@router.get("/feature-requests", response_model=List[FeatureRequestResponse])
+@statement_budget(5)
+async def get_feature_requests(
+    http_request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    status: Optional[FeatureRequestStatus] = None,
+    priority: Optional[FeatureRequestPriority] = None,
+    search: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get feature requests with filtering and pagination"""
+    query = queries.filter_feature_requests(
+        select(FeatureRequest).options(*FEATURE_REQUEST_LOAD), status=status, priority=priority, search=search
+    )
+    
+    # Apply pagination
+    return await _feature_request_page(
+        http_request, db, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
+
+@router.get("/feature-requests/{request_id}", response_model=FeatureRequestWithComments)
+@statement_budget(4)
+async def get_feature_request(
+    request_id: int,
+    http_request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get a specific feature request by ID (304 when If-None-Match / If-Modified-Since still hold)"""
+    version = await db.run_sync(conditional.feature_request_version, request_id)
+    
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    headers = conditional.validator_headers(version.etag, version.last_modified)
+    if conditional.is_not_modified(http_request.headers, version.etag, version.last_modified):
+        return conditional.not_modified(headers)
+    response.headers.update(headers)
+    
+    request = await _get_feature_request(db, request_id, FEATURE_REQUEST_LOAD)
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    return request
+
+@router.put("/feature-requests/{request_id}", response_model=FeatureRequestResponse)
+async def update_feature_request(
+    request_id: int,
+    request_data: FeatureRequestUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Update a feature request"""
+    request = await _get_feature_request(db, request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    # Check permissions (only requester or admin can update)
+    if request.requester_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # Update fields
+    update_data = request_data.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(request, key, value)
+    
+    await db.commit()
+    return await _get_feature_request(db, request_id, FEATURE_REQUEST_LOAD)
+
+@router.delete("/feature-requests/{request_id}")
+async def delete_feature_request(
+    request_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Delete a feature request"""
+    request = await _get_feature_request(db, request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    # Check permissions (only requester or admin can delete)
+    if request.requester_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    await db.run_sync(upvotes.clear_upvotes, request_id)
+    await db.delete(request)
+    await db.commit()
+    return {"message": "Feature request deleted successfully"}
+
+@router.post("/feature-requests/{request_id}/upvote")
+async def upvote_feature_request(
+    request_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Upvote a feature request"""
+    request = await _get_feature_request(db, request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    already_upvoted = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="You have already upvoted this feature request"
+    )
+
+    # Check if user has already upvoted
+    if await db.run_sync(upvotes.has_upvoted, request_id, current_user.id):
+        raise already_upvoted
+    
+    # Add upvote (a concurrent duplicate trips the primary key)
+    try:
+        await db.run_sync(upvotes.add_upvote, request_id, current_user.id)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise already_upvoted
+    
+    await db.refresh(request, ["upvotes_count"])
+    return {"message": "Feature request upvoted successfully", "upvotes_count": request.upvotes_count}
+
+@router.delete("/feature-requests/{request_id}/upvote")
+async def remove_feature_request_upvote(
+    request_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Withdraw an upvote from a feature request"""
+    request = await _get_feature_request(db, request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    if not await db.run_sync(upvotes.remove_upvote, request_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have not upvoted this feature request"
+        )
+    await db.commit()
+    
+    await db.refresh(request, ["upvotes_count"])
+    return {"message": "Feature request upvote removed successfully", "upvotes_count": request.upvotes_count}
+
+@router.post("/feature-requests/{request_id}/comments", response_model=FeatureRequestCommentResponse)
+async def add_feature_request_comment(
+    request_id: int,
+    comment_data: FeatureRequestCommentCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Add a comment to a feature request"""
+    request = await db.get(FeatureRequest, request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    new_comment = FeatureRequestComment(
+        content=comment_data.content,
+        feature_request_id=request_id,
+        user_id=current_user.id
+    )
+    
+    db.add(new_comment)
+    await db.commit()
+    await db.refresh(new_comment)
+    
+    return new_comment
+
+@router.get("/feature-requests/{request_id}/comments", response_model=List[FeatureRequestCommentResponse])
+@statement_budget(3)
+async def get_feature_request_comments(
+    request_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get all comments for a feature request"""
+    request = await db.get(FeatureRequest, request_id)
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Feature request not found"
+        )
+    
+    result = await db.execute(
+        select(FeatureRequestComment).filter(FeatureRequestComment.feature_request_id == request_id)
+    )
+    return result.scalars().all()
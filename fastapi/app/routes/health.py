@@ -1,15 +1,27 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
-from app.database import get_db
+from app.database import get_read_db
+from app.utils.security import auth_cache_stats
+from app.utils.stream import hub
 
 router = APIRouter()
 
 @router.get("/health", tags=["Health Check"])
-def health_check(db: Session = Depends(get_db)):
+def health_check(db: Session = Depends(get_read_db)):
     try:
         # Execute a simple query using text()
         db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "database": "not connected", "error": str(e)}
+
+@router.get("/health/auth-cache", tags=["Health Check"])
+def auth_cache_health():
+    """Hit/miss counters of the authenticated-user cache"""
+    return auth_cache_stats()
+
+@router.get("/health/stream", tags=["Health Check"])
+def stream_health():
+    """Open stream connections and events published, delivered and evicted"""
+    return hub.stats()
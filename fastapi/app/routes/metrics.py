@@ -0,0 +1,21 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from app.utils import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Request, SQL, pool and threadpool metrics in the Prometheus text format"""
+    if metrics.METRICS_TOKEN and not secrets.compare_digest(
+        authorization or "", f"Bearer {metrics.METRICS_TOKEN}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    # Rendered on the event loop: the threadpool gauges are read from it
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
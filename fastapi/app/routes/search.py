@@ -1,98 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session, raiseload
 from sqlalchemy import or_
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_read_db
 from app.models.ticket import Ticket
 from app.models.feature_request import FeatureRequest
 from app.models.user import User
 from app.schemas.ticket import TicketResponse
 from app.schemas.feature_request import FeatureRequestResponse
+from app.routes.ticket import TICKET_LOAD
+from app.routes.feature_request import FEATURE_REQUEST_LOAD
 from app.schemas.user import UserResponse
+from app.utils import queries, search_index
+from app.utils.pagination import paginate
+from app.utils.sql_budget import statement_budget
 from app.utils.security import get_current_user
 
 router = APIRouter()
 
 @router.get("/search/tickets", response_model=List[TicketResponse])
+@statement_budget(3)
 def search_tickets(
+    response: Response,
     query: str = Query(..., min_length=2, description="Search query"),
     status: Optional[str] = None,
     priority: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Search tickets by title, description, or user"""
+    """Search tickets by title, description, or user.
+
+    Cursor pages are keyed on the relevance rank, which moves whenever the
+    index changes: a write between two pages can skip or repeat a result.
+    """
     # Base query
-    search_query = db.query(Ticket)
-    
-    # Apply search filter
-    search_filter = or_(
-        Ticket.title.ilike(f"%{query}%"),
-        Ticket.description.ilike(f"%{query}%"),
-        User.username.ilike(f"%{query}%")
-    )
-    search_query = search_query.join(User, Ticket.user_id == User.id).filter(search_filter)
+    search_query = db.query(Ticket).options(*TICKET_LOAD)
     
-    # Apply additional filters
-    if status:
-        search_query = search_query.filter(Ticket.status == status)
-    if priority:
-        search_query = search_query.filter(Ticket.priority == priority)
-    
-    # Apply permissions (users can only see their own tickets unless admin)
-    if current_user.role != "admin":
-        search_query = search_query.filter(Ticket.user_id == current_user.id)
+    # Apply full-text search filter (ranked by relevance)
+    search_query, rank = search_index.search_tickets(search_query, query)
     
-    # Apply pagination
-    total = search_query.count()
-    tickets = search_query.offset(skip).limit(limit).all()
+    # Apply additional filters and permissions (users can only see their
+    # own tickets unless admin)
+    search_query = queries.filter_tickets(
+        search_query,
+        user_id=None if current_user.role == "admin" else current_user.id,
+        status=status, priority=priority
+    )
     
-    return tickets
+    # Apply pagination (search results are ordered by relevance)
+    return paginate(
+        search_query, response, keyset=(rank, Ticket.id), limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
 
 @router.get("/search/feature-requests", response_model=List[FeatureRequestResponse])
+@statement_budget(4)
 def search_feature_requests(
+    response: Response,
     query: str = Query(..., min_length=2, description="Search query"),
     status: Optional[str] = None,
     priority: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Search feature requests by title, description, or user"""
+    """Search feature requests by title, description, or user.
+
+    Cursor pages are keyed on the relevance rank, which moves whenever the
+    index changes: a write between two pages can skip or repeat a result.
+    """
     # Base query
-    search_query = db.query(FeatureRequest)
+    search_query = db.query(FeatureRequest).options(*FEATURE_REQUEST_LOAD)
     
-    # Apply search filter
-    search_filter = or_(
-        FeatureRequest.title.ilike(f"%{query}%"),
-        FeatureRequest.description.ilike(f"%{query}%"),
-        User.username.ilike(f"%{query}%")
-    )
-    search_query = search_query.join(User, FeatureRequest.requester_id == User.id).filter(search_filter)
+    # Apply full-text search filter (ranked by relevance)
+    search_query, rank = search_index.search_feature_requests(search_query, query)
     
     # Apply additional filters
-    if status:
-        search_query = search_query.filter(FeatureRequest.status == status)
-    if priority:
-        search_query = search_query.filter(FeatureRequest.priority == priority)
+    search_query = queries.filter_feature_requests(search_query, status=status, priority=priority)
     
-    # Apply pagination
-    total = search_query.count()
-    requests = search_query.offset(skip).limit(limit).all()
-    
-    return requests
+    # Apply pagination (search results are ordered by relevance)
+    return paginate(
+        search_query, response, keyset=(rank, FeatureRequest.id), limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
 
 @router.get("/search/users", response_model=List[UserResponse])
+@statement_budget(3)
 def search_users(
+    response: Response,
     query: str = Query(..., min_length=2, description="Search query"),
     role: Optional[str] = None,
     is_active: Optional[bool] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Search users by username or email"""
@@ -104,7 +114,7 @@ def search_users(
         )
     
     # Base query
-    search_query = db.query(User)
+    search_query = db.query(User).options(raiseload("*"))
     
     # Apply search filter
     search_filter = or_(
@@ -120,7 +130,7 @@ def search_users(
         search_query = search_query.filter(User.is_active == is_active)
     
     # Apply pagination
-    total = search_query.count()
-    users = search_query.offset(skip).limit(limit).all()
-    
-    return users 
\ No newline at end of file
+    return paginate(
+        search_query, response, keyset=(User.id,), limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    ) 
\ No newline at end of file
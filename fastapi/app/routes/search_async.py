@@ -0,0 +1,139 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from sqlalchemy import or_, select
+from typing import List, Optional
+from app.database import get_async_read_db
+from app.models.ticket import Ticket
+from app.models.feature_request import FeatureRequest
+from app.models.user import User
+from app.schemas.ticket import TicketResponse
+from app.schemas.feature_request import FeatureRequestResponse
+from app.routes.ticket import TICKET_LOAD
+from app.routes.feature_request import FEATURE_REQUEST_LOAD
+from app.schemas.user import UserResponse
+from app.utils import queries, search_index
+from app.utils.pagination import paginate_async
+from app.utils.sql_budget import statement_budget
+from app.utils.security import get_current_user_async
+
+# Async versions of the routes in app.routes.search (DATABASE_ASYNC=1)
+
+router = APIRouter()
+
+@router.get("/search/tickets", response_model=List[TicketResponse])
+@statement_budget(3)
+async def search_tickets(
+    response: Response,
+    query: str = Query(..., min_length=2, description="Search query"),
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Search tickets by title, description, or user.
+
+    Cursor pages are keyed on the relevance rank, which moves whenever the
+    index changes: a write between two pages can skip or repeat a result.
+    """
+    # Base query
+    search_query = select(Ticket).options(*TICKET_LOAD)
+    
+    # Apply full-text search filter (ranked by relevance)
+    search_query, rank = search_index.search_tickets(search_query, query)
+    
+    # Apply additional filters and permissions (users can only see their
+    # own tickets unless admin)
+    search_query = queries.filter_tickets(
+        search_query,
+        user_id=None if current_user.role == "admin" else current_user.id,
+        status=status, priority=priority
+    )
+    
+    # Apply pagination (search results are ordered by relevance)
+    return await paginate_async(
+        db, search_query, response, keyset=(rank, Ticket.id), limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
+
+@router.get("/search/feature-requests", response_model=List[FeatureRequestResponse])
+@statement_budget(4)
+async def search_feature_requests(
+    response: Response,
+    query: str = Query(..., min_length=2, description="Search query"),
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Search feature requests by title, description, or user.
+
+    Cursor pages are keyed on the relevance rank, which moves whenever the
+    index changes: a write between two pages can skip or repeat a result.
+    """
+    # Base query
+    search_query = select(FeatureRequest).options(*FEATURE_REQUEST_LOAD)
+    
+    # Apply full-text search filter (ranked by relevance)
+    search_query, rank = search_index.search_feature_requests(search_query, query)
+    
+    # Apply additional filters
+    search_query = queries.filter_feature_requests(search_query, status=status, priority=priority)
+    
+    # Apply pagination (search results are ordered by relevance)
+    return await paginate_async(
+        db, search_query, response, keyset=(rank, FeatureRequest.id), limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
+
+@router.get("/search/users", response_model=List[UserResponse])
+@statement_budget(3)
+async def search_users(
+    response: Response,
+    query: str = Query(..., min_length=2, description="Search query"),
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Search users by username or email"""
+    # Only admin can search users
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # Base query
+    search_query = select(User).options(raiseload("*"))
+    
+    # Apply search filter
+    search_filter = or_(
+        User.username.ilike(f"%{query}%"),
+        User.email.ilike(f"%{query}%")
+    )
+    search_query = search_query.filter(search_filter)
+    
+    # Apply additional filters
+    if role:
+        search_query = search_query.filter(User.role == role)
+    if is_active is not None:
+        search_query = search_query.filter(User.is_active == is_active)
+    
+    # Apply pagination
+    return await paginate_async(
+        db, search_query, response, keyset=(User.id,), limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    ) 
\ No newline at end of file
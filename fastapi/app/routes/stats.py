@@ -2,17 +2,18 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Dict, List
-from app.database import get_db
+from app.database import get_read_db
 from app.models.ticket import Ticket
 from app.models.feature_request import FeatureRequest
 from app.models.user import User
+from app.utils import counters, queries
 from app.utils.security import get_current_user
 
 router = APIRouter()
 
 @router.get("/stats/tickets")
 def get_ticket_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get statistics about tickets"""
@@ -23,22 +24,11 @@ def get_ticket_stats(
             detail="Not enough permissions"
         )
 
-    # Total tickets
-    total_tickets = db.query(func.count(Ticket.id)).scalar()
-
-    # Tickets by status
-    tickets_by_status = db.query(
-        Ticket.status,
-        func.count(Ticket.id)
-    ).group_by(Ticket.status).all()
-    status_stats = {status: count for status, count in tickets_by_status}
-
-    # Tickets by priority
-    tickets_by_priority = db.query(
-        Ticket.priority,
-        func.count(Ticket.id)
-    ).group_by(Ticket.priority).all()
-    priority_stats = {priority: count for priority, count in tickets_by_priority}
+    # Totals and breakdowns come from the precomputed counters
+    counts = counters.read_counters(db, "tickets")
+    total_tickets = counts.get("tickets:total", 0)
+    status_stats = counters.breakdown(counts, "tickets:status")
+    priority_stats = counters.breakdown(counts, "tickets:priority")
 
     # Tickets by user (created by)
     tickets_by_user = db.query(
@@ -48,7 +38,7 @@ def get_ticket_stats(
     user_stats = {username: count for username, count in tickets_by_user}
 
     # Assigned tickets count
-    assigned_tickets = db.query(func.count(Ticket.id)).filter(Ticket.assigned_to.isnot(None)).scalar()
+    assigned_tickets = counts.get("tickets:assigned", 0)
 
     return {
         "total_tickets": total_tickets,
@@ -60,7 +50,7 @@ def get_ticket_stats(
 
 @router.get("/stats/feature-requests")
 def get_feature_request_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get statistics about feature requests"""
@@ -71,22 +61,11 @@ def get_feature_request_stats(
             detail="Not enough permissions"
         )
 
-    # Total feature requests
-    total_requests = db.query(func.count(FeatureRequest.id)).scalar()
-
-    # Requests by status
-    requests_by_status = db.query(
-        FeatureRequest.status,
-        func.count(FeatureRequest.id)
-    ).group_by(FeatureRequest.status).all()
-    status_stats = {status: count for status, count in requests_by_status}
-
-    # Requests by priority
-    requests_by_priority = db.query(
-        FeatureRequest.priority,
-        func.count(FeatureRequest.id)
-    ).group_by(FeatureRequest.priority).all()
-    priority_stats = {priority: count for priority, count in requests_by_priority}
+    # Totals and breakdowns come from the precomputed counters
+    counts = counters.read_counters(db, "feature_requests")
+    total_requests = counts.get("feature_requests:total", 0)
+    status_stats = counters.breakdown(counts, "feature_requests:status")
+    priority_stats = counters.breakdown(counts, "feature_requests:priority")
 
     # Requests by user
     requests_by_user = db.query(
@@ -96,10 +75,7 @@ def get_feature_request_stats(
     user_stats = {username: count for username, count in requests_by_user}
 
     # Most upvoted requests
-    most_upvoted = db.query(
-        FeatureRequest.title,
-        func.count(FeatureRequest.id).label('upvotes')
-    ).join(FeatureRequest.upvoted_by).group_by(FeatureRequest.id).order_by(func.count(FeatureRequest.id).desc()).limit(5).all()
+    most_upvoted = queries.top_upvoted(db.query(FeatureRequest.title, FeatureRequest.upvotes_count)).all()
     top_upvoted = [{"title": title, "upvotes": upvotes} for title, upvotes in most_upvoted]
 
     return {
@@ -112,7 +88,7 @@ def get_feature_request_stats(
 
 @router.get("/stats/users")
 def get_user_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get statistics about users"""
@@ -123,19 +99,14 @@ def get_user_stats(
             detail="Not enough permissions"
         )
 
-    # Total users
-    total_users = db.query(func.count(User.id)).scalar()
-
-    # Users by role
-    users_by_role = db.query(
-        User.role,
-        func.count(User.id)
-    ).group_by(User.role).all()
-    role_stats = {role: count for role, count in users_by_role}
+    # Totals and breakdowns come from the precomputed counters
+    counts = counters.read_counters(db, "users")
+    total_users = counts.get("users:total", 0)
+    role_stats = counters.breakdown(counts, "users:role")
 
     # Active vs inactive users
-    active_users = db.query(func.count(User.id)).filter(User.is_active == True).scalar()
-    inactive_users = db.query(func.count(User.id)).filter(User.is_active == False).scalar()
+    active_users = counts.get("users:active", 0)
+    inactive_users = counts.get("users:inactive", 0)
 
     # Most active users (by ticket creation)
     most_active_users = db.query(
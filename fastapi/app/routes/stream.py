@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from app.utils import stream
+from app.utils.security import AuthenticatedUser, authenticate_token, token_expires_at
+
+router = APIRouter()
+
+# Neither EventSource nor the browser WebSocket API can set headers, so the
+# token may also be passed as ?access_token=. Streams don't take the usual
+# get_db/get_current_user dependencies: an idle connection must not hold a
+# pooled database connection for its whole lifetime.
+
+def _bearer_token(authorization: Optional[str], access_token: Optional[str]) -> Optional[str]:
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+    return access_token
+
+def _hub_full() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many stream connections",
+        headers={"Retry-After": "5"}
+    )
+
+def _seconds_left(expires_at: Optional[float]) -> float:
+    if expires_at is None:
+        return stream.STREAM_HEARTBEAT_SECONDS
+    return min(stream.STREAM_HEARTBEAT_SECONDS, expires_at - time.time())
+
+def _sse(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+async def _server_sent_events(user: AuthenticatedUser, expires_at: Optional[float]):
+    # Subscribing here rather than in the route means the generator's finally
+    # always runs for a subscription that exists
+    subscription = stream.hub.subscribe(user.id, user.role == "admin")
+    if subscription is None:
+        yield _sse("reset", {"reason": "too many connections"})
+        return
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            timeout = _seconds_left(expires_at)
+            if timeout <= 0:
+                yield _sse("expired", {"reason": "token expired"})
+                return
+            batch = await subscription.next_batch(timeout)
+            if subscription.closed:
+                # Events were dropped: the client should refetch what it shows
+                yield _sse("reset", {"reason": subscription.closed})
+                return
+            if batch:
+                yield "".join(f"data: {data}\n\n" for data in batch)
+            else:
+                yield ": keepalive\n\n"
+    finally:
+        stream.hub.unsubscribe(subscription)
+
+@router.get("/stream")
+async def stream_changes(request: Request, access_token: Optional[str] = None):
+    """Server-sent events for changes to the tickets and feature requests the user can see"""
+    token = _bearer_token(request.headers.get("authorization"), access_token)
+    user = await authenticate_token(token)
+    if stream.hub.stats()["connections"] >= stream.hub.max_connections:
+        raise _hub_full()
+    return StreamingResponse(
+        _server_sent_events(user, token_expires_at(token)),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: no keeps nginx from holding events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _watch_disconnect(websocket: WebSocket, subscription: stream.Subscription) -> None:
+    # Client messages are ignored; this only notices the connection closing
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        subscription.close("disconnected")
+
+@router.websocket("/stream/ws")
+async def stream_changes_websocket(websocket: WebSocket, access_token: Optional[str] = None):
+    """The same events as GET /stream, one JSON text message each"""
+    token = _bearer_token(websocket.headers.get("authorization"), access_token)
+    try:
+        user = await authenticate_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+        return
+    subscription = stream.hub.subscribe(user.id, user.role == "admin")
+    if subscription is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many stream connections")
+        return
+    expires_at = token_expires_at(token)
+    await websocket.accept()
+    watcher = asyncio.create_task(_watch_disconnect(websocket, subscription))
+    try:
+        while True:
+            timeout = _seconds_left(expires_at)
+            if timeout <= 0:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="token expired")
+                return
+            batch = await subscription.next_batch(timeout)
+            if subscription.closed == "disconnected":
+                return
+            if subscription.closed:
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=subscription.closed)
+                return
+            for data in batch:
+                await websocket.send_text(data)
+    finally:
+        watcher.cancel()
+        stream.hub.unsubscribe(subscription)
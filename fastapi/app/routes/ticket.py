@@ -1,34 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from collections import Counter
+from datetime import datetime
+from enum import Enum
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, raiseload, selectinload
 from typing import List, Optional
-from jose import JWTError, jwt
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.ticket import Ticket
 from app.models.user import User
 from app.schemas.ticket import (
+    TicketBulkCreate, TicketBulkResult, TicketBulkUpdate, TicketBulkUpdateItem,
     TicketCreate, TicketResponse, TicketUpdate, TicketWithComments,
     Priority, Status
 )
-from app.utils.security import oauth2_scheme, SECRET_KEY, ALGORITHM, get_current_user
+from app.utils import changes, conditional, counters, fast_json, queries, stream
+from app.utils.pagination import invalidate_totals_on_commit, paginate
+from app.utils.sql_budget import statement_budget
+from app.utils.security import get_current_user
 
 router = APIRouter()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Helper function to get the authenticated user from the token"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
+# Loader strategies per response model: everything the response serializes is
+# loaded up front, and any other lazy load raises instead of issuing a query.
+TICKET_LOAD = (raiseload("*"),)
+TICKET_WITH_COMMENTS_LOAD = (selectinload(Ticket.comments), raiseload("*"))
 
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-
-        return user
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication")
+def _ticket_page(request: Request, query, response: Response, **page):
+    """One page of tickets, as ORM objects or (FAST_JSON) an encoded response,
+    or a 304 when the client's copy of the page is current"""
+    if "if-none-match" in request.headers:
+        versions = paginate(conditional.ticket_page_versions(query), response, keyset=(Ticket.id,), **page)
+        etag = conditional.page_etag(versions, response)
+        if conditional.is_not_modified(request.headers, etag):
+            return conditional.not_modified(conditional.validator_headers(etag))
+    if fast_json.FAST_JSON:
+        rows = paginate(fast_json.rows(query, TicketResponse, Ticket), response, keyset=(Ticket.id,), **page)
+        items = fast_json.as_dicts(rows)
+        response.headers.update(conditional.validator_headers(
+            conditional.page_etag(map(conditional.ticket_item_version, items), response)
+        ))
+        return fast_json.json_response(items, response)
+    tickets = paginate(query, response, keyset=(Ticket.id,), **page)
+    response.headers.update(conditional.validator_headers(
+        conditional.page_etag(map(conditional.ticket_item_version, tickets), response)
+    ))
+    return tickets
 
 @router.post("/tickets", response_model=TicketResponse)
 def create_ticket(
@@ -49,128 +65,255 @@ def create_ticket(
     db.refresh(new_ticket)
     return new_ticket
 
+# Columns an update may not set to null
+REQUIRED_TICKET_FIELDS = ("title", "priority", "status")
+
+def create_tickets(db: Session, items: List[TicketCreate], current_user: User) -> List[TicketBulkResult]:
+    """Insert tickets in one flush; the caller commits.
+
+    PostgreSQL gets one multi-row INSERT ... RETURNING; SQLite can't return
+    the ids of a multi-row INSERT in order, so there it is one prepared INSERT
+    per ticket, still in a single transaction.
+    """
+    tickets = [
+        Ticket(
+            title=item.title,
+            description=item.description,
+            priority=item.priority,
+            status=item.status,
+            user_id=current_user.id
+        )
+        for item in items
+    ]
+    db.add_all(tickets)
+    db.flush()
+    # Serialized before the commit expires them, so nothing is reloaded
+    return [
+        TicketBulkResult(id=ticket.id, status_code=status.HTTP_201_CREATED, ticket=TicketResponse.model_validate(ticket))
+        for ticket in tickets
+    ]
+
+def update_tickets(db: Session, items: List[TicketBulkUpdateItem], current_user: User) -> List[TicketBulkResult]:
+    """Apply each permitted update; the caller commits.
+
+    Items are checked like update_ticket does (404, 403), and the ones that
+    set the same values share one UPDATE ... WHERE id IN (...); the rest go
+    out as a single executemany. Counters, cached totals, stream events and
+    the change log are handled here since Core UPDATEs bypass the session's
+    flush hooks.
+    """
+    columns = counters.tracked_columns(Ticket)
+    rows = {
+        row.id: row._mapping
+        for row in db.execute(
+            select(Ticket.id, Ticket.user_id, *[getattr(Ticket, column) for column in columns])
+            .where(Ticket.id.in_({item.id for item in items}))
+        )
+    }
+    assignees = {item.assigned_to for item in items if item.assigned_to is not None}
+    users = set(db.execute(select(User.id).where(User.id.in_(assignees))).scalars()) if assignees else set()
+
+    results, groups, seen = [], {}, set()
+    for item in items:
+        values = {
+            key: value.value if isinstance(value, Enum) else value
+            for key, value in item.model_dump(exclude_unset=True, exclude={"id"}).items()
+        }
+        row = rows.get(item.id)
+        if item.id in seen:
+            error = (status.HTTP_400_BAD_REQUEST, "Ticket appears more than once in this request")
+        elif row is None:
+            error = (status.HTTP_404_NOT_FOUND, "Ticket not found")
+        elif row["user_id"] != current_user.id and current_user.role != "admin":
+            error = (status.HTTP_403_FORBIDDEN, "Not enough permissions")
+        elif any(key in values and values[key] is None for key in REQUIRED_TICKET_FIELDS):
+            error = (status.HTTP_422_UNPROCESSABLE_ENTITY, "title, priority and status cannot be null")
+        elif values.get("assigned_to") is not None and values["assigned_to"] not in users:
+            error = (status.HTTP_422_UNPROCESSABLE_ENTITY, "Assigned user not found")
+        else:
+            error = None
+            groups.setdefault(tuple(sorted(values.items())), []).append(item.id)
+        seen.add(item.id)
+        results.append(TicketBulkResult(
+            id=item.id,
+            status_code=error[0] if error else status.HTTP_200_OK,
+            detail=error[1] if error else None
+        ))
+
+    now = datetime.utcnow()
+    deltas, single_updates = Counter(), []
+    for key, ids in groups.items():
+        values = dict(key)
+        for ticket_id in ids:
+            deltas.update(counters.bulk_update_deltas(Ticket, rows[ticket_id], values))
+            stream.record_ticket_update(db, ticket_id, rows[ticket_id]["user_id"], rows[ticket_id]["assigned_to"], values)
+            changes.record(db, Ticket, ticket_id, changes.UPDATED, {**rows[ticket_id], **values}, [*values, "updated_at"])
+        if len(ids) > 1:
+            db.execute(update(Ticket).where(Ticket.id.in_(ids)).values(**values, updated_at=now))
+        else:
+            single_updates.append({"id": ids[0], **values, "updated_at": now})
+    if single_updates:
+        # ORM bulk UPDATE by primary key: one executemany per set of columns
+        db.execute(update(Ticket), single_updates)
+    if groups:
+        counters.apply_deltas(db.connection(), deltas)
+        invalidate_totals_on_commit(db, Ticket.__tablename__)
+
+    updated = {
+        ticket.id: ticket
+        for ticket in db.query(Ticket).options(*TICKET_LOAD).populate_existing()
+        .filter(Ticket.id.in_([ticket_id for ids in groups.values() for ticket_id in ids]))
+    }
+    for result in results:
+        if result.id in updated and result.status_code == status.HTTP_200_OK:
+            result.ticket = TicketResponse.model_validate(updated[result.id])
+    return results
+
+@router.post("/tickets/bulk", response_model=List[TicketBulkResult])
+def create_tickets_bulk(
+    bulk: TicketBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create up to BULK_MAX_OPERATIONS tickets in one transaction"""
+    results = create_tickets(db, bulk.tickets, current_user)
+    db.commit()
+    return results
+
+@router.patch("/tickets/bulk", response_model=List[TicketBulkResult])
+def update_tickets_bulk(
+    bulk: TicketBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update (reassign, reprioritize, close, ...) up to BULK_MAX_OPERATIONS
+    tickets in one transaction, with a result per item"""
+    results = update_tickets(db, bulk.tickets, current_user)
+    db.commit()
+    return results
+
 @router.get("/tickets", response_model=List[TicketResponse])
+@statement_budget(4)
 def get_tickets(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     status: Optional[Status] = None,
     priority: Optional[Priority] = None,
     search: Optional[str] = None,
     assigned_to: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get tickets with filtering and pagination"""
-    query = db.query(Ticket)
-    
-    # Apply filters based on user role
-    if current_user.role != "admin":
-        query = query.filter(Ticket.user_id == current_user.id)
-    
-    # Apply filters
-    if status:
-        query = query.filter(Ticket.status == status)
-    if priority:
-        query = query.filter(Ticket.priority == priority)
-    if assigned_to:
-        query = query.filter(Ticket.assigned_to == assigned_to)
-    if search:
-        search_filter = or_(
-            Ticket.title.ilike(f"%{search}%"),
-            Ticket.description.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+    # Apply filters (users only see their own tickets unless admin)
+    query = queries.filter_tickets(
+        db.query(Ticket).options(*TICKET_LOAD),
+        user_id=None if current_user.role == "admin" else current_user.id,
+        assigned_to=assigned_to, status=status, priority=priority, search=search
+    )
     
     # Apply pagination
-    total = query.count()
-    tickets = query.offset(skip).limit(limit).all()
-    
-    return tickets
+    return _ticket_page(
+        request, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
 
 @router.get("/tickets/me", response_model=List[TicketResponse])
+@statement_budget(4)
 def get_my_tickets(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     status: Optional[Status] = None,
     priority: Optional[Priority] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get tickets created by the current user"""
-    query = db.query(Ticket).filter(Ticket.user_id == current_user.id)
-    
-    # Apply filters
-    if status:
-        query = query.filter(Ticket.status == status)
-    if priority:
-        query = query.filter(Ticket.priority == priority)
-    if search:
-        search_filter = or_(
-            Ticket.title.ilike(f"%{search}%"),
-            Ticket.description.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+    query = queries.filter_tickets(
+        db.query(Ticket).options(*TICKET_LOAD),
+        user_id=current_user.id, status=status, priority=priority, search=search
+    )
     
     # Apply pagination
-    total = query.count()
-    tickets = query.offset(skip).limit(limit).all()
-    
-    return tickets
+    return _ticket_page(
+        request, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
 
 @router.get("/tickets/assigned", response_model=List[TicketResponse])
+@statement_budget(4)
 def get_assigned_tickets(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     status: Optional[Status] = None,
     priority: Optional[Priority] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get tickets assigned to the current user"""
-    query = db.query(Ticket).filter(Ticket.assigned_to == current_user.id)
-    
-    # Apply filters
-    if status:
-        query = query.filter(Ticket.status == status)
-    if priority:
-        query = query.filter(Ticket.priority == priority)
-    if search:
-        search_filter = or_(
-            Ticket.title.ilike(f"%{search}%"),
-            Ticket.description.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+    query = queries.filter_tickets(
+        db.query(Ticket).options(*TICKET_LOAD),
+        assigned_to=current_user.id, status=status, priority=priority, search=search
+    )
     
     # Apply pagination
-    total = query.count()
-    tickets = query.offset(skip).limit(limit).all()
-    
-    return tickets
+    return _ticket_page(
+        request, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
 
 @router.get("/tickets/{ticket_id}", response_model=TicketWithComments)
+@statement_budget(4)
 def get_ticket(
     ticket_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific ticket by ID"""
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    """Get a specific ticket by ID (304 when If-None-Match / If-Modified-Since still hold)"""
+    version = conditional.ticket_version(db, ticket_id)
     
-    if not ticket:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not found"
         )
     
     # Check permissions
-    if ticket.user_id != current_user.id and current_user.role != "admin":
+    if version.owner_id != current_user.id and current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
+    headers = conditional.validator_headers(version.etag, version.last_modified)
+    if conditional.is_not_modified(request.headers, version.etag, version.last_modified):
+        return conditional.not_modified(headers)
+    response.headers.update(headers)
+    
+    ticket = db.query(Ticket).options(*TICKET_WITH_COMMENTS_LOAD).filter(Ticket.id == ticket_id).first()
+    
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
     return ticket
 
 @router.put("/tickets/{ticket_id}", response_model=TicketResponse)
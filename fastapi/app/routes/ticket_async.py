@@ -0,0 +1,271 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_async_db, get_async_read_db
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.routes.ticket import TICKET_LOAD, TICKET_WITH_COMMENTS_LOAD, create_tickets, update_tickets
+from app.schemas.ticket import (
+    TicketBulkCreate, TicketBulkResult, TicketBulkUpdate,
+    TicketCreate, TicketResponse, TicketUpdate, TicketWithComments,
+    Priority, Status
+)
+from app.utils import conditional, fast_json, queries
+from app.utils.pagination import paginate_async
+from app.utils.sql_budget import statement_budget
+from app.utils.security import get_current_user_async
+
+# Async versions of the routes in app.routes.ticket, served instead of them
+# when DATABASE_ASYNC=1. Same paths, responses and statement budgets.
+
+router = APIRouter()
+
+async def _ticket_page(request: Request, db: AsyncSession, query, response: Response, **page):
+    """One page of tickets, as ORM objects or (FAST_JSON) an encoded response,
+    or a 304 when the client's copy of the page is current"""
+    if "if-none-match" in request.headers:
+        versions = await paginate_async(db, conditional.ticket_page_versions(query), response, keyset=(Ticket.id,), **page)
+        etag = conditional.page_etag(versions, response)
+        if conditional.is_not_modified(request.headers, etag):
+            return conditional.not_modified(conditional.validator_headers(etag))
+    if fast_json.FAST_JSON:
+        rows = await paginate_async(db, fast_json.rows(query, TicketResponse, Ticket), response, keyset=(Ticket.id,), **page)
+        items = fast_json.as_dicts(rows)
+        response.headers.update(conditional.validator_headers(
+            conditional.page_etag(map(conditional.ticket_item_version, items), response)
+        ))
+        return fast_json.json_response(items, response)
+    tickets = await paginate_async(db, query, response, keyset=(Ticket.id,), **page)
+    response.headers.update(conditional.validator_headers(
+        conditional.page_etag(map(conditional.ticket_item_version, tickets), response)
+    ))
+    return tickets
+
+async def _get_ticket(db: AsyncSession, ticket_id: int, options=()) -> Optional[Ticket]:
+    result = await db.execute(select(Ticket).options(*options).filter(Ticket.id == ticket_id))
+    return result.scalars().first()
+
+@router.post("/tickets", response_model=TicketResponse)
+async def create_ticket(
+    ticket_data: TicketCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Create a new ticket"""
+    new_ticket = Ticket(
+        title=ticket_data.title,
+        description=ticket_data.description,
+        priority=ticket_data.priority,
+        status=ticket_data.status,
+        user_id=current_user.id
+    )
+    db.add(new_ticket)
+    await db.commit()
+    await db.refresh(new_ticket)
+    return new_ticket
+
+@router.post("/tickets/bulk", response_model=List[TicketBulkResult])
+async def create_tickets_bulk(
+    bulk: TicketBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Create up to BULK_MAX_OPERATIONS tickets in one transaction"""
+    results = await db.run_sync(create_tickets, bulk.tickets, current_user)
+    await db.commit()
+    return results
+
+@router.patch("/tickets/bulk", response_model=List[TicketBulkResult])
+async def update_tickets_bulk(
+    bulk: TicketBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Update (reassign, reprioritize, close, ...) up to BULK_MAX_OPERATIONS
+    tickets in one transaction, with a result per item"""
+    results = await db.run_sync(update_tickets, bulk.tickets, current_user)
+    await db.commit()
+    return results
+
+@router.get("/tickets", response_model=List[TicketResponse])
+@statement_budget(4)
+async def get_tickets(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    status: Optional[Status] = None,
+    priority: Optional[Priority] = None,
+    search: Optional[str] = None,
+    assigned_to: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get tickets with filtering and pagination"""
+    # Apply filters (users only see their own tickets unless admin)
+    query = queries.filter_tickets(
+        select(Ticket).options(*TICKET_LOAD),
+        user_id=None if current_user.role == "admin" else current_user.id,
+        assigned_to=assigned_to, status=status, priority=priority, search=search
+    )
+    
+    # Apply pagination
+    return await _ticket_page(
+        request, db, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
+
+@router.get("/tickets/me", response_model=List[TicketResponse])
+@statement_budget(4)
+async def get_my_tickets(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    status: Optional[Status] = None,
+    priority: Optional[Priority] = None,
+    search: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get tickets created by the current user"""
+    query = queries.filter_tickets(
+        select(Ticket).options(*TICKET_LOAD),
+        user_id=current_user.id, status=status, priority=priority, search=search
+    )
+    
+    # Apply pagination
+    return await _ticket_page(
+        request, db, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
+
+@router.get("/tickets/assigned", response_model=List[TicketResponse])
+@statement_budget(4)
+async def get_assigned_tickets(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    status: Optional[Status] = None,
+    priority: Optional[Priority] = None,
+    search: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get tickets assigned to the current user"""
+    query = queries.filter_tickets(
+        select(Ticket).options(*TICKET_LOAD),
+        assigned_to=current_user.id, status=status, priority=priority, search=search
+    )
+    
+    # Apply pagination
+    return await _ticket_page(
+        request, db, query, response, limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
+
+@router.get("/tickets/{ticket_id}", response_model=TicketWithComments)
+@statement_budget(4)
+async def get_ticket(
+    ticket_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get a specific ticket by ID (304 when If-None-Match / If-Modified-Since still hold)"""
+    version = await db.run_sync(conditional.ticket_version, ticket_id)
+    
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    # Check permissions
+    if version.owner_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    headers = conditional.validator_headers(version.etag, version.last_modified)
+    if conditional.is_not_modified(request.headers, version.etag, version.last_modified):
+        return conditional.not_modified(headers)
+    response.headers.update(headers)
+    
+    ticket = await _get_ticket(db, ticket_id, TICKET_WITH_COMMENTS_LOAD)
+    
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    return ticket
+
+@router.put("/tickets/{ticket_id}", response_model=TicketResponse)
+async def update_ticket(
+    ticket_id: int,
+    ticket_data: TicketUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Update a ticket"""
+    ticket = await _get_ticket(db, ticket_id)
+    
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    # Check permissions
+    if ticket.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # Update fields
+    update_data = ticket_data.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(ticket, key, value)
+    
+    await db.commit()
+    await db.refresh(ticket)
+    return ticket
+
+@router.delete("/tickets/{ticket_id}")
+async def delete_ticket(
+    ticket_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Delete a ticket"""
+    ticket = await _get_ticket(db, ticket_id)
+    
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    # Check permissions
+    if ticket.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    await db.delete(ticket)
+    await db.commit()
+    return {"message": "Ticket deleted successfully"}
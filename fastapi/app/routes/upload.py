@@ -1,63 +1,42 @@
-import os
-import shutil
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, raiseload
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.attachment import Attachment
 from app.models.user import User
 from app.models.ticket import Ticket
 from app.models.feature_request import FeatureRequest
 from app.schemas.attachment import AttachmentResponse
+from app.utils import blobs, content_types, downloads, jobs, uploads
 from app.utils.security import get_current_user
-from datetime import datetime
 
 router = APIRouter()
 
-# Configure upload directory
-UPLOAD_DIR = "uploads"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
-
-def save_file(file: UploadFile, user_id: int) -> str:
-    """Save uploaded file and return the file path"""
-    # Create user-specific directory
-    user_dir = os.path.join(UPLOAD_DIR, str(user_id))
-    if not os.path.exists(user_dir):
-        os.makedirs(user_dir)
-
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{file.filename}"
-    file_path = os.path.join(user_dir, filename)
-
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    return file_path
-
-@router.post("/upload/attachments", response_model=AttachmentResponse)
-async def upload_attachment(
-    file: UploadFile = File(...),
-    ticket_id: Optional[int] = None,
-    feature_request_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Upload a file attachment"""
-    # Validate file size (max 10MB)
-    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
-    file.file.seek(0, 2)  # Seek to end of file
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset file pointer
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File too large. Maximum size is 10MB."
-        )
-
-    # Validate ticket or feature request if specified
+# The body is parsed by app.utils.uploads rather than by UploadFile, so the
+# multipart schema is declared here for the API docs
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+def check_attachment_target(
+    db: Session,
+    ticket_id: Optional[int],
+    feature_request_id: Optional[int],
+    current_user: User
+) -> None:
+    """Validate the ticket or feature request an attachment is added to"""
     if ticket_id:
         ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
         if not ticket:
@@ -86,25 +65,92 @@ async def upload_attachment(
                 detail="Not enough permissions"
             )
 
-    # Save file
-    file_path = save_file(file, current_user.id)
+def _save_attachment(db: Session, attachment: Attachment, upload: uploads.StreamingUpload) -> Attachment:
+    try:
+        attachment.file_path = blobs.store_upload(db, upload)
+        db.add(attachment)
+        db.flush()
+        # The content type is checked after the response, once this commits
+        jobs.enqueue(db, content_types.SNIFF_TASK, {"attachment_id": attachment.id})
+        db.commit()
+    except BaseException:
+        # Also removes a blob file placed for this upload
+        db.rollback()
+        upload.discard()
+        raise
+    db.refresh(attachment)
+    return attachment
+
+@router.post("/upload/attachments", response_model=AttachmentResponse, openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_attachment(
+    request: Request,
+    ticket_id: Optional[int] = None,
+    feature_request_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload a file attachment"""
+    # Validate ticket or feature request before reading the body; the sync
+    # session is only ever used from the threadpool
+    await run_in_threadpool(check_attachment_target, db, ticket_id, feature_request_id, current_user)
+    # End the transaction so the writer connection isn't held while the body arrives
+    await run_in_threadpool(db.rollback)
 
-    # Create attachment record
+    # Stream the file to disk (413 as soon as it exceeds the size limit)
+    received = await uploads.receive_upload(request)
+    upload = received.upload
+
+    # Create attachment record; identical content is stored only once
     attachment = Attachment(
-        filename=file.filename,
-        file_path=file_path,
-        file_type=file.content_type,
-        file_size=file_size,
+        filename=received.filename,
+        file_type=received.content_type,
+        file_size=upload.size,
+        content_sha256=upload.sha256,
         user_id=current_user.id,
         ticket_id=ticket_id,
         feature_request_id=feature_request_id
     )
+    return await run_in_threadpool(_save_attachment, db, attachment, upload)
 
-    db.add(attachment)
-    db.commit()
-    db.refresh(attachment)
+@router.api_route("/upload/attachments/{attachment_id}/content", methods=["GET", "HEAD"])
+def download_attachment(
+    attachment_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download an attachment's content (supports Range and conditional requests)"""
+    attachment = db.query(Attachment).options(raiseload("*")).filter(Attachment.id == attachment_id).first()
 
-    return attachment
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+
+    # Check permissions: the same as for uploading to its ticket or feature request
+    if attachment.ticket_id or attachment.feature_request_id:
+        check_attachment_target(db, attachment.ticket_id, attachment.feature_request_id, current_user)
+    elif attachment.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    try:
+        return downloads.file_response(
+            request.headers,
+            attachment.file_path,
+            filename=attachment.filename,
+            media_type=attachment.file_type,
+            sha256=attachment.content_sha256,
+            last_modified=attachment.created_at
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment file not found"
+        )
 
 @router.delete("/upload/attachments/{attachment_id}")
 def delete_attachment(
@@ -128,14 +174,7 @@ def delete_attachment(
             detail="Not enough permissions"
         )
 
-    # Delete file from disk
-    try:
-        os.remove(attachment.file_path)
-    except OSError:
-        # File might not exist, continue with database deletion
-        pass
-
-    # Delete from database
+    # Delete from database; the blob file goes once no attachment uses it
     db.delete(attachment)
     db.commit()
 
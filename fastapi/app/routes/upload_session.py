@@ -0,0 +1,298 @@
+import os
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db, get_read_db
+from app.models.attachment import Attachment
+from app.models.upload_session import UploadChunk, UploadSession
+from app.models.user import User
+from app.routes.upload import _save_attachment, check_attachment_target
+from app.schemas.attachment import AttachmentResponse
+from app.schemas.upload_session import UploadSessionCreate, UploadSessionResponse
+from app.utils import jobs, resumable
+from app.utils.security import get_current_user
+from app.utils.uploads import UploadTooLarge
+
+router = APIRouter()
+
+# Status code of the tus checksum extension
+HTTP_460_CHECKSUM_MISMATCH = 460
+
+def _get_session(db: Session, session_id: str, current_user: User) -> UploadSession:
+    session = db.query(UploadSession).filter(UploadSession.id == session_id).first()
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    # Check permissions
+    if session.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return session
+
+def _get_chunks(db: Session, session_id: str) -> List[UploadChunk]:
+    return db.query(UploadChunk).filter(UploadChunk.session_id == session_id).all()
+
+def _session_response(session: UploadSession, chunks: List[UploadChunk], response: Response) -> UploadSessionResponse:
+    offset = resumable.current_offset(chunks)
+    response.headers["Upload-Offset"] = str(offset)
+    response.headers["Upload-Length"] = str(session.length)
+    response.headers["Cache-Control"] = "no-store"
+    return UploadSessionResponse(
+        id=session.id,
+        filename=session.filename,
+        file_type=session.file_type,
+        length=session.length,
+        offset=offset,
+        received=resumable.received_ranges(chunks),
+        ticket_id=session.ticket_id,
+        feature_request_id=session.feature_request_id,
+        created_at=session.created_at,
+        expires_at=session.updated_at + resumable.UPLOAD_SESSION_TTL
+    )
+
+@router.post("/upload/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    upload: UploadSessionCreate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable upload"""
+    if upload.length > resumable.RESUMABLE_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {resumable.RESUMABLE_MAX_SIZE} bytes."
+        )
+    check_attachment_target(db, upload.ticket_id, upload.feature_request_id, current_user)
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        filename=os.path.basename(upload.filename) or "upload",
+        file_type=upload.file_type,
+        length=upload.length,
+        user_id=current_user.id,
+        ticket_id=upload.ticket_id,
+        feature_request_id=upload.feature_request_id
+    )
+    resumable.create_data_file(session.id, session.length)
+    try:
+        db.add(session)
+        # Sessions left idle for longer than UPLOAD_SESSION_TTL are collected
+        # in the background, at most once an hour
+        jobs.enqueue(
+            db, resumable.COLLECT_TASK,
+            idempotency_key=f"{resumable.COLLECT_TASK}:{datetime.utcnow():%Y-%m-%dT%H}"
+        )
+        db.commit()
+    except BaseException:
+        db.rollback()
+        resumable.remove_data_file(session.id)
+        raise
+    db.refresh(session)
+
+    response.headers["Location"] = str(request.url_for("get_upload_session", session_id=session.id))
+    return _session_response(session, [], response)
+
+@router.api_route("/upload/sessions/{session_id}", methods=["GET", "HEAD"], response_model=UploadSessionResponse)
+def get_upload_session(
+    session_id: str,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get how much of a resumable upload has been received (also as Upload-Offset)"""
+    session = _get_session(db, session_id, current_user)
+    return _session_response(session, _get_chunks(db, session_id), response)
+
+def _reserve_chunk(db: Session, session_id: str, offset: int, length: int, current_user: User) -> None:
+    """Record a chunk as in progress, refusing ranges that overlap other chunks"""
+    session = _get_session(db, session_id, current_user)
+    if offset + length > session.length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk ends past the declared upload length"
+        )
+    overlapping = db.query(UploadChunk).filter(
+        UploadChunk.session_id == session_id,
+        UploadChunk.offset < offset + length,
+        UploadChunk.offset + UploadChunk.length > offset
+    ).all()
+    # Sending the same chunk again rewrites it; any other overlap is refused
+    if any(chunk.offset != offset or chunk.length != length for chunk in overlapping):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Chunk overlaps another chunk of this upload"
+        )
+    if overlapping:
+        overlapping[0].sha256 = None
+    else:
+        db.add(UploadChunk(session_id=session_id, offset=offset, length=length))
+    session.updated_at = datetime.utcnow()
+    db.commit()
+
+def _release_chunk(db: Session, session_id: str, offset: int) -> None:
+    db.query(UploadChunk).filter(
+        UploadChunk.session_id == session_id,
+        UploadChunk.offset == offset,
+        UploadChunk.sha256.is_(None)
+    ).delete()
+    db.commit()
+
+def _finish_chunk(db: Session, session_id: str, offset: int, sha256: str) -> int:
+    """Mark a written chunk as received and return the session's offset"""
+    updated = db.query(UploadChunk).filter(
+        UploadChunk.session_id == session_id,
+        UploadChunk.offset == offset
+    ).update({"sha256": sha256})
+    if not updated:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    db.query(UploadSession).filter(UploadSession.id == session_id).update({"updated_at": datetime.utcnow()})
+    db.commit()
+    return resumable.current_offset(_get_chunks(db, session_id))
+
+@router.put("/upload/sessions/{session_id}/chunks/{offset}", status_code=status.HTTP_204_NO_CONTENT)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Path(..., ge=0),
+    upload_checksum: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Write the request body at offset (chunks may be sent in parallel).
+
+    An optional 'Upload-Checksum: sha256 <base64 digest>' header is verified
+    before the chunk is recorded.
+    """
+    content_length = request.headers.get("content-length", "")
+    if not content_length.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_411_LENGTH_REQUIRED,
+            detail="Content-Length is required"
+        )
+    length = int(content_length)
+    if length == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Empty chunk"
+        )
+    expected_sha256 = None
+    if upload_checksum:
+        try:
+            expected_sha256 = resumable.parse_checksum(upload_checksum)
+        except ValueError as error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(error)
+            )
+
+    # Reserving the range commits, so the writer connection isn't held while
+    # the body arrives
+    await run_in_threadpool(_reserve_chunk, db, session_id, offset, length, current_user)
+    try:
+        writer = await run_in_threadpool(resumable.ChunkWriter, session_id, offset, length)
+    except FileNotFoundError:
+        await run_in_threadpool(_release_chunk, db, session_id, offset)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    try:
+        async for data in request.stream():
+            if data:
+                await run_in_threadpool(writer.write, data)
+        sha256 = await run_in_threadpool(writer.finish, expected_sha256)
+    except resumable.ChecksumMismatch:
+        await run_in_threadpool(_release_chunk, db, session_id, offset)
+        raise HTTPException(
+            status_code=HTTP_460_CHECKSUM_MISMATCH,
+            detail="Checksum mismatch"
+        )
+    except (UploadTooLarge, ValueError):
+        await run_in_threadpool(_release_chunk, db, session_id, offset)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk body does not match its Content-Length"
+        )
+    except BaseException:
+        await run_in_threadpool(writer.close)
+        await run_in_threadpool(_release_chunk, db, session_id, offset)
+        raise
+
+    received = await run_in_threadpool(_finish_chunk, db, session_id, offset, sha256)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"Upload-Offset": str(received)})
+
+@router.post("/upload/sessions/{session_id}/complete", response_model=AttachmentResponse)
+def complete_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Turn a fully received resumable upload into an attachment"""
+    session = _get_session(db, session_id, current_user)
+    chunks = _get_chunks(db, session_id)
+    if resumable.received_ranges(chunks) != [(0, session.length)]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is incomplete"
+        )
+    # Hashing may read part of the file back; don't hold the writer
+    # connection meanwhile
+    db.expunge_all()
+    db.commit()
+    try:
+        upload = resumable.assemble(session, chunks)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+
+    # Deleting the session claims it; a concurrent completion finds it gone
+    db.query(UploadChunk).filter(UploadChunk.session_id == session_id).delete()
+    if not db.query(UploadSession).filter(UploadSession.id == session_id).delete():
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+    attachment = Attachment(
+        filename=session.filename,
+        file_type=session.file_type,
+        file_size=session.length,
+        content_sha256=upload.sha256,
+        user_id=session.user_id,
+        ticket_id=session.ticket_id,
+        feature_request_id=session.feature_request_id
+    )
+    attachment = _save_attachment(db, attachment, upload)
+    resumable.forget_prefix(session_id)
+    return attachment
+
+@router.delete("/upload/sessions/{session_id}")
+def delete_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Abandon a resumable upload"""
+    session = _get_session(db, session_id, current_user)
+
+    db.query(UploadChunk).filter(UploadChunk.session_id == session_id).delete()
+    db.delete(session)
+    db.commit()
+    resumable.remove_data_file(session_id)
+
+    return {"message": "Upload session deleted successfully"}
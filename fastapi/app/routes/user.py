@@ -1,19 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from app.database import get_db
+from app.database import ReadSessionLocal, SessionLocal, get_db, get_read_db
 from app.models.user import User
 from app.schemas.user import (
     UserCreate, UserLogin, Token, UserResponse, UserUpdate,
     TokenData
 )
 from app.utils.security import (
-    create_access_token, verify_password, get_password_hash,
-    get_current_user, get_current_active_user, SECRET_KEY, ALGORITHM
+    create_access_token, hash_password, verify_and_update_password,
+    get_current_user, get_current_active_user, invalidate_cached_user, SECRET_KEY, ALGORITHM
 )
+from app.utils import upvotes
+from app.utils.pagination import paginate
+from app.utils.sql_budget import statement_budget
 from datetime import timedelta
-from typing import List
+from typing import List, Optional
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -21,9 +25,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 # Token settings
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-@router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+# The async handlers below await the password hashing pool; their database
+# work runs in the threadpool on short-lived sessions, so no connection (least
+# of all the writer) is held on the event loop or across a bcrypt call.
+
+def _check_available(db: Session, user: UserCreate) -> None:
     # Check if email already exists
     if db.query(User).filter(User.email == user.email).first():
         raise HTTPException(
@@ -38,34 +44,68 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             detail="Username already taken"
         )
 
+def _check_available_for_registration(user: UserCreate) -> None:
+    with ReadSessionLocal() as db:
+        _check_available(db, user)
+
+def _create_user(user: UserCreate, hashed_password: str) -> User:
+    with SessionLocal() as db:
+        # Checked again on the writer: someone may have registered meanwhile
+        _check_available(db, user)
+        new_user = User(
+            username=user.username,
+            email=user.email,
+            hashed_password=hashed_password,
+            role="user"  # Default role
+        )
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        return new_user
+
+@router.post("/register", response_model=UserResponse)
+async def register_user(user: UserCreate):
+    """Register a new user"""
+    await run_in_threadpool(_check_available_for_registration, user)
+
     # Create new user with hashed password
-    hashed_password = get_password_hash(user.password)
-    new_user = User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password,
-        role="user"  # Default role
-    )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    hashed_password = await hash_password(user.password)
+    return await run_in_threadpool(_create_user, user, hashed_password)
+
+def _login_credentials(email: str) -> Optional[tuple]:
+    with ReadSessionLocal() as db:
+        return db.query(User.id, User.hashed_password).filter(User.email == email).first()
+
+def _store_password_hash(user_id: int, hashed_password: str) -> None:
+    with SessionLocal() as db:
+        db.query(User).filter(User.id == user_id).update({"hashed_password": hashed_password})
+        db.commit()
 
 @router.post("/login", response_model=Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login user and return access token"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect email or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    credentials = await run_in_threadpool(_login_credentials, form_data.username)
+    if not credentials:
+        raise credentials_exception
+
+    user_id, hashed_password = credentials
+    valid, new_hash = await verify_and_update_password(form_data.password, hashed_password)
+    if not valid:
+        raise credentials_exception
+
+    # Transparently rehash passwords stored with outdated settings
+    if new_hash:
+        await run_in_threadpool(_store_password_hash, user_id, new_hash)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": form_data.username}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -89,10 +129,14 @@ def get_authenticated_user(current_user: User = Depends(get_current_active_user)
     return current_user
 
 @router.get("/users", response_model=List[UserResponse])
+@statement_budget(3)
 def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all users (admin only)"""
@@ -101,13 +145,15 @@ def get_users(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    return paginate(
+        db.query(User), response, keyset=(User.id,), limit=limit, skip=skip,
+        cursor=cursor, include_total=include_total
+    )
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user by ID (admin or self)"""
@@ -125,11 +171,27 @@ def get_user(
         )
     return user
 
+def _update_user(user_id: int, update_data: dict) -> User:
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+
+        for field, value in update_data.items():
+            setattr(user, field, value)
+
+        db.commit()
+        invalidate_cached_user(user_id)
+        db.refresh(user)
+        return user
+
 @router.put("/users/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update user (admin or self)"""
@@ -139,24 +201,11 @@ def update_user(
             detail="Not enough permissions"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Update fields
     update_data = user_update.dict(exclude_unset=True)
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
-    
-    for field, value in update_data.items():
-        setattr(user, field, value)
-
-    db.commit()
-    db.refresh(user)
-    return user
+        update_data["hashed_password"] = await hash_password(update_data.pop("password"))
+    return await run_in_threadpool(_update_user, user_id, update_data)
 
 @router.delete("/users/{user_id}")
 def delete_user(
@@ -178,6 +227,8 @@ def delete_user(
             detail="User not found"
         )
 
+    upvotes.remove_user_upvotes(db, user_id)
     db.delete(user)
     db.commit()
+    invalidate_cached_user(user_id)
     return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -15,6 +15,7 @@ class AttachmentCreate(AttachmentBase):
 class AttachmentResponse(AttachmentBase):
     id: int
     file_path: str
+    content_sha256: Optional[str] = None
     created_at: datetime
     user_id: int
 
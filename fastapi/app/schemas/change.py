@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Json
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+class ChangeEntity(str, Enum):
+    TICKET = "ticket"
+    COMMENT = "comment"
+    FEATURE_REQUEST = "feature_request"
+    FEATURE_REQUEST_COMMENT = "feature_request_comment"
+    ATTACHMENT = "attachment"
+    USER = "user"
+
+class ChangeResponse(BaseModel):
+    seq: int
+    entity: ChangeEntity
+    entity_id: int
+    action: str  # created, updated, deleted
+    fields: Optional[Json[List[str]]] = None
+    refs: Optional[Json[Dict[str, Optional[int]]]] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChangeFeed(BaseModel):
+    changes: List[ChangeResponse]
+    last_seq: int  # Pass as since= to read on from here
+    head_seq: int  # Newest seq in the log
@@ -0,0 +1,28 @@
+from pydantic import Field
+from datetime import datetime
+from typing import Optional
+from app.schemas.comment import CommentBase
+from app.schemas.ticket import TicketBase
+from app.schemas.user import UserBase
+
+# Records read by `python -m app.manage import-data`. `id` is the record's id
+# in the source system; user references may be a source id, an email or a
+# username, ticket references a source ticket id.
+
+class UserImport(UserBase):
+    id: str = Field(..., min_length=1)
+    role: str = "user"
+    created_at: Optional[datetime] = None
+
+class TicketImport(TicketBase):
+    id: str = Field(..., min_length=1)
+    user: str = Field(..., min_length=1)
+    assigned_to: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class CommentImport(CommentBase):
+    id: Optional[str] = None
+    ticket: str = Field(..., min_length=1)
+    user: str = Field(..., min_length=1)
+    created_at: Optional[datetime] = None
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+class ProfileFormat(str, Enum):
+    JSON = "json"
+    COLLAPSED = "collapsed"  # flamegraph.pl / speedscope
+    PSTATS = "pstats"  # pstats.Stats / snakeviz
+
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: Optional[int] = None
+    trigger: str  # header or sampling
+    user_id: Optional[int] = None
+    started_at: datetime
+    duration: float
+    samples: int
+    statements: int
+    sql_seconds: float
+
+class ProfileStatement(BaseModel):
+    sql: str
+    seconds: float
+    at: float  # Seconds from the start of the request
+
+class ProfileDetail(ProfileSummary):
+    interval: float
+    statement_log: List[ProfileStatement]
+    statements_dropped: int
+
+class SamplingRate(BaseModel):
+    rate: float = Field(..., ge=0, le=1)
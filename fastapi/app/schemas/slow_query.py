@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+class SlowQuerySort(str, Enum):
+    TOTAL = "total_seconds"
+    MAX = "max_seconds"
+    COUNT = "count"
+
+class SlowQueryResponse(BaseModel):
+    fingerprint: str
+    sql: str  # Normalized: literals and placeholders as ?
+    example: str  # The first slow statement, as sent to the database
+    count: int
+    total_seconds: float
+    max_seconds: float
+    mean_seconds: float
+    first_seen: datetime
+    last_seen: datetime
+    routes: Dict[str, int]  # "GET /api/..." or background
+    parameter_shapes: Dict[str, int]
+    plan: Optional[List[str]] = None  # Of the slowest run
+    full_scan: bool
+    plan_error: Optional[str] = None
@@ -47,4 +47,22 @@ class TicketWithComments(TicketResponse):
     comments: List[CommentResponse] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Most operations accepted by one bulk request
+BULK_MAX_OPERATIONS = 500
+
+class TicketBulkCreate(BaseModel):
+    tickets: List[TicketCreate] = Field(..., min_length=1, max_length=BULK_MAX_OPERATIONS)
+
+class TicketBulkUpdateItem(TicketUpdate):
+    id: int
+
+class TicketBulkUpdate(BaseModel):
+    tickets: List[TicketBulkUpdateItem] = Field(..., min_length=1, max_length=BULK_MAX_OPERATIONS)
+
+class TicketBulkResult(BaseModel):
+    id: Optional[int] = None
+    status_code: int  # As if the operation had been its own request
+    detail: Optional[str] = None
+    ticket: Optional[TicketResponse] = None
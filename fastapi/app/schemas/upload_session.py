@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1)
+    file_type: str = "application/octet-stream"
+    length: int = Field(..., gt=0)  # Total size in bytes
+    ticket_id: Optional[int] = None
+    feature_request_id: Optional[int] = None
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    file_type: str
+    length: int
+    offset: int  # Bytes received from the start of the file
+    received: List[Tuple[int, int]]  # [start, end) ranges received so far
+    ticket_id: Optional[int] = None
+    feature_request_id: Optional[int] = None
+    created_at: datetime
+    expires_at: datetime
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import shutil
+from collections import Counter
+from typing import Dict, List, Union
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.attachment import Attachment
+from app.models.blob import Blob
+from app.utils.uploads import UPLOAD_DIR, UPLOAD_TMP_DIR, StreamingUpload
+
+# Attachment files are stored once per SHA-256 under uploads/blobs/ab/cd/<hash>;
+# the blobs table counts the attachments pointing at each
+
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+_TRASH_SUFFIX = ".deleting"
+_CHUNK_SIZE = 1024 * 1024
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+def is_blob(attachment: Attachment) -> bool:
+    """Whether an attachment's file lives in the blob store"""
+    return bool(attachment.content_sha256) and attachment.file_path == blob_path(attachment.content_sha256)
+
+def add_reference(db: Union[Session, Connection], sha256: str, size: int) -> int:
+    """Count one more attachment stored under sha256; returns the new count.
+
+    Takes the database write lock on the blob row, so the caller must place
+    the file (if the count is 1) before committing.
+    """
+    bind = db.get_bind() if isinstance(db, Session) else db
+    dialect = postgresql if bind.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(Blob).values(sha256=sha256, size=size, ref_count=1)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[Blob.sha256],
+        set_={"ref_count": Blob.ref_count + 1}
+    ))
+    return db.execute(select(Blob.ref_count).where(Blob.sha256 == sha256)).scalar_one()
+
+def store_upload(db: Session, upload: StreamingUpload) -> str:
+    """Reference the blob for a finished upload, placing its file if it is new.
+
+    Returns the blob path. A file placed here is removed again if the
+    session rolls back instead of committing.
+    """
+    path = blob_path(upload.sha256)
+    if add_reference(db, upload.sha256, upload.size) == 1 or not os.path.exists(path):
+        upload.commit(path)
+        db.info.setdefault("placed_blobs", []).append(path)
+    else:
+        upload.discard()
+    return path
+
+def release_references(connection: Connection, references: Dict[str, int]) -> List[str]:
+    """Drop references to blobs; returns the hashes no attachment uses anymore"""
+    for sha256, count in references.items():
+        connection.execute(
+            update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count - count)
+        )
+    unused = connection.execute(
+        select(Blob.sha256).where(Blob.sha256.in_(list(references)), Blob.ref_count <= 0)
+    ).scalars().all()
+    if unused:
+        connection.execute(delete(Blob).where(Blob.sha256.in_(unused)))
+    return unused
+
+def _trash(session: Session, path: str) -> None:
+    try:
+        os.replace(path, path + _TRASH_SUFFIX)
+    except FileNotFoundError:
+        return
+    session.info.setdefault("trashed_blobs", []).append(path)
+
+@event.listens_for(Session, "before_flush")
+def _release_deleted_attachments(session, flush_context, instances):
+    deleted = [obj for obj in session.deleted if isinstance(obj, Attachment)]
+    if not deleted:
+        return
+    references = Counter(obj.content_sha256 for obj in deleted if is_blob(obj))
+    for obj in deleted:
+        if not is_blob(obj):
+            _trash(session, obj.file_path)
+    if references:
+        for sha256 in release_references(session.connection(), references):
+            _trash(session, blob_path(sha256))
+
+@event.listens_for(Session, "after_commit")
+def _remove_trashed_blobs(session):
+    session.info.pop("placed_blobs", None)
+    for path in session.info.pop("trashed_blobs", []):
+        try:
+            os.remove(path + _TRASH_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+@event.listens_for(Session, "after_rollback")
+def _undo_blob_changes(session):
+    for path in session.info.pop("trashed_blobs", []):
+        try:
+            os.replace(path + _TRASH_SUFFIX, path)
+        except FileNotFoundError:
+            pass
+    for path in session.info.pop("placed_blobs", []):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def recount_blobs(connection: Connection) -> int:
+    """Rebuild the blobs table from the attachments; returns the blob count"""
+    blobs = {}
+    for sha256, file_path, size in connection.execute(
+        select(Attachment.content_sha256, Attachment.file_path, Attachment.file_size)
+        .where(Attachment.content_sha256.isnot(None))
+    ):
+        if file_path == blob_path(sha256):
+            blob = blobs.setdefault(sha256, {"sha256": sha256, "size": size, "ref_count": 0})
+            blob["ref_count"] += 1
+    connection.execute(delete(Blob))
+    if blobs:
+        connection.execute(Blob.__table__.insert(), list(blobs.values()))
+    return len(blobs)
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def migrate_uploads(connection: Connection) -> dict:
+    """Move attachment files from the per-user layout into the blob store.
+
+    Each file is hashed, then its row is repointed and its blob referenced in
+    one transaction, linking (or copying) the file into the store under that
+    lock unless it is already there; the old file is removed only once this
+    commits, so the command can be interrupted and rerun. Returns counts of
+    moved, deduplicated and missing files.
+    """
+    counts = {"moved": 0, "deduplicated": 0, "missing": 0}
+    rows = connection.execute(
+        select(Attachment.id, Attachment.file_path, Attachment.content_sha256)
+    ).all()
+    connection.commit()
+    for attachment_id, file_path, content_sha256 in rows:
+        if content_sha256 and file_path == blob_path(content_sha256):
+            continue
+        if not os.path.exists(file_path):
+            counts["missing"] += 1
+            continue
+        sha256 = _hash_file(file_path)
+        path = blob_path(sha256)
+        placed = False
+        try:
+            repointed = connection.execute(
+                update(Attachment)
+                .where(Attachment.id == attachment_id, Attachment.file_path == file_path)
+                .values(content_sha256=sha256, file_path=path)
+            ).rowcount
+            if not repointed:
+                # Deleted (and its file removed) since the attachments were listed
+                connection.rollback()
+                continue
+            if add_reference(connection, sha256, os.path.getsize(file_path)) == 1 or not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    os.link(file_path, path)
+                except FileExistsError:
+                    pass
+                except OSError:
+                    shutil.copy2(file_path, path)
+                placed = True
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            if placed:
+                os.remove(path)
+            raise
+        counts["moved" if placed else "deduplicated"] += 1
+        os.remove(file_path)
+
+    # Drop the per-user directories the move left empty
+    for root, directories, files in os.walk(UPLOAD_DIR, topdown=False):
+        if root != UPLOAD_DIR and not root.startswith((BLOB_DIR, UPLOAD_TMP_DIR)) and not os.listdir(root):
+            os.rmdir(root)
+    return counts
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional
+from sqlalchemy import delete, event, func, inspect, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.attachment import Attachment
+from app.models.change import Change
+from app.models.comment import Comment
+from app.models.feature_request import FeatureRequest, FeatureRequestComment
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.utils import jobs
+
+# Append-only change log, written in the same transaction as each change so
+# consumers reading past their last seq never miss one
+
+CHANGES_RETENTION = timedelta(days=int(os.getenv("CHANGES_RETENTION_DAYS", "7")))
+CHANGES_MAX_WAIT = float(os.getenv("CHANGES_MAX_WAIT_SECONDS", "30"))
+# Long polls also re-read the log this often, to see other processes' writes
+CHANGES_POLL_INTERVAL = float(os.getenv("CHANGES_POLL_INTERVAL", "1"))
+
+PRUNE_TASK = "changes.prune"
+
+# Advisory lock key serializing the writers of the log (PostgreSQL)
+_LOCK_KEY = 0x63686e67
+
+CHANGE_LOGGED = {
+    Ticket: "ticket",
+    Comment: "comment",
+    FeatureRequest: "feature_request",
+    FeatureRequestComment: "feature_request_comment",
+    Attachment: "attachment",
+    User: "user",
+}
+
+CREATED, UPDATED, DELETED = "created", "updated", "deleted"
+
+@lru_cache(maxsize=None)
+def _foreign_keys(model) -> tuple:
+    return tuple(column.name for column in model.__table__.c if column.foreign_keys)
+
+def _refs(model, values: Mapping) -> Optional[str]:
+    refs = {name: values[name] for name in _foreign_keys(model) if name in values}
+    return json.dumps(refs) if refs else None
+
+def change_row(
+    model,
+    entity_id: int,
+    action: str,
+    values: Mapping,
+    fields: Optional[Iterable[str]] = None,
+    created_at: Optional[datetime] = None
+) -> dict:
+    """A row of the changes table; values are the row's column values
+    (its foreign keys are copied into refs)"""
+    return dict(
+        entity=CHANGE_LOGGED[model],
+        entity_id=entity_id,
+        action=action,
+        fields=json.dumps(sorted(fields)) if fields is not None else None,
+        refs=_refs(model, values),
+        created_at=created_at or datetime.utcnow()
+    )
+
+def record(db: Session, model, entity_id: int, action: str, values: Mapping, fields: Optional[Iterable[str]] = None) -> None:
+    """Log a change made outside the ORM unit of work; written when db commits"""
+    db.info.setdefault("changes", []).append(change_row(model, entity_id, action, values, fields))
+
+def insert_changes(connection: Connection, rows: List[dict]) -> None:
+    """Append rows to the log in the connection's transaction"""
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql":
+        # Held until commit: seqs are handed out in commit order
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+    connection.execute(insert(Change), rows)
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_changes(session, flush_context):
+    # Values are read from the instance state, never loaded: a deleted row is
+    # already gone from the database at this point
+    rows = []
+    for objects, action in ((session.new, CREATED), (session.dirty, UPDATED), (session.deleted, DELETED)):
+        for obj in objects:
+            model = type(obj)
+            if model not in CHANGE_LOGGED or (action == UPDATED and obj in session.deleted):
+                continue
+            state = inspect(obj)
+            fields = None
+            if action == UPDATED:
+                fields = [prop.key for prop in state.mapper.column_attrs if state.attrs[prop.key].history.has_changes()]
+                if not fields:
+                    continue
+            # New objects only get their identity key after the flush hooks
+            entity_id = state.identity[0] if state.identity else state.dict["id"]
+            rows.append(change_row(model, entity_id, action, state.dict, fields))
+    if rows:
+        session.info.setdefault("changes", []).extend(rows)
+
+@event.listens_for(Session, "before_commit")
+def _write_changes(session):
+    # Flush first so the ORM writes still pending are in the log too
+    session.flush()
+    rows = session.info.pop("changes", None)
+    if rows:
+        insert_changes(session.connection(), rows)
+        session.info["changes_written"] = True
+        _enqueue_pruning(session)
+
+@event.listens_for(Session, "after_commit")
+def _notify_waiters(session):
+    if session.info.pop("changes_written", False):
+        notifier.notify()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop("changes", None)
+    session.info.pop("changes_written", None)
+
+_pruning_enqueued_for: Optional[str] = None
+
+def _enqueue_pruning(session: Session) -> None:
+    # One prune job an hour; the idempotency key makes other processes' (and
+    # other threads') attempts for the same hour no-ops
+    global _pruning_enqueued_for
+    hour = f"{datetime.utcnow():%Y-%m-%dT%H}"
+    if _pruning_enqueued_for != hour:
+        jobs.enqueue(session, PRUNE_TASK, idempotency_key=f"{PRUNE_TASK}:{hour}")
+        _pruning_enqueued_for = hour
+
+def prune_statement(cutoff: datetime):
+    """Delete the changes made before cutoff, except the newest one"""
+    newest = select(func.max(Change.seq)).scalar_subquery()
+    return delete(Change).where(Change.created_at < cutoff, Change.seq < newest)
+
+def prune_changes(connection: Connection, retention: timedelta = CHANGES_RETENTION) -> int:
+    """Delete changes older than retention, always keeping the newest one so
+    GET /changes can still tell how far the log goes"""
+    return connection.execute(prune_statement(datetime.utcnow() - retention)).rowcount
+
+@jobs.task(PRUNE_TASK)
+def _prune_changes_job(db: Session) -> None:
+    prune_changes(db.connection())
+
+def changes_statement(since: int, limit: int, entities: Optional[List[str]] = None):
+    """Up to limit changes after seq since, of the given entities, oldest first"""
+    statement = select(Change).where(Change.seq > since).order_by(Change.seq).limit(limit)
+    if entities:
+        statement = statement.where(Change.entity.in_(entities))
+    return statement
+
+def read_changes(db: Session, since: int, limit: int, entities: Optional[List[str]] = None) -> Dict:
+    """Up to limit changes after since, with the oldest and newest seq in the log"""
+    statement = changes_statement(since, limit, entities)
+    oldest, newest = db.execute(select(func.min(Change.seq), func.max(Change.seq))).one()
+    return {"changes": db.execute(statement).scalars().all(), "oldest_seq": oldest, "head_seq": newest or 0}
+
+class ChangeNotifier:
+    """Wakes long polls in this process when a transaction has written changes"""
+
+    def __init__(self):
+        self.version = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiters = set()
+
+    def notify(self) -> None:
+        """Called from any thread after a commit"""
+        self.version += 1
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                # The loop has been closed (shutdown)
+                pass
+
+    def _wake(self) -> None:
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    async def wait(self, version: int, timeout: float) -> None:
+        """Return once notify() has been called since version was read, or after timeout"""
+        if self.version != version:
+            return
+        self._loop = loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.add(waiter)
+        timer = loop.call_later(timeout, lambda: waiter.done() or waiter.set_result(None))
+        try:
+            await waiter
+        finally:
+            timer.cancel()
+            self._waiters.discard(waiter)
+
+notifier = ChangeNotifier()
@@ -0,0 +1,152 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, NamedTuple, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Bundle, Query, Session
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from app.models.comment import Comment
+from app.models.feature_request import FeatureRequest, FeatureRequestComment
+from app.models.ticket import Ticket
+from app.utils.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+
+# Conditional GETs: versions are read with one indexed query, so a 304 skips
+# loading and serializing the entity
+
+CACHE_CONTROL = "private, no-cache"
+
+class Version(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime]
+    owner_id: Optional[int]
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak: W/ prefixes are ignored)"""
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+
+def weak_etag(*parts) -> str:
+    return f'W/"{hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()}"'
+
+def _utc(value: datetime) -> datetime:
+    # Naive values are already UTC (utcnow, SQLite CURRENT_TIMESTAMP)
+    return value if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _latest(*values: Optional[datetime]) -> Optional[datetime]:
+    values = [_utc(value) for value in values if value is not None]
+    return max(values) if values else None
+
+def is_not_modified(request_headers: Headers, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """True when the client's copy is current; If-Modified-Since only counts without If-None-Match"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole seconds
+    return _utc(last_modified).replace(microsecond=0) <= _utc(since)
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"etag": etag, "cache-control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["last-modified"] = http_date(last_modified)
+    return headers
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+def _comment_stats(child, parent_id):
+    """Correlated subqueries for the comment count, newest id and newest time of a parent row"""
+    foreign_key = child.ticket_id if child is Comment else child.feature_request_id
+    where = foreign_key == parent_id
+    return (
+        select(func.count(child.id)).where(where).scalar_subquery().label("comment_count"),
+        select(func.max(child.id)).where(where).scalar_subquery().label("last_comment_id"),
+        select(func.max(child.created_at)).where(where).scalar_subquery().label("last_comment_at"),
+    )
+
+def _version_statement(model, child, entity_id: int, owner_column, *columns):
+    return (
+        select(owner_column, model.created_at, model.updated_at, *columns, *_comment_stats(child, model.id))
+        .where(model.id == entity_id)
+    )
+
+def ticket_version_statement(ticket_id: int):
+    return _version_statement(Ticket, Comment, ticket_id, Ticket.user_id)
+
+def feature_request_version_statement(request_id: int):
+    return _version_statement(
+        FeatureRequest, FeatureRequestComment, request_id, FeatureRequest.requester_id, FeatureRequest.upvotes_count
+    )
+
+def _version(db: Session, kind: str, entity_id: int, statement) -> Optional[Version]:
+    row = db.execute(statement).first()
+    if row is None:
+        return None
+    owner_id, created_at, updated_at, *values, comment_count, last_comment_id, last_comment_at = row
+    return Version(
+        etag=weak_etag(kind, entity_id, updated_at, *values, comment_count, last_comment_id),
+        last_modified=_latest(created_at, updated_at, last_comment_at),
+        owner_id=owner_id
+    )
+
+def ticket_version(db: Session, ticket_id: int) -> Optional[Version]:
+    """Version of GET /tickets/{id} (comments included), or None if there is no such ticket"""
+    return _version(db, "ticket", ticket_id, ticket_version_statement(ticket_id))
+
+def feature_request_version(db: Session, request_id: int) -> Optional[Version]:
+    """Version of GET /feature-requests/{id} (comments and upvote count included)"""
+    return _version(db, "feature_request", request_id, feature_request_version_statement(request_id))
+
+def _narrow(statement, bundle: Bundle):
+    if isinstance(statement, Query):
+        return statement.with_entities(bundle)
+    return statement.with_only_columns(bundle)
+
+def ticket_page_versions(statement):
+    """A list query of tickets narrowed to what ticket_item_version() reads"""
+    return _narrow(statement, Bundle("version", Ticket.id, Ticket.updated_at))
+
+def feature_request_page_versions(statement):
+    """A list query of feature requests narrowed to what feature_request_item_version() reads"""
+    count, last_id, _ = _comment_stats(FeatureRequestComment, FeatureRequest.id)
+    return _narrow(statement, Bundle(
+        "version", FeatureRequest.id, FeatureRequest.updated_at, FeatureRequest.upvotes_count, count, last_id
+    ))
+
+def _get(item, name: str):
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+def ticket_item_version(ticket) -> tuple:
+    """Version of a ticket in a list (ORM object or FAST_JSON dict)"""
+    return (_get(ticket, "id"), _get(ticket, "updated_at"))
+
+def feature_request_item_version(request) -> tuple:
+    """Version of a feature request in a list, its comments included"""
+    comment_ids = [_get(comment, "id") for comment in _get(request, "comments")]
+    return (
+        _get(request, "id"), _get(request, "updated_at"), _get(request, "upvotes_count"),
+        len(comment_ids), max(comment_ids, default=None)
+    )
+
+def page_etag(versions: Iterable[tuple], response: Response) -> str:
+    """ETag of a list page: its rows' versions plus the paging headers already set"""
+    return weak_etag(
+        [tuple(version) for version in versions],
+        response.headers.get(NEXT_CURSOR_HEADER),
+        response.headers.get(TOTAL_COUNT_HEADER)
+    )
@@ -0,0 +1,86 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.models.attachment import Attachment
+from app.utils import jobs
+
+# Attachments are served with the content type they were stored with, and the
+# one the client declares can't be trusted (a file declared as text/html is
+# rendered by the browser). After an upload commits, a job reads the start of
+# the file and replaces the declared type when the content says otherwise.
+
+SNIFF_TASK = "attachments.detect_content_type"
+SNIFF_BYTES = 512
+
+GENERIC_TYPES = {"", "application/octet-stream", "binary/octet-stream", "application/unknown"}
+
+# (offset, magic bytes, content type)
+SIGNATURES = [
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"BZh", "application/x-bzip2"),
+    (0, b"\xfd7zXZ\x00", "application/x-xz"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"\x28\xb5\x2f\xfd", "application/zstd"),
+    (0, b"\x7fELF", "application/x-elf"),
+    (0, b"MDMP", "application/x-dmp"),
+    (257, b"ustar", "application/x-tar"),
+    (4, b"ftyp", "video/mp4"),
+]
+
+# Formats stored in a zip container (docx, xlsx, jar, epub, ...) keep their
+# declared application/* type
+_CONTAINERS = {"application/zip"}
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type recognised from the first bytes of a file, if any"""
+    for offset, magic, content_type in SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head and b"\x00" not in head:
+        try:
+            head.decode("utf-8")
+        except UnicodeDecodeError as error:
+            # A multi-byte character cut off at the end of the sample
+            if error.start < len(head) - 3:
+                return None
+        return "text/plain"
+    return None
+
+def resolve_content_type(declared: str, head: bytes) -> str:
+    """The type to serve a file declared as `declared` with"""
+    sniffed = sniff_content_type(head)
+    declared = (declared or "").split(";")[0].strip().lower()
+    if sniffed is None:
+        # Unrecognised binary content is never served as a renderable type
+        if declared.startswith("text/") or declared in ("image/svg+xml", "application/xhtml+xml"):
+            return "application/octet-stream"
+        return declared or "application/octet-stream"
+    if declared in GENERIC_TYPES:
+        return sniffed
+    if sniffed == "text/plain":
+        # Text formats (csv, json, logs) keep their declared type unless it renders
+        return "text/plain" if declared in ("text/html", "image/svg+xml", "application/xhtml+xml") else declared
+    if sniffed in _CONTAINERS and declared.startswith("application/"):
+        return declared
+    return sniffed
+
+@jobs.task(SNIFF_TASK)
+def detect_content_type(db: Session, attachment_id: int) -> None:
+    attachment = db.query(Attachment).filter(Attachment.id == attachment_id).first()
+    if attachment is None:
+        return
+    try:
+        with open(attachment.file_path, "rb") as file:
+            head = file.read(SNIFF_BYTES)
+    except FileNotFoundError:
+        return
+    content_type = resolve_content_type(attachment.file_type, head)
+    if content_type != attachment.file_type:
+        attachment.file_type = content_type
@@ -0,0 +1,228 @@
+import collections
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+from typing import Dict, Iterable, Optional
+from sqlalchemy import delete, event, func, inspect, literal, or_, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.attachment import Attachment
+from app.models.comment import Comment
+from app.models.counter import Counter
+from app.models.feature_request import FeatureRequest
+from app.models.ticket import Ticket
+from app.models.user import User
+
+# Aggregate counts for the dashboard and stats endpoints are kept in the
+# counters table instead of being recomputed with COUNT/GROUP BY on every
+# request. A flush hook turns each ORM insert, update and delete of a counted
+# model into counter deltas and applies them in the same transaction, so the
+# counters commit or roll back together with the rows they describe.
+# Writes that bypass the ORM unit of work call apply_deltas() themselves,
+# and reconcile_counters() rebuilds everything from the source tables.
+
+# Per model: counter prefix, columns broken down by value, and whether rows
+# are bucketed by creation day for the recent-activity counts
+COUNTED_MODELS = {
+    Ticket: ("tickets", ("status", "priority"), True),
+    FeatureRequest: ("feature_requests", ("status", "priority"), True),
+    User: ("users", ("role",), False),
+    Comment: ("comments", (), True),
+    Attachment: ("attachments", (), True),
+}
+
+# Counter prefix -> model, for the day-bucketed models
+_PREFIX_MODELS = {prefix: model for model, (prefix, _, by_day) in COUNTED_MODELS.items() if by_day}
+
+def _plain(value):
+    return value.value if isinstance(value, Enum) else value
+
+def day_key(prefix: str, day: date) -> str:
+    return f"{prefix}:day:{day.isoformat()}"
+
+def _row_keys(model, prefix: str, breakdowns: Iterable[str], by_day: bool, values: dict) -> list:
+    """Counter names a row with the given column values contributes to"""
+    keys = [f"{prefix}:total"]
+    for column in breakdowns:
+        keys.append(f"{prefix}:{column}:{_plain(values[column])}")
+    if model is Ticket and values["assigned_to"] is not None:
+        keys.append("tickets:assigned")
+    if model is User and values["is_active"] is not None:
+        keys.append("users:active" if values["is_active"] else "users:inactive")
+    if by_day:
+        created_at = values["created_at"] or datetime.utcnow()
+        keys.append(day_key(prefix, created_at.date()))
+    return keys
+
+def _tracked_columns(model, breakdowns) -> tuple:
+    columns = tuple(breakdowns) + ("created_at",)
+    if model is Ticket:
+        columns += ("assigned_to",)
+    if model is User:
+        columns += ("is_active",)
+    return columns
+
+def _values(obj, columns, old: bool) -> dict:
+    """Current column values, or the values before this flush when old=True"""
+    state = inspect(obj)
+    values = {}
+    for column in columns:
+        history = state.attrs[column].history
+        if old and history.deleted:
+            values[column] = history.deleted[0]
+        else:
+            values[column] = getattr(obj, column)
+        if values[column] is None and state.pending:
+            # Scalar column defaults are only filled in during the flush
+            default = obj.__table__.c[column].default
+            if default is not None and default.is_scalar:
+                values[column] = default.arg
+    return values
+
+def row_deltas(obj, sign: int) -> collections.Counter:
+    """Counter deltas for inserting (sign=1) or deleting (sign=-1) one row"""
+    prefix, breakdowns, by_day = COUNTED_MODELS[type(obj)]
+    values = _values(obj, _tracked_columns(type(obj), breakdowns), old=sign < 0)
+    return collections.Counter({key: sign for key in _row_keys(type(obj), prefix, breakdowns, by_day, values)})
+
+def _update_deltas(obj) -> collections.Counter:
+    prefix, breakdowns, by_day = COUNTED_MODELS[type(obj)]
+    columns = _tracked_columns(type(obj), breakdowns)
+    state = inspect(obj)
+    if not any(state.attrs[column].history.has_changes() for column in columns):
+        return collections.Counter()
+    deltas = collections.Counter({key: -1 for key in _row_keys(type(obj), prefix, breakdowns, by_day, _values(obj, columns, old=True))})
+    deltas.update(_row_keys(type(obj), prefix, breakdowns, by_day, _values(obj, columns, old=False)))
+    return deltas
+
+def bulk_update_deltas(model, old_values: dict, changes: dict) -> collections.Counter:
+    """Counter deltas for a row updated with a Core UPDATE.
+
+    old_values holds the row's tracked columns before the update (see
+    tracked_columns()), changes the values the UPDATE sets.
+    """
+    prefix, breakdowns, by_day = COUNTED_MODELS[model]
+    columns = _tracked_columns(model, breakdowns)
+    old = {column: _plain(old_values[column]) for column in columns}
+    new = {**old, **{column: _plain(value) for column, value in changes.items() if column in old}}
+    if new == old:
+        return collections.Counter()
+    deltas = collections.Counter({key: -1 for key in _row_keys(model, prefix, breakdowns, by_day, old)})
+    deltas.update(_row_keys(model, prefix, breakdowns, by_day, new))
+    return deltas
+
+def insert_deltas(model, rows: Iterable[dict]) -> collections.Counter:
+    """Counter deltas for rows inserted with a Core INSERT (dicts of column values)"""
+    prefix, breakdowns, by_day = COUNTED_MODELS[model]
+    columns = _tracked_columns(model, breakdowns)
+    deltas = collections.Counter()
+    for row in rows:
+        deltas.update(_row_keys(model, prefix, breakdowns, by_day, {column: row.get(column) for column in columns}))
+    return deltas
+
+def tracked_columns(model) -> tuple:
+    """Columns whose values decide which counters a row of model counts in"""
+    return _tracked_columns(model, COUNTED_MODELS[model][1])
+
+def apply_deltas(connection: Connection, deltas: Dict[str, int]) -> None:
+    """Add each delta to its counter, creating counters that don't exist yet"""
+    rows = [{"name": name, "value": delta} for name, delta in deltas.items() if delta]
+    if not rows:
+        return
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(Counter).values(rows)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[Counter.name],
+        set_={"value": Counter.value + statement.excluded.value}
+    ))
+
+@event.listens_for(Session, "before_flush")
+def _count_flushed_rows(session, flush_context, instances):
+    # Runs before the flush so that deleted rows can still be read; the
+    # deltas land in the same transaction as the flush itself
+    deltas = collections.Counter()
+    for obj in session.new:
+        if type(obj) in COUNTED_MODELS:
+            deltas.update(row_deltas(obj, 1))
+    for obj in session.deleted:
+        if type(obj) in COUNTED_MODELS:
+            deltas.update(row_deltas(obj, -1))
+    for obj in session.dirty:
+        if type(obj) in COUNTED_MODELS and obj not in session.deleted:
+            deltas.update(_update_deltas(obj))
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+def partial_day_statement(prefix: str, since: datetime, until: datetime):
+    """('<prefix>:day:partial', rows of a day-bucketed prefix created in [since, until))"""
+    model = _PREFIX_MODELS[prefix]
+    return (
+        select(literal(f"{prefix}:day:partial"), func.count())
+        .select_from(model)
+        .where(model.created_at >= since, model.created_at < until)
+    )
+
+def read_counters(db: Session, *prefixes: str, days: int = 0, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Read every counter under the given prefixes, plus, with days, the
+    rows created in the last `days` times 24 hours before now.
+
+    Those come back as the day buckets of the whole days in that window and,
+    for the part of its oldest day, '<prefix>:day:partial' counted from the
+    table itself (one indexed range on created_at), in the same statement.
+    """
+    conditions = [(Counter.name.like(f"{prefix}:%") & ~Counter.name.like(f"{prefix}:day:%")) for prefix in prefixes]
+    partial_days = []
+    if days:
+        dated = [prefix for prefix in prefixes if prefix in _PREFIX_MODELS]
+        since = (now or datetime.utcnow()) - timedelta(days=days)
+        first_day = since.date() + timedelta(days=1)
+        conditions.append(Counter.name.in_([
+            day_key(prefix, first_day + timedelta(days=offset))
+            for prefix in dated for offset in range(days)
+        ]))
+        first_day_start = datetime.combine(first_day, time())
+        partial_days = [partial_day_statement(prefix, since, first_day_start) for prefix in dated]
+    rows = db.execute(union_all(select(Counter.name, Counter.value).where(or_(*conditions)), *partial_days)).all()
+    return dict(rows)
+
+def breakdown(counters: Dict[str, int], prefix: str) -> Dict[str, int]:
+    """{value: count} for the counters named '<prefix>:<value>', without zeros"""
+    start = f"{prefix}:"
+    return {
+        name[len(start):]: value
+        for name, value in counters.items()
+        if name.startswith(start) and value
+    }
+
+def recent(counters: Dict[str, int], prefix: str) -> int:
+    """Rows of a prefix created in the window read_counters() read (its day
+    buckets and partial day)"""
+    return sum(breakdown(counters, f"{prefix}:day").values())
+
+def reconcile_counters(connection: Connection) -> int:
+    """Rebuild every counter from the source tables; returns the counter count"""
+    deltas = collections.Counter()
+    for model, (prefix, breakdowns, by_day) in COUNTED_MODELS.items():
+        deltas[f"{prefix}:total"] = connection.execute(select(func.count()).select_from(model)).scalar()
+        for column_name in breakdowns:
+            column = getattr(model, column_name)
+            for value, count in connection.execute(select(column, func.count()).group_by(column)):
+                deltas[f"{prefix}:{column_name}:{value}"] = count
+        if by_day:
+            day = func.date(model.created_at)
+            for value, count in connection.execute(
+                select(day, func.count()).where(model.created_at.isnot(None)).group_by(day)
+            ):
+                deltas[f"{prefix}:day:{value}"] = count
+
+    deltas["tickets:assigned"] = connection.execute(
+        select(func.count()).select_from(Ticket).where(Ticket.assigned_to.isnot(None))
+    ).scalar()
+    for is_active, key in ((True, "users:active"), (False, "users:inactive")):
+        deltas[key] = connection.execute(
+            select(func.count()).select_from(User).where(User.is_active == is_active)
+        ).scalar()
+
+    connection.execute(delete(Counter))
+    apply_deltas(connection, deltas)
+    return len([value for value in deltas.values() if value])
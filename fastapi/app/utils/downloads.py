@@ -0,0 +1,145 @@
+import os
+import re
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from app.utils.conditional import etag_matches, http_date
+
+# Attachment downloads: conditional requests (If-None-Match), single byte
+# ranges (Range / If-Range) and a body that is sent by the server with
+# sendfile(2) when it offers the ASGI zero-copy extension, or read in chunks
+# on the threadpool otherwise, so large files are never held in memory.
+
+CHUNK_SIZE = 256 * 1024
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def strong_etag(sha256: str) -> str:
+    return f'"{sha256}"'
+
+def _if_range_matches(header: str, etag: str, last_modified: Optional[datetime]) -> bool:
+    """If-Range needs a strong validator: an exact ETag or an exact date"""
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == etag and not etag.startswith("W/")
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return http_date(last_modified) == http_date(since)
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single 'bytes=' range.
+
+    Returns None for headers we don't serve partially (malformed or
+    multiple ranges), and raises ValueError when the range is unsatisfiable.
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError(header)
+    return start, end
+
+class FileRangeResponse(Response):
+    """Send bytes [start, end] of a file without reading it into memory"""
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: dict, media_type: str):
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({**headers, "content-length": str(self.length)})
+
+    @staticmethod
+    def _read_at(file, offset: int, size: int) -> bytes:
+        file.seek(offset)
+        return file.read(size)
+
+    async def __call__(self, scope, receive, send):
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope["method"] == "HEAD" or self.length == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file.fileno(),
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            else:
+                offset, remaining = self.start, self.length
+                while remaining:
+                    chunk = await anyio.to_thread.run_sync(
+                        self._read_at, file, offset, min(CHUNK_SIZE, remaining)
+                    )
+                    if not chunk:
+                        raise RuntimeError(f"{self.path} is shorter than expected")
+                    offset += len(chunk)
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        finally:
+            await anyio.to_thread.run_sync(file.close)
+
+def file_response(
+    request_headers: Headers,
+    path: str,
+    filename: str,
+    media_type: str,
+    sha256: Optional[str],
+    last_modified: Optional[datetime]
+) -> Response:
+    """Answer a GET/HEAD for a stored file, honouring the conditional and
+    range headers of the request. Raises FileNotFoundError if the file is gone."""
+    size = os.stat(path).st_size
+    etag = strong_etag(sha256) if sha256 else f'W/"{size}-{int(os.stat(path).st_mtime)}"'
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "cache-control": "private, max-age=0, must-revalidate",
+        "content-disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+    }
+    if last_modified is not None:
+        headers["last-modified"] = http_date(last_modified)
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    start, end, status_code = 0, size - 1, 200
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and (if_range is None or _if_range_matches(if_range, etag, last_modified)):
+        try:
+            requested = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if requested:
+            start, end = requested
+            status_code = 206
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+    return FileRangeResponse(path, start, end, status_code, headers, media_type)
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+from starlette.responses import StreamingResponse
+from app.database import ReadSessionLocal
+
+# Exports stream rows straight from the database to the client: the query
+# is iterated with yield_per (a server-side cursor on PostgreSQL), each batch
+# is encoded and sent before the next one is fetched, and child rows such as
+# comments are loaded with one IN query per batch. Memory use is bounded by
+# EXPORT_BATCH_SIZE whatever the table size, and the export runs on a
+# read-only session of its own, so it never holds the write lock.
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+# A child table to nest under each exported row: (statement selecting the
+# child columns, its foreign key column, key to nest them under)
+Children = Tuple[Select, ColumnElement, str]
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def _batches(db: Session, statement: Select) -> Iterator[List[dict]]:
+    result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for partition in result.mappings().partitions():
+        yield [{key: _plain(value) for key, value in row.items()} for row in partition]
+
+def _with_children(db: Session, batches: Iterable[List[dict]], children: Children) -> Iterator[List[dict]]:
+    statement, foreign_key, name = children
+    for batch in batches:
+        by_parent = {row["id"]: row.setdefault(name, []) for row in batch}
+        for child in db.execute(statement.where(foreign_key.in_(list(by_parent)))).mappings():
+            by_parent[child[foreign_key.name]].append({key: _plain(value) for key, value in child.items()})
+        yield batch
+
+def _encode(batches: Iterable[List[dict]], format: ExportFormat, columns: List[str]) -> Iterator[bytes]:
+    if format == ExportFormat.NDJSON:
+        for batch in batches:
+            yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode()
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def stream_rows(statement: Select, format: ExportFormat, children: Optional[Children] = None) -> Iterator[bytes]:
+    """Encoded batches of the statement's rows, read with a session of its own"""
+    with ReadSessionLocal() as db:
+        batches = _batches(db, statement)
+        if children is not None:
+            batches = _with_children(db, batches, children)
+        yield from _encode(batches, format, [column.name for column in statement.selected_columns])
+
+def export_response(
+    statement: Select,
+    format: ExportFormat,
+    name: str,
+    children: Optional[Children] = None
+) -> StreamingResponse:
+    """Stream the rows of statement as an NDJSON or CSV download"""
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format.value}"
+    return StreamingResponse(
+        stream_rows(statement, format, children),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
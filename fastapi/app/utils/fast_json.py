@@ -0,0 +1,121 @@
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Bundle, Query, Session
+
+# List endpoints normally load ORM objects, validate them into the response
+# schema (from_attributes) and encode the result with the json module. With
+# FAST_JSON=1 they select just the schema's columns instead and encode the
+# rows with orjson: rows come straight from our own database, so there is
+# nothing to validate, and the page is turned into bytes in one call. The
+# JSON is the same either way (see `python -m app.manage benchmark-json`).
+
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
+if FAST_JSON:
+    import orjson
+
+    # Aware datetimes in UTC end in "Z", as pydantic writes them
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+@lru_cache(maxsize=None)
+def _bundle(schema: type, model: type) -> Bundle:
+    # The schema's fields that are columns of the model, in field order so
+    # the keys come out in the order the response model would write them
+    columns = model.__table__.c
+    return Bundle(schema.__name__, *[columns[name] for name in schema.model_fields if name in columns])
+
+def rows(statement, schema: type, model: type):
+    """A Query or select() of model narrowed to the columns of schema.
+
+    Each result row is a single Row of the columns (row[0]), so the
+    statement can still be passed to paginate() and paginate_async().
+    """
+    bundle = _bundle(schema, model)
+    if isinstance(statement, Query):
+        return statement.with_entities(bundle)
+    return statement.with_only_columns(bundle)
+
+def as_dicts(page: Sequence) -> List[dict]:
+    return [row._asdict() for row in page]
+
+def with_children(db: Session, items: List[dict], schema: type, model: type, foreign_key, name: str) -> List[dict]:
+    """Nest the schema's columns of the child rows under each item (one IN query)"""
+    by_parent = {item["id"]: item.setdefault(name, []) for item in items}
+    if by_parent:
+        statement = (
+            select(*_bundle(schema, model).exprs, foreign_key)
+            .where(foreign_key.in_(list(by_parent)))
+            .order_by(model.id)
+        )
+        for child in db.execute(statement).mappings():
+            child = dict(child)
+            by_parent[child.pop(foreign_key.name)].append(child)
+    return items
+
+def json_response(items: list, response: Response) -> Response:
+    """Encode items with orjson, keeping the headers set on the injected response"""
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(orjson.dumps(items, option=ORJSON_OPTIONS), media_type="application/json", headers=headers)
+
+def _default_encode(content) -> bytes:
+    # What JSONResponse does with the response model's output
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+def benchmark(
+    db: Session,
+    schema: type,
+    model: type,
+    load_options: Sequence = (),
+    children: Optional[tuple] = None,
+    limit: int = 100,
+    repeat: int = 50
+) -> Dict[str, dict]:
+    """Time one page of model through both paths; microseconds per row.
+
+    load_options are the loader options the route uses, and children is
+    (child schema, child model, foreign key, name) for schemas with nested
+    rows such as FeatureRequestResponse.comments.
+    """
+    import orjson
+
+    adapter = TypeAdapter(List[schema])
+
+    def default_path():
+        objects = db.query(model).options(*load_options).order_by(model.id).limit(limit).all()
+        started = time.perf_counter()
+        content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+        body = _default_encode(content)
+        return started, body
+
+    def fast_path():
+        items = as_dicts(db.execute(rows(select(model), schema, model).order_by(model.id).limit(limit)).scalars().all())
+        if children:
+            with_children(db, items, *children)
+        started = time.perf_counter()
+        return started, orjson.dumps(items, option=orjson.OPT_UTC_Z)
+
+    results = {}
+    for name, path in (("default", default_path), ("fast_json", fast_path)):
+        total = serialize = 0.0
+        for _ in range(repeat):
+            db.expunge_all()
+            started = time.perf_counter()
+            serialize_started, body = path()
+            finished = time.perf_counter()
+            total += finished - started
+            serialize += finished - serialize_started
+        count = len(json.loads(body)) or 1
+        results[name] = {
+            "rows": count,
+            "load_us_per_row": round((total - serialize) / repeat / count * 1e6, 2),
+            "serialize_us_per_row": round(serialize / repeat / count * 1e6, 2),
+            "total_us_per_row": round(total / repeat / count * 1e6, 2),
+            "body": body,
+        }
+    return results
@@ -0,0 +1,424 @@
+import csv
+import hashlib
+import json
+import os
+import secrets
+import time
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Table, func, insert, select, text, update
+from sqlalchemy.engine import Connection
+from app.database import engine
+from app.models.comment import Comment
+from app.models.import_run import ImportKey, ImportRun
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.schemas.imports import CommentImport, TicketImport, UserImport
+from app.utils import changes, counters, search_index
+from app.utils.security import get_password_hash
+
+# Bulk imports of users, tickets and comments from CSV or NDJSON files. The
+# input is streamed and validated in batches with the import schemas, and
+# each batch is written with one batched INSERT; batches are grouped into
+# large transactions that also record how far the file has been read, so an
+# interrupted run resumes after the last commit. Rows get explicit ids (the
+# write lock is held while they are assigned), which lets the external ids
+# of the source system be mapped onto local ones without reading rows back.
+# The target table's secondary indexes and the search index triggers are
+# dropped for the load and rebuilt once at the end, also when the load
+# fails; the FTS tables stay, so search keeps serving the rows it had. If
+# the process dies before that, create_all() at the next startup recreates
+# the indexes and triggers, and the resumed run indexes the imported rows.
+# Imported rows are added to the change log like any other insert.
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_TRANSACTION_SIZE = int(os.getenv("IMPORT_TRANSACTION_SIZE", "50000"))
+
+# Bytes of the input hashed to recognise it when a run is resumed
+FINGERPRINT_BYTES = 1024 * 1024
+
+class AlreadyImported(Exception):
+    """The file was imported completely by an earlier run"""
+
+# A validated record: (record number, raw record, parsed record)
+Item = Tuple[int, object, object]
+# A rejected record: (record number, raw record, error)
+Reject = Tuple[int, object, str]
+
+def read_records(path: str) -> Iterator[object]:
+    """Records of a CSV or NDJSON (.ndjson, .jsonl) file, one at a time.
+
+    Empty CSV fields are left out so that optional fields take their
+    defaults; NDJSON lines that are not valid JSON are yielded as the raw
+    line and rejected by validation.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as source:
+            for row in csv.DictReader(source):
+                yield {key: value for key, value in row.items() if key and value not in ("", None)}
+        return
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line.rstrip("\n")
+
+def fingerprint(path: str) -> str:
+    """Size and hash of the head of a file, to match it against earlier runs"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        digest.update(source.read(FINGERPRINT_BYTES))
+    return f"{os.path.getsize(path)}:{digest.hexdigest()}"
+
+def _errors(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'record'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+def validate_batch(schema, records: List[Tuple[int, object]]) -> Tuple[List[Item], List[Reject]]:
+    """Validate a batch in one call, falling back to record by record on errors"""
+    try:
+        parsed = _list_adapter(schema).validate_python([record for _, record in records])
+        return [(number, record, item) for (number, record), item in zip(records, parsed)], []
+    except ValidationError:
+        pass
+    items, rejects = [], []
+    for number, record in records:
+        try:
+            items.append((number, record, schema.model_validate(record)))
+        except ValidationError as exc:
+            rejects.append((number, record, _errors(exc)))
+    return items, rejects
+
+def _existing_keys(connection: Connection, kind: str, external_ids: Iterable[str]) -> Dict[str, int]:
+    external_ids = list(set(external_ids))
+    if not external_ids:
+        return {}
+    return dict(connection.execute(
+        select(ImportKey.external_id, ImportKey.local_id)
+        .where(ImportKey.kind == kind, ImportKey.external_id.in_(external_ids))
+    ).all())
+
+class UserMap:
+    """Every user by external id, email (case-insensitive) and username"""
+
+    def __init__(self, connection: Connection):
+        self.by_external_id = dict(connection.execute(
+            select(ImportKey.external_id, ImportKey.local_id).where(ImportKey.kind == "users")
+        ).all())
+        self.by_email = {}
+        self.by_username = {}
+        for user_id, username, email in connection.execute(select(User.id, User.username, User.email)):
+            self.add(user_id, username, email)
+
+    def add(self, user_id: int, username: str, email: str, external_id: Optional[str] = None) -> None:
+        self.by_email[email.lower()] = user_id
+        self.by_username[username] = user_id
+        if external_id is not None:
+            self.by_external_id[external_id] = user_id
+
+    def resolve(self, reference: str) -> Optional[int]:
+        """Local id of a user given as external id, email or username"""
+        for mapping, key in (
+            (self.by_external_id, reference),
+            (self.by_email, reference.lower()),
+            (self.by_username, reference),
+        ):
+            if key in mapping:
+                return mapping[key]
+        return None
+
+class ImportContext:
+    """State shared by the batches of one run"""
+
+    def __init__(self, connection: Connection, table: Table):
+        self.connection = connection
+        self.table = table
+        self.users = UserMap(connection)
+        self.now = datetime.utcnow()
+        self._password_hash = None
+        self._next_id = None
+
+    @property
+    def password_hash(self) -> str:
+        # Imported users get an unusable password (one hash per run, bcrypt
+        # is slow) and sign in once an admin sets a new one
+        if self._password_hash is None:
+            self._password_hash = get_password_hash(secrets.token_urlsafe(32))
+        return self._password_hash
+
+    def begin(self) -> None:
+        """Start assigning ids; the caller's transaction must hold the write lock"""
+        if self.connection.dialect.name == "postgresql":
+            self.connection.execute(text(f"LOCK TABLE {self.table.name} IN EXCLUSIVE MODE"))
+        self._next_id = (self.connection.execute(select(func.max(self.table.c.id))).scalar() or 0) + 1
+
+    def take_id(self) -> int:
+        self._next_id += 1
+        return self._next_id - 1
+
+def _insert(connection: Connection, table, rows: List[dict]) -> None:
+    # An executemany of one compiled INSERT: SQLAlchemy compiles a multi-row
+    # insert().values([...]) afresh for every batch, which costs far more
+    # than running it, while executemany is batched into multi-row VALUES
+    # on PostgreSQL (insertmanyvalues) and runs a prepared statement on SQLite
+    if rows:
+        connection.execute(insert(table), rows)
+
+def _finish_batch(context: ImportContext, model, rows: List[dict], keys: List[dict]) -> None:
+    _insert(context.connection, model.__table__, rows)
+    _insert(context.connection, ImportKey.__table__, keys)
+    counters.apply_deltas(context.connection, counters.insert_deltas(model, rows))
+    changes.insert_changes(context.connection, [
+        changes.change_row(model, row["id"], changes.CREATED, row, created_at=context.now) for row in rows
+    ])
+
+def load_users(context: ImportContext, items: List[Item]) -> Tuple[int, int, List[Reject]]:
+    """Insert a batch of users; existing emails are mapped onto the existing user"""
+    rows, keys, rejects, matched = [], [], [], 0
+    for number, record, user in items:
+        if user.id in context.users.by_external_id:
+            matched += 1
+            continue
+        existing = context.users.by_email.get(user.email.lower())
+        if existing is not None:
+            keys.append(dict(kind="users", external_id=user.id, local_id=existing))
+            context.users.by_external_id[user.id] = existing
+            matched += 1
+            continue
+        if user.username in context.users.by_username:
+            rejects.append((number, record, "username: Username already taken"))
+            continue
+        user_id = context.take_id()
+        created_at = user.created_at or context.now
+        rows.append(dict(
+            id=user_id,
+            username=user.username,
+            email=user.email,
+            hashed_password=context.password_hash,
+            role=user.role,
+            created_at=created_at,
+            updated_at=created_at,
+            is_active=True
+        ))
+        keys.append(dict(kind="users", external_id=user.id, local_id=user_id))
+        context.users.add(user_id, user.username, user.email, user.id)
+    _finish_batch(context, User, rows, keys)
+    return len(rows), matched, rejects
+
+def load_tickets(context: ImportContext, items: List[Item]) -> Tuple[int, int, List[Reject]]:
+    """Insert a batch of tickets; tickets imported before are skipped"""
+    imported = _existing_keys(context.connection, "tickets", [ticket.id for _, _, ticket in items])
+    rows, keys, rejects, matched = [], [], [], 0
+    for number, record, ticket in items:
+        if ticket.id in imported:
+            matched += 1
+            continue
+        user_id = context.users.resolve(ticket.user)
+        if user_id is None:
+            rejects.append((number, record, f"user: Unknown user '{ticket.user}'"))
+            continue
+        assigned_to = None
+        if ticket.assigned_to:
+            assigned_to = context.users.resolve(ticket.assigned_to)
+            if assigned_to is None:
+                rejects.append((number, record, f"assigned_to: Unknown user '{ticket.assigned_to}'"))
+                continue
+        ticket_id = context.take_id()
+        created_at = ticket.created_at or context.now
+        rows.append(dict(
+            id=ticket_id,
+            title=ticket.title,
+            description=ticket.description,
+            priority=ticket.priority.value,
+            status=ticket.status.value,
+            created_at=created_at,
+            updated_at=ticket.updated_at or created_at,
+            user_id=user_id,
+            assigned_to=assigned_to
+        ))
+        keys.append(dict(kind="tickets", external_id=ticket.id, local_id=ticket_id))
+        imported[ticket.id] = ticket_id
+    _finish_batch(context, Ticket, rows, keys)
+    return len(rows), matched, rejects
+
+def load_comments(context: ImportContext, items: List[Item]) -> Tuple[int, int, List[Reject]]:
+    """Insert a batch of ticket comments; comments with an id imported before are skipped"""
+    tickets = _existing_keys(context.connection, "tickets", [comment.ticket for _, _, comment in items])
+    imported = _existing_keys(context.connection, "comments", [comment.id for _, _, comment in items if comment.id])
+    rows, keys, rejects, matched = [], [], [], 0
+    for number, record, comment in items:
+        if comment.id and comment.id in imported:
+            matched += 1
+            continue
+        ticket_id = tickets.get(comment.ticket)
+        if ticket_id is None:
+            rejects.append((number, record, f"ticket: Unknown ticket '{comment.ticket}'"))
+            continue
+        user_id = context.users.resolve(comment.user)
+        if user_id is None:
+            rejects.append((number, record, f"user: Unknown user '{comment.user}'"))
+            continue
+        comment_id = context.take_id()
+        rows.append(dict(
+            id=comment_id,
+            content=comment.content,
+            created_at=comment.created_at or context.now,
+            user_id=user_id,
+            ticket_id=ticket_id
+        ))
+        if comment.id:
+            keys.append(dict(kind="comments", external_id=comment.id, local_id=comment_id))
+            imported[comment.id] = comment_id
+    _finish_batch(context, Comment, rows, keys)
+    return len(rows), matched, rejects
+
+# Kind -> (record schema, target model, batch loader)
+IMPORTERS: Dict[str, Tuple[type, type, Callable]] = {
+    "users": (UserImport, User, load_users),
+    "tickets": (TicketImport, Ticket, load_tickets),
+    "comments": (CommentImport, Comment, load_comments),
+}
+
+def _deferred_indexes(table: Table) -> list:
+    # Unique indexes stay: they still reject duplicates during the load
+    return [index for index in table.indexes if not index.unique]
+
+def _search_indexes(connection: Connection, table: Table) -> list:
+    """Names of the FTS tables that mirror this table"""
+    if connection.dialect.name != "sqlite":
+        return []
+    return [name for name, spec in search_index.SEARCH_INDEXES.items() if spec["source"] == table.name]
+
+def defer_indexes(connection: Connection, table: Table) -> None:
+    """Drop the table's secondary indexes and search triggers for a load.
+
+    The FTS tables themselves stay, so search keeps working (without the
+    rows being imported) while the load runs.
+    """
+    for index in _deferred_indexes(table):
+        index.drop(connection, checkfirst=True)
+    for name in _search_indexes(connection, table):
+        search_index.drop_search_triggers(connection, name)
+
+def restore_indexes(connection: Connection, table: Table) -> None:
+    """Recreate what defer_indexes() dropped and move id sequences past imported ids"""
+    for index in _deferred_indexes(table):
+        index.create(connection, checkfirst=True)
+    names = _search_indexes(connection, table)
+    if names:
+        # Recreates the triggers and indexes the imported rows
+        search_index.rebuild_search_index(connection, names)
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+        ))
+
+def _start_run(connection: Connection, kind: str, path: str, force: bool) -> int:
+    """Id of the unfinished run of this file, or of a new one"""
+    fingerprint_ = fingerprint(path)
+    run = connection.execute(
+        select(ImportRun).where(ImportRun.kind == kind, ImportRun.fingerprint == fingerprint_)
+        .order_by(ImportRun.id.desc()).limit(1)
+    ).first()
+    if run is not None and run.finished_at is None:
+        return run.id
+    if run is not None and not force:
+        raise AlreadyImported(f"{path} was imported by run {run.id} at {run.finished_at:%Y-%m-%d %H:%M:%S}")
+    now = datetime.utcnow()
+    run_id = connection.execute(insert(ImportRun).values(
+        kind=kind, source=os.path.abspath(path), fingerprint=fingerprint_,
+        records_read=0, imported=0, matched=0, rejected=0,
+        started_at=now, updated_at=now
+    )).inserted_primary_key[0]
+    connection.commit()
+    return run_id
+
+def _write_rejects(path: str, rejects: List[Reject]) -> None:
+    if not rejects:
+        return
+    with open(f"{path}.rejects.ndjson", "a", encoding="utf-8") as output:
+        for number, record, error in rejects:
+            output.write(json.dumps({"record": number, "error": error, "data": record}, ensure_ascii=False) + "\n")
+
+def import_file(
+    kind: str,
+    path: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    transaction_size: int = IMPORT_TRANSACTION_SIZE,
+    force: bool = False,
+    report: Callable[[str], None] = print
+) -> dict:
+    """Import a CSV or NDJSON file of users, tickets or comments; returns the run's totals.
+
+    Rejected records are appended to <path>.rejects.ndjson. Running the
+    same file again resumes an interrupted run, and raises AlreadyImported
+    for a finished one unless force is set.
+    """
+    schema, model, load = IMPORTERS[kind]
+    table = model.__table__
+    with engine.connect() as connection:
+        run_id = _start_run(connection, kind, path, force)
+        run = connection.execute(select(ImportRun).where(ImportRun.id == run_id)).one()
+        totals = {"records_read": run.records_read, "imported": run.imported, "matched": run.matched, "rejected": run.rejected}
+        if totals["records_read"]:
+            report(f"Resuming run {run_id} after record {totals['records_read']}")
+
+        defer_indexes(connection, table)
+        connection.commit()
+        try:
+            context = ImportContext(connection, table)
+            records = islice(enumerate(read_records(path), 1), totals["records_read"], None)
+            started, processed = time.monotonic(), 0
+
+            while True:
+                chunk = list(islice(records, transaction_size))
+                if not chunk:
+                    break
+                # Take the write lock first, then assign ids from the current maximum
+                connection.execute(update(ImportRun).where(ImportRun.id == run_id).values(updated_at=datetime.utcnow()))
+                context.begin()
+                rejects = []
+                for offset in range(0, len(chunk), batch_size):
+                    items, invalid = validate_batch(schema, chunk[offset:offset + batch_size])
+                    imported, matched, refused = load(context, items)
+                    totals["imported"] += imported
+                    totals["matched"] += matched
+                    rejects += invalid + refused
+                totals["records_read"] += len(chunk)
+                totals["rejected"] += len(rejects)
+                connection.execute(update(ImportRun).where(ImportRun.id == run_id).values(**totals))
+                connection.commit()
+                _write_rejects(path, sorted(rejects, key=lambda reject: reject[0]))
+
+                processed += len(chunk)
+                rate = processed / max(time.monotonic() - started, 1e-6)
+                report(
+                    f"{totals['records_read']} records read: {totals['imported']} imported, "
+                    f"{totals['matched']} matched, {totals['rejected']} rejected ({rate:,.0f} rows/s)"
+                )
+        finally:
+            # Also after a failed load, so the search triggers and indexes are
+            # back before anything else writes to the table
+            connection.rollback()
+            report("Rebuilding indexes")
+            restore_indexes(connection, table)
+            connection.commit()
+        connection.execute(update(ImportRun).where(ImportRun.id == run_id).values(finished_at=datetime.utcnow()))
+        connection.commit()
+    elapsed = time.monotonic() - started
+    totals["seconds"] = round(elapsed, 3)
+    totals["rows_per_second"] = round(processed / elapsed) if elapsed and processed else 0
+    return totals
@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.database import JOB_WORKERS, JobSessionLocal
+from app.models.job import Job
+
+# Durable background jobs, queued in the caller's transaction and run by
+# worker threads; a job whose lease runs out is retried, so tasks must be
+# safe to run twice and should commit as they go
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "2"))  # Seconds, doubled on each attempt
+JOB_MAX_RETRY_DELAY = float(os.getenv("JOB_MAX_RETRY_DELAY", "600"))
+JOB_LEASE = timedelta(seconds=int(os.getenv("JOB_LEASE_SECONDS", "300")))
+JOB_RETENTION = timedelta(days=int(os.getenv("JOB_RETENTION_DAYS", "7")))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+logger = logging.getLogger(__name__)
+
+# Task name -> function(db, **payload)
+TASKS: Dict[str, Callable] = {}
+
+def task(name: str):
+    """Register a function as the task run for jobs with this name"""
+    def register(function: Callable) -> Callable:
+        TASKS[name] = function
+        return function
+    return register
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: Optional[dict] = None,
+    idempotency_key: Optional[str] = None,
+    delay: float = 0,
+    max_attempts: int = JOB_MAX_ATTEMPTS
+) -> None:
+    """Queue a job in the session's transaction; it runs once that commits.
+
+    A job with the same idempotency_key (queued, running or finished within
+    JOB_RETENTION) makes this a no-op.
+    """
+    if name not in TASKS:
+        raise KeyError(f"Unknown task '{name}'")
+    now = datetime.utcnow()
+    values = dict(
+        name=name,
+        payload=json.dumps(payload or {}),
+        idempotency_key=idempotency_key,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        created_at=now,
+        run_at=now + timedelta(seconds=delay)
+    )
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.execute(dialect.insert(Job).values(**values).on_conflict_do_nothing(index_elements=[Job.idempotency_key]))
+    db.info["jobs_enqueued"] = True
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt: doubling, capped, with jitter"""
+    delay = min(JOB_RETRY_DELAY * 2 ** (attempts - 1), JOB_MAX_RETRY_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+def _is_due(now: datetime):
+    return (Job.status == QUEUED) & (Job.run_at <= now)
+
+def due_jobs_statement(now: datetime):
+    """Ids of the next few jobs due at now, oldest first"""
+    return select(Job.id).where(_is_due(now)).order_by(Job.run_at).limit(5)
+
+def claim_job(db: Session) -> Optional[Job]:
+    """Take the next due job, or None; commits"""
+    now = datetime.utcnow()
+    due = _is_due(now)
+    for job_id in db.execute(due_jobs_statement(now)).scalars().all():
+        claimed = db.execute(
+            update(Job).where(Job.id == job_id, due).values(
+                status=RUNNING,
+                attempts=Job.attempts + 1,
+                started_at=now,
+                locked_until=now + JOB_LEASE
+            )
+        ).rowcount
+        if claimed:
+            db.commit()
+            return db.get(Job, job_id)
+    db.commit()
+    return None
+
+def run_job(job: Job, session_factory=JobSessionLocal) -> bool:
+    """Run a claimed job's task and record the outcome; True if it succeeded"""
+    error = None
+    try:
+        function = TASKS[job.name]
+        with session_factory() as db:
+            function(db, **json.loads(job.payload))
+            db.commit()
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.name, job.attempts)
+        error = exc
+
+    now = datetime.utcnow()
+    if error is None:
+        values = dict(status=SUCCEEDED, finished_at=now, locked_until=None, last_error=None)
+    elif job.attempts >= job.max_attempts:
+        values = dict(status=FAILED, finished_at=now, locked_until=None, last_error=repr(error)[:2000])
+    else:
+        values = dict(
+            status=QUEUED,
+            run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+            locked_until=None,
+            last_error=repr(error)[:2000]
+        )
+    with session_factory() as db:
+        # Only the worker holding the lease records the outcome
+        db.execute(update(Job).where(Job.id == job.id, Job.status == RUNNING, Job.started_at == job.started_at).values(**values))
+        db.commit()
+    return error is None
+
+def expire_leases(db: Session) -> int:
+    """Queue again the running jobs whose worker stopped renewing its lease"""
+    requeued = db.execute(
+        update(Job).where(Job.status == RUNNING, Job.locked_until < datetime.utcnow())
+        .values(status=QUEUED, locked_until=None, last_error="Lease expired")
+    ).rowcount
+    db.commit()
+    return requeued
+
+def prune_jobs(db: Session) -> int:
+    """Delete finished jobs older than JOB_RETENTION"""
+    deleted = db.execute(
+        delete(Job).where(Job.status.in_([SUCCEEDED, FAILED]), Job.finished_at < datetime.utcnow() - JOB_RETENTION)
+    ).rowcount
+    db.commit()
+    return deleted
+
+def _percentile(values: list, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * fraction), len(values) - 1)], 3)
+
+def finished_jobs_statement(since: datetime):
+    """Queue, start and finish times of the jobs finished since a time"""
+    return select(Job.created_at, Job.started_at, Job.finished_at).where(Job.finished_at >= since)
+
+def queue_stats(db: Session, window: timedelta = timedelta(hours=1)) -> dict:
+    """Queue depth per status and task, and wait/run times of recent jobs"""
+    now = datetime.utcnow()
+    depth = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+    by_task = {}
+    for name, status, count in db.execute(
+        select(Job.name, Job.status, func.count()).group_by(Job.name, Job.status)
+    ):
+        depth[status] = depth.get(status, 0) + count
+        by_task.setdefault(name, {})[status] = count
+
+    oldest_due = db.execute(
+        select(func.min(Job.run_at)).where(Job.status == QUEUED, Job.run_at <= now)
+    ).scalar()
+    finished = db.execute(finished_jobs_statement(now - window)).all()
+    waits = [(started - created).total_seconds() for created, started, _ in finished if started]
+    runs = [(done - started).total_seconds() for _, started, done in finished if started]
+    return {
+        "depth": depth,
+        "tasks": by_task,
+        "oldest_due_seconds": round((now - oldest_due).total_seconds(), 3) if oldest_due else 0,
+        "recent": {
+            "window_seconds": int(window.total_seconds()),
+            "finished": len(finished),
+            "wait_seconds": {"p50": _percentile(waits, 0.5), "p95": _percentile(waits, 0.95)},
+            "run_seconds": {"p50": _percentile(runs, 0.5), "p95": _percentile(runs, 0.95)},
+        },
+        "recent_failures": [
+            {"id": job.id, "name": job.name, "attempts": job.attempts, "error": job.last_error, "finished_at": job.finished_at}
+            for job in db.execute(
+                select(Job).where(Job.status == FAILED).order_by(Job.finished_at.desc()).limit(10)
+            ).scalars()
+        ],
+    }
+
+class JobWorker:
+    """A pool of threads that run due jobs until stopped"""
+
+    def __init__(self, concurrency: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL, session_factory=JobSessionLocal):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self._threads = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._housekeeping_at = 0.0
+        self._housekeeping_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for number in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10) -> None:
+        """Let running jobs finish (up to timeout) and stop the threads"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def housekeeping(self) -> None:
+        """Requeue jobs with expired leases and prune old ones (once per poll interval)"""
+        with self._housekeeping_lock:
+            if time.monotonic() < self._housekeeping_at:
+                return
+            self._housekeeping_at = time.monotonic() + self.poll_interval
+        with self.session_factory() as db:
+            expire_leases(db)
+            prune_jobs(db)
+
+    def run_pending(self) -> int:
+        """Run due jobs in this thread until none is left; returns how many ran"""
+        ran = 0
+        while not self._stopping.is_set():
+            with self.session_factory() as db:
+                job = claim_job(db)
+                if job is not None:
+                    db.expunge(job)
+            if job is None:
+                return ran
+            run_job(job, self.session_factory)
+            ran += 1
+        return ran
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.housekeeping()
+                if self.run_pending():
+                    continue
+            except Exception:
+                logger.exception("Job worker error")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+worker = JobWorker()
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session):
+    if session.info.pop("jobs_enqueued", False):
+        worker.wake()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session):
+    session.info.pop("jobs_enqueued", None)
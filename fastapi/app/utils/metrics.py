@@ -0,0 +1,290 @@
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Tuple
+import anyio.to_thread
+from sqlalchemy import exc
+from app.utils.sql_context import current_sql, statement_hook
+
+# Prometheus metrics, kept in process and rendered in the text exposition
+# format on GET /metrics. A middleware times every request under its route
+# template (never the raw path, so ids don't become label values) and adds up
+# its response bytes and the SQL statements it ran (read from its
+# app.utils.sql_context RequestSQL); a statement hook and the pool hook time
+# statements and connection checkouts. Updates are a dict lookup and an
+# add under a per-metric lock; gauges (requests in flight, pool connections,
+# threadpool threads) are read when scraped. Each worker process keeps its
+# own numbers, so scrape every worker (or run one per container).
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# PlainTextResponse appends "; charset=utf-8"
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SQL_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+# Anything else a client sends is counted as "other" rather than minting a
+# label value per made-up method
+_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+UNMATCHED = "<unmatched>"
+
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[str]]] = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._series: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(value) if isinstance(value, list) else value) for labels, value in self._series.items()]
+        lines = _header(self.name, self.kind, self.help)
+        for labels, value in sorted(series, key=lambda item: item[0]):
+            lines.extend(self._lines(labels, value))
+        return lines
+
+    def _lines(self, labels: Tuple, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        # One count per bucket (made cumulative when rendered), then the sum
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def _lines(self, labels: Tuple, value: list) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), value):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        label_text = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_text} {_format_value(value[-1])}")
+        lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+def collector(function: Callable[[], Iterable[str]]):
+    """Register a function returning exposition lines, called on every scrape"""
+    _collectors.append(function)
+    return function
+
+def gauge_lines(name: str, help_text: str, labelnames: Tuple[str, ...], samples: Dict[Tuple, float]) -> List[str]:
+    """Exposition lines for a gauge read at scrape time"""
+    lines = _header(name, "gauge", help_text)
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return lines
+
+def render() -> str:
+    """Every metric in the Prometheus text format (call from the event loop)"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for function in _collectors:
+        lines.extend(function())
+    return "\n".join(lines) + "\n"
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time from request to the end of the response body", ("method", "route"), LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body bytes", ("method", "route"), SIZE_BUCKETS)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements run per request", ("method", "route"), STATEMENT_BUCKETS
+)
+REQUEST_SQL_TIME = Histogram(
+    "http_request_sql_seconds", "Time spent executing SQL per request", ("method", "route"), SQL_TIME_BUCKETS
+)
+STATEMENTS = Counter("sql_statements_total", "SQL statements executed, in and out of requests")
+STATEMENT_TIME = Counter("sql_statement_seconds_total", "Time spent executing SQL statements")
+CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time taken to get a connection from the pool", ("pool",), CHECKOUT_BUCKETS
+)
+CHECKOUT_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after DATABASE_POOL_TIMEOUT", ("pool",))
+
+# Requests being served, by id(scope); the scope gains its route once routed
+_in_flight: Dict[int, dict] = {}
+
+def _route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED
+
+def _method_label(scope: dict) -> str:
+    method = scope.get("method", "")
+    return method if method in _METHODS else "other"
+
+class MetricsMiddleware:
+    """Count and time every HTTP request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Until a response starts, a failing request is a 500
+        response = [500, 0]
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.body":
+                response[1] += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                response[0] = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        # Shared with the middlewares around this one; count from here on
+        sql = current_sql()
+        sql_before = (sql.statements, sql.seconds) if sql is not None else (0, 0.0)
+        key = id(scope)
+        _in_flight[key] = scope
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = perf_counter() - started
+            del _in_flight[key]
+            labels = (_method_label(scope), _route_label(scope))
+            REQUESTS.inc(labels + (response[0],))
+            REQUEST_DURATION.observe(labels, elapsed)
+            RESPONSE_SIZE.observe(labels, response[1])
+            if sql is not None:
+                REQUEST_STATEMENTS.observe(labels, sql.statements - sql_before[0])
+                REQUEST_SQL_TIME.observe(labels, sql.seconds - sql_before[1])
+
+@collector
+def _requests_in_flight() -> List[str]:
+    samples: Dict[Tuple, float] = {}
+    for scope in list(_in_flight.values()):
+        labels = (_method_label(scope), _route_label(scope))
+        samples[labels] = samples.get(labels, 0) + 1
+    return gauge_lines(
+        "http_requests_in_flight", "Requests being served (not yet routed ones count as <unmatched>)",
+        ("method", "route"), samples
+    )
+
+def _count_statement(conn, statement, parameters, executemany, seconds, sql):
+    STATEMENTS.inc()
+    STATEMENT_TIME.inc(amount=seconds)
+
+if METRICS_ENABLED:
+    statement_hook(_count_statement)
+
+# Instrumented pools by name ("write", "read", ...); a pool recreated by
+# dispose() replaces its predecessor
+_pools: Dict[str, object] = {}
+_timed_pool_classes: Dict[type, type] = {}
+
+def timed_pool(pool_class: type) -> type:
+    """pool_class, timing how long each checkout waits for a connection.
+
+    Name the pool with the engine's pool_logging_name.
+    """
+    if not METRICS_ENABLED:
+        return pool_class
+    if pool_class not in _timed_pool_classes:
+        class TimedPool(pool_class):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.checkouts_waiting = 0
+                self._waiting_lock = threading.Lock()
+                _pools[self._metrics_name()] = self
+
+            def _metrics_name(self) -> str:
+                return self.logging_name or pool_class.__name__
+
+            def _do_get(self):
+                labels = (self._metrics_name(),)
+                with self._waiting_lock:
+                    self.checkouts_waiting += 1
+                started = perf_counter()
+                try:
+                    connection = super()._do_get()
+                except exc.TimeoutError:
+                    CHECKOUT_TIMEOUTS.inc(labels)
+                    raise
+                finally:
+                    with self._waiting_lock:
+                        self.checkouts_waiting -= 1
+                CHECKOUT_WAIT.observe(labels, perf_counter() - started)
+                return connection
+
+        TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+        _timed_pool_classes[pool_class] = TimedPool
+    return _timed_pool_classes[pool_class]
+
+@collector
+def _pool_gauges() -> List[str]:
+    pools = sorted(_pools.items())
+    return (
+        gauge_lines("db_pool_size", "Connections the pool keeps open", ("pool",),
+                    {(name,): pool.size() for name, pool in pools})
+        + gauge_lines("db_pool_connections_in_use", "Connections checked out of the pool", ("pool",),
+                      {(name,): pool.checkedout() for name, pool in pools})
+        + gauge_lines("db_pool_checkouts_waiting", "Checkouts in progress, most of them waiting for a connection",
+                      ("pool",), {(name,): pool.checkouts_waiting for name, pool in pools})
+    )
+
+@collector
+def _threadpool_gauges() -> List[str]:
+    # The threads sync routes and dependencies run on; when in-use reaches
+    # the limit, requests queue for a thread (tasks_waiting)
+    statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+    return (
+        gauge_lines("threadpool_threads_in_use", "Worker threads running sync routes and dependencies", (),
+                    {(): statistics.borrowed_tokens})
+        + gauge_lines("threadpool_threads_max", "Size of the worker threadpool", (), {(): statistics.total_tokens})
+        + gauge_lines("threadpool_tasks_waiting", "Calls queued for a free worker thread", (),
+                      {(): statistics.tasks_waiting})
+    )
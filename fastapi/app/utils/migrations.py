@@ -0,0 +1,67 @@
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+from app.database import Base
+from app.models.attachment import Attachment
+from app.models.blob import Blob
+from app.models.counter import Counter
+from app.models.feature_request import FeatureRequest
+from app.utils.blobs import recount_blobs
+from app.utils.counters import reconcile_counters
+from app.utils.upvotes import recount_upvotes
+
+# create_all() only creates missing tables, so columns added to existing
+# tables are applied here with ALTER TABLE, each followed by an optional
+# backfill that brings the new column up to date.
+ADDED_COLUMNS = [
+    (FeatureRequest.__table__.c.upvotes_count, recount_upvotes),
+    (Attachment.__table__.c.content_sha256, None),
+]
+
+# Indexes declared on the models are created on existing tables as well;
+# create_all() only creates them together with their table.
+
+# Indexes replaced by wider ones, dropped where they still exist
+DROPPED_INDEXES = [
+    "ix_tickets_user_id_status",
+    "ix_tickets_assigned_to_status",
+    "ix_tickets_status_priority",
+    "ix_feature_requests_status_priority",
+]
+
+# Tables added after the first release whose rows are derived from other
+# tables; when one is empty it is rebuilt from scratch
+DERIVED_TABLES = [
+    (Counter.__table__, reconcile_counters),
+    (Blob.__table__, recount_blobs),
+]
+
+def upgrade_schema(connection: Connection) -> list:
+    """Add any missing columns and indexes to existing tables and return their names"""
+    added = []
+    inspector = inspect(connection)
+    for column, backfill in ADDED_COLUMNS:
+        table = column.table.name
+        if column.name in {existing["name"] for existing in inspector.get_columns(table)}:
+            continue
+        definition = CreateColumn(column).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {definition}"))
+        if backfill:
+            backfill(connection)
+        added.append(f"{table}.{column.name}")
+    for name in DROPPED_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                added.append(index.name)
+    for table, rebuild in DERIVED_TABLES:
+        if connection.execute(select(table).limit(1)).first() is None:
+            rebuild(connection)
+    return added
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    upgrade_schema(connection)
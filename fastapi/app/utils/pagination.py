@@ -0,0 +1,193 @@
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, event, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.util import find_tables
+
+# List endpoints page with skip/limit offsets or an opaque keyset cursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# Cached totals are dropped when a write to a table they count commits
+TOTAL_CACHE_TTL_SECONDS = 30
+TOTAL_CACHE_MAX_ENTRIES = 1024
+
+_total_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_table_generations: dict = {}
+_cache_lock = threading.Lock()
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+# JSON types a cursor value may have, by the Python type of its keyset column
+_CURSOR_TYPES = {int: (int,), float: (int, float), str: (str,)}
+
+def _cursor_types(column) -> tuple:
+    try:
+        return _CURSOR_TYPES.get(column.type.python_type, (int, float, str))
+    except NotImplementedError:
+        return (int, float, str)
+
+def decode_cursor(cursor: str, keyset: Sequence) -> list:
+    """Decode a cursor produced by encode_cursor for this keyset, checking
+    each value against its column's type"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != len(keyset) or not all(
+        isinstance(value, _cursor_types(column)) and not isinstance(value, bool)
+        for value, column in zip(values, keyset)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+def invalidate_totals(*tables: str) -> None:
+    """Mark cached totals that read from any of the given tables as stale"""
+    with _cache_lock:
+        for table in tables:
+            _table_generations[table] = _table_generations.get(table, 0) + 1
+
+def invalidate_totals_on_commit(db: Session, *tables: str) -> None:
+    """Mark totals over the given tables stale once db commits (for writes
+    that bypass the unit of work)"""
+    db.info.setdefault("written_tables", set()).update(tables)
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session, flush_context):
+    tables = {
+        obj.__tablename__
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if getattr(obj, "__tablename__", None)
+    }
+    if tables:
+        invalidate_totals_on_commit(session, *tables)
+
+# Only once the writes are visible to readers: bumped any earlier, a count
+# running on a reader in between would cache the old total for the full TTL
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    tables = session.info.pop("written_tables", None)
+    if tables:
+        invalidate_totals(*tables)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_tables(session):
+    session.info.pop("written_tables", None)
+
+def _generations(tables) -> tuple:
+    return tuple(sorted((table, _table_generations.get(table, 0)) for table in tables))
+
+def _total_cache_key(statement, dialect) -> tuple:
+    compiled = statement.compile(dialect=dialect)
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    tables = {table.name for table in find_tables(statement, include_joins=True)}
+    return key, tables
+
+def _cached_total(key, tables) -> tuple:
+    """Return (total or None, generations to store a fresh total under)"""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _total_cache.get(key)
+        if cached and cached[0] > now and cached[1] == _generations(tables):
+            _total_cache.move_to_end(key)
+            return cached[2], cached[1]
+        return None, _generations(tables)
+
+def _store_total(key, generations, total: int) -> None:
+    with _cache_lock:
+        _total_cache[key] = (time.monotonic() + TOTAL_CACHE_TTL_SECONDS, generations, total)
+        _total_cache.move_to_end(key)
+        while len(_total_cache) > TOTAL_CACHE_MAX_ENTRIES:
+            _total_cache.popitem(last=False)
+
+def count_total(query: Query) -> int:
+    """Count the rows of an (unpaginated) query, cached per filter set"""
+    count_query = query.order_by(None)
+    key, tables = _total_cache_key(count_query.statement, query.session.get_bind().dialect)
+    total, generations = _cached_total(key, tables)
+    if total is None:
+        total = count_query.count()
+        _store_total(key, generations, total)
+    return total
+
+async def count_total_async(db: AsyncSession, statement: Select) -> int:
+    """Count the rows of an (unpaginated) select, cached per filter set"""
+    statement = statement.order_by(None)
+    key, tables = _total_cache_key(statement, db.bind.dialect)
+    total, generations = _cached_total(key, tables)
+    if total is None:
+        total = await db.scalar(select(func.count()).select_from(statement.subquery()))
+        _store_total(key, generations, total)
+    return total
+
+def page_statement(statement, keyset: Sequence, limit: int, skip: int, cursor: Optional[str]):
+    """Order a Query or Select by its keyset and restrict it to one page (plus one row)"""
+    statement = statement.add_columns(*keyset).order_by(*keyset)
+    if cursor:
+        after = decode_cursor(cursor, keyset)
+        if len(keyset) == 1:
+            statement = statement.filter(keyset[0] > after[0])
+        else:
+            statement = statement.filter(tuple_(*keyset) > tuple_(*after))
+    elif skip:
+        statement = statement.offset(skip)
+    return statement.limit(limit + 1)
+
+def _page_items(rows: list, limit: int, response: Response) -> list:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1][1:])
+    return [row[0] for row in rows]
+
+def paginate(
+    query: Query,
+    response: Response,
+    keyset: Sequence,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> list:
+    """Return one page of a query ordered by the keyset columns.
+
+    With a cursor the page starts right after the row the cursor was taken
+    from and skip is ignored; without one, skip/limit offsets are used as
+    before. Either way the X-Next-Cursor header is set when more rows follow,
+    and X-Total-Count is set only when include_total is requested.
+    """
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(count_total(query))
+
+    rows = page_statement(query, keyset, limit, skip, cursor).all()
+    return _page_items(rows, limit, response)
+
+async def paginate_async(
+    db: AsyncSession,
+    statement: Select,
+    response: Response,
+    keyset: Sequence,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> list:
+    """paginate() for a select() statement run on an AsyncSession"""
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(await count_total_async(db, statement))
+
+    result = await db.execute(page_statement(statement, keyset, limit, skip, cursor))
+    return _page_items(result.all(), limit, response)
@@ -0,0 +1,263 @@
+import itertools
+import marshal
+import os
+import random
+import sys
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from app.utils.security import authenticate_token
+from app.utils.sql_context import current_sql
+
+# On-demand profiling of single requests. An admin sends "X-Profile: 1", or a
+# sampling rate picks requests at random, and the request runs under a
+# statistical profiler: a thread that snapshots the stacks of the process's
+# busy threads every PROFILE_INTERVAL_MS. Sampling every thread covers sync
+# routes, which run on a threadpool thread and not on the event loop; it also
+# means concurrent requests show up in the same profile, so profile on a
+# quiet worker when it matters. The SQL statements the request ran are kept
+# with their timings, from its app.utils.sql_context RequestSQL. The last PROFILE_BUFFER_SIZE profiles are kept in
+# memory, per worker process, and downloaded from GET /admin/profiles as
+# collapsed stacks (flamegraph.pl, speedscope) or pstats (snakeviz).
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "20"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+# Fraction of all requests profiled without the header; settable at runtime
+# through PUT /admin/profiles/sampling
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Requests profiled at once; more are served unprofiled
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "2"))
+PROFILE_MAX_STATEMENTS = 500
+_MAX_DEPTH = 128
+
+# A thread whose innermost Python frame is in one of these files is waiting
+# (for work, a lock or I/O), not running anything worth a sample
+_IDLE_FILES = tuple(
+    os.path.join(os.path.dirname(threading.__file__), name)
+    for name in ("threading.py", "selectors.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"))
+)
+
+# (filename, first line, function name): the function key pstats uses
+Frame = Tuple[str, int, str]
+
+class Profile:
+    """Stack samples and SQL statements of one request"""
+
+    def __init__(self, profile_id: int, method: str, path: str, trigger: str, user_id: Optional[int]):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.trigger = trigger  # header or sampling
+        self.user_id = user_id
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.interval = PROFILE_INTERVAL
+        # (thread name, root-to-leaf frames) -> samples
+        self.samples: "Counter[Tuple[str, Tuple[Frame, ...]]]" = Counter()
+        self.statements: List[dict] = []
+        self.statements_dropped = 0
+        self._started = perf_counter()
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def add_statement(self, statement: str, seconds: float, started: float) -> None:
+        if len(self.statements) >= PROFILE_MAX_STATEMENTS:
+            self.statements_dropped += 1
+            return
+        self.statements.append({
+            "sql": statement,
+            "seconds": seconds,
+            # Offset from the start of the request
+            "at": started - self._started,
+        })
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "user_id": self.user_id,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "samples": self.sample_count,
+            "statements": len(self.statements) + self.statements_dropped,
+            "sql_seconds": sum(statement["seconds"] for statement in self.statements),
+        }
+
+    def collapsed(self) -> str:
+        """One "thread;outer;...;inner count" line per distinct stack"""
+        lines = []
+        for (thread, stack), count in sorted(self.samples.items()):
+            frames = ";".join(f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack)
+            lines.append(f"{thread};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def pstats(self) -> bytes:
+        """The samples as a marshalled pstats table, loadable by pstats.Stats.
+
+        Each sample counts as one call of every function on the stack, taking
+        one interval; only the innermost function's own time (tt) grows.
+        """
+        table: Dict[Frame, list] = {}
+        for (_, stack), count in self.samples.items():
+            seconds = count * self.interval
+            seen = set()
+            for depth, function in enumerate(stack):
+                entry = table.setdefault(function, [0, 0, 0.0, 0.0, {}])
+                inner = depth == len(stack) - 1
+                if function not in seen:
+                    # Recursive frames only count once towards cumulative time
+                    seen.add(function)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += seconds
+                if inner:
+                    entry[2] += seconds
+                if depth:
+                    caller = stack[depth - 1]
+                    calls, primitive, own, cumulative = entry[4].get(caller, (0, 0, 0.0, 0.0))
+                    entry[4][caller] = (calls + count, primitive + count, own + (seconds if inner else 0.0), cumulative + seconds)
+        return marshal.dumps({function: tuple(entry[:4]) + (entry[4],) for function, entry in table.items()})
+
+class _Sampler(threading.Thread):
+    def __init__(self, profile: Profile):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.profile = profile
+        self._stopped = threading.Event()
+        self._names: Dict[int, str] = {}
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopped.wait(self.profile.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < _MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self.profile.samples[(self._thread_name(ident), tuple(stack))] += 1
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._names.get(ident)
+        if name is None:
+            self._names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._names.setdefault(ident, f"thread-{ident}")
+        return name
+
+class ProfileStore:
+    """The last PROFILE_BUFFER_SIZE profiles (ring buffer) and the sampling rate"""
+
+    def __init__(self, size: int, sample_rate: float):
+        self.sample_rate = sample_rate
+        self._profiles: "deque[Profile]" = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def start(self, method: str, path: str, trigger: str, user_id: Optional[int] = None) -> Optional[Profile]:
+        """A new profile, or None when PROFILE_MAX_CONCURRENT are already running"""
+        with self._lock:
+            if self._running >= PROFILE_MAX_CONCURRENT:
+                return None
+            self._running += 1
+            return Profile(next(self._ids), method, path, trigger, user_id)
+
+    def finish(self, profile: Profile) -> None:
+        with self._lock:
+            self._running -= 1
+            self._profiles.append(profile)
+
+    def list(self) -> List[Profile]:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+store = ProfileStore(PROFILE_BUFFER_SIZE, PROFILE_SAMPLE_RATE)
+
+def _header(scope: dict, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+async def _admin_id(scope: dict) -> Optional[int]:
+    """Id of the admin the request's bearer token belongs to, if it is one"""
+    authorization = (_header(scope, b"authorization") or b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    try:
+        user = await authenticate_token(token)
+    except HTTPException:
+        return None
+    return user.id if user.role == "admin" else None
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it (admins) or that the sampling rate picks"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = None
+        if _header(scope, PROFILE_HEADER) not in (None, b"0"):
+            # Anyone else's header is ignored
+            user_id = await _admin_id(scope)
+            if user_id is not None:
+                profile = store.start(scope["method"], scope["path"], "header", user_id)
+        elif store.sample_rate and random.random() < store.sample_rate:
+            profile = store.start(scope["method"], scope["path"], "sampling")
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", str(profile.id).encode())]
+            await send(message)
+
+        sql = current_sql()
+        if sql is not None:
+            sql.keep_log()
+            logged, dropped = len(sql.log), sql.dropped
+        sampler = _Sampler(profile)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            if sql is not None:
+                for statement, seconds, started in sql.log[logged:]:
+                    profile.add_statement(statement, seconds, started)
+                profile.statements_dropped += sql.dropped - dropped
+            profile.duration = perf_counter() - profile._started
+            route = scope.get("route")
+            profile.route = getattr(route, "path_format", None)
+            store.finish(profile)
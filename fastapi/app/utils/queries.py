@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import desc
+from app.models.feature_request import FeatureRequest
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.utils import search_index
+
+# The filters and orderings behind the list, search, dashboard and stats
+# routes. Each takes the route's own Query or select() (sync and async
+# routers alike) and returns it narrowed, so the routes and the query plan
+# check (app.utils.query_plans) run the same statement shapes.
+
+ACTIVITY_LIMIT = 10
+TOP_UPVOTED_LIMIT = 5
+
+def filter_tickets(
+    query,
+    user_id: Optional[int] = None,
+    assigned_to: Optional[int] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    search: Optional[str] = None
+):
+    """Restrict a Ticket query to the given creator, assignee, status,
+    priority and full-text search"""
+    if user_id is not None:
+        query = query.filter(Ticket.user_id == user_id)
+    if assigned_to:
+        query = query.filter(Ticket.assigned_to == assigned_to)
+    if status:
+        query = query.filter(Ticket.status == status)
+    if priority:
+        query = query.filter(Ticket.priority == priority)
+    if search:
+        query = search_index.filter_tickets(query, search)
+    return query
+
+def filter_feature_requests(
+    query,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    search: Optional[str] = None
+):
+    """Restrict a FeatureRequest query to the given status, priority and
+    full-text search"""
+    if status:
+        query = query.filter(FeatureRequest.status == status)
+    if priority:
+        query = query.filter(FeatureRequest.priority == priority)
+    if search:
+        query = search_index.filter_feature_requests(query, search)
+    return query
+
+def recent_activity(query, owner_column, since: datetime):
+    """The newest ACTIVITY_LIMIT rows created since a date, joined to the
+    user in owner_column (ticket, feature request, comment or attachment)"""
+    model = owner_column.class_
+    return (
+        query.join(User, owner_column == User.id)
+        .filter(model.created_at >= since)
+        .order_by(desc(model.created_at))
+        .limit(ACTIVITY_LIMIT)
+    )
+
+def top_upvoted(query):
+    """The TOP_UPVOTED_LIMIT feature requests with the most upvotes"""
+    return (
+        query.filter(FeatureRequest.upvotes_count > 0)
+        .order_by(FeatureRequest.upvotes_count.desc())
+        .limit(TOP_UPVOTED_LIMIT)
+    )
@@ -0,0 +1,143 @@
+import re
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from app.models.attachment import Attachment
+from app.models.comment import Comment
+from app.models.feature_request import FeatureRequest
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.utils import changes, conditional, counters, jobs, queries, resumable, search_index, upvotes
+from app.utils.pagination import encode_cursor, page_statement
+
+# The query shapes behind the hot endpoints, with placeholder values. Each one
+# must be answered through an index: check_query_plans() runs EXPLAIN QUERY
+# PLAN on them and reports every step that reads a whole table or sorts.
+# Every shape is built by the same function (or relationship) the route or
+# job uses, so a change to a route's query is checked as it is; when adding a
+# filtered or joined query, build it in a shared function and add it here
+# with its index.
+_SINCE = datetime(2000, 1, 1)
+_LIMIT = 10
+
+def _page(statement, *keyset):
+    """The first page of a list query, as paginate() runs it"""
+    return page_statement(statement, keyset, _LIMIT, 0, None)
+
+def _next_page(statement, *keyset):
+    """A later page of a list query, after a cursor"""
+    return page_statement(statement, keyset, _LIMIT, 0, encode_cursor([1] * len(keyset)))
+
+def _ranked_page(searched, **filters):
+    statement, rank = searched
+    model = statement.column_descriptions[0]["entity"]
+    if model is Ticket:
+        statement = queries.filter_tickets(statement, **filters)
+    else:
+        statement = queries.filter_feature_requests(statement, **filters)
+    return _page(statement, rank, model.id)
+
+def _load(relationship, *parent_ids):
+    """The statement the ORM loads a relationship with: lazily for one
+    parent, or with selectinload for several"""
+    prop = relationship.property
+    ((_, remote),) = prop.local_remote_pairs
+    criterion = remote == parent_ids[0] if len(parent_ids) == 1 else remote.in_(parent_ids)
+    return select(prop.mapper.class_).where(criterion)
+
+HOT_QUERIES = {
+    "GET /tickets/me": lambda: _page(queries.filter_tickets(select(Ticket), user_id=1), Ticket.id),
+    "GET /tickets/me?status=": lambda: (
+        _page(queries.filter_tickets(select(Ticket), user_id=1, status="new"), Ticket.id)
+    ),
+    "GET /tickets/assigned": lambda: _page(queries.filter_tickets(select(Ticket), assigned_to=1), Ticket.id),
+    "GET /tickets/assigned?status=": lambda: (
+        _page(queries.filter_tickets(select(Ticket), assigned_to=1, status="new"), Ticket.id)
+    ),
+    # The first unfiltered page walks the primary key and stops at the limit
+    "GET /tickets next page": lambda: _next_page(queries.filter_tickets(select(Ticket)), Ticket.id),
+    "GET /tickets?status=": lambda: _page(queries.filter_tickets(select(Ticket), status="new"), Ticket.id),
+    "GET /tickets?status=&priority=": lambda: (
+        _page(queries.filter_tickets(select(Ticket), status="new", priority="low"), Ticket.id)
+    ),
+    "GET /tickets?priority=": lambda: _page(queries.filter_tickets(select(Ticket), priority="low"), Ticket.id),
+    "GET /tickets?search=": lambda: _page(queries.filter_tickets(select(Ticket), search="login"), Ticket.id),
+    "GET /search/tickets": lambda: _ranked_page(search_index.search_tickets(select(Ticket), "login"), user_id=1),
+    "GET /tickets/{id} comments": lambda: _load(Ticket.comments, 1, 2),
+    "GET /tickets/{id} version": lambda: conditional.ticket_version_statement(1),
+    "GET /feature-requests/{id} version": lambda: conditional.feature_request_version_statement(1),
+    "GET /feature-requests next page": lambda: (
+        _next_page(queries.filter_feature_requests(select(FeatureRequest)), FeatureRequest.id)
+    ),
+    "GET /feature-requests?status=": lambda: (
+        _page(queries.filter_feature_requests(select(FeatureRequest), status="Proposed"), FeatureRequest.id)
+    ),
+    "GET /feature-requests?priority=": lambda: (
+        _page(queries.filter_feature_requests(select(FeatureRequest), priority="High"), FeatureRequest.id)
+    ),
+    "GET /feature-requests comments": lambda: _load(FeatureRequest.comments, 1, 2),
+    "GET /search/feature-requests": lambda: (
+        _ranked_page(search_index.search_feature_requests(select(FeatureRequest), "dark"))
+    ),
+    "GET /stats/feature-requests top upvoted": lambda: (
+        queries.top_upvoted(select(FeatureRequest.title, FeatureRequest.upvotes_count))
+    ),
+    "GET /dashboard/summary partial day tickets": lambda: counters.partial_day_statement("tickets", _SINCE, _SINCE),
+    "GET /dashboard/summary partial day feature requests": lambda: (
+        counters.partial_day_statement("feature_requests", _SINCE, _SINCE)
+    ),
+    "GET /dashboard/summary partial day comments": lambda: counters.partial_day_statement("comments", _SINCE, _SINCE),
+    "GET /dashboard/summary partial day attachments": lambda: (
+        counters.partial_day_statement("attachments", _SINCE, _SINCE)
+    ),
+    "GET /dashboard/activity tickets": lambda: queries.recent_activity(select(Ticket), Ticket.user_id, _SINCE),
+    "GET /dashboard/activity feature requests": lambda: (
+        queries.recent_activity(select(FeatureRequest), FeatureRequest.requester_id, _SINCE)
+    ),
+    "GET /dashboard/activity comments": lambda: queries.recent_activity(select(Comment), Comment.user_id, _SINCE),
+    "GET /dashboard/activity attachments": lambda: (
+        queries.recent_activity(select(Attachment), Attachment.user_id, _SINCE)
+    ),
+    "DELETE /tickets/{id} attachments": lambda: _load(Ticket.attachments, 1),
+    "DELETE /feature-requests/{id} attachments": lambda: _load(FeatureRequest.attachments, 1),
+    "DELETE /users/{id} upvotes": lambda: upvotes.upvoted_by(1),
+    "DELETE /users/{id} comments": lambda: _load(User.comments, 1),
+    "DELETE /users/{id} feature requests": lambda: _load(User.feature_requests, 1),
+    "job worker due jobs": lambda: jobs.due_jobs_statement(_SINCE),
+    "GET /admin/jobs recent": lambda: jobs.finished_jobs_statement(_SINCE),
+    "GET /changes": lambda: changes.changes_statement(1, 100),
+    "change log pruning": lambda: changes.prune_statement(_SINCE),
+    "upload session collection": lambda: resumable.abandoned_sessions_statement(_SINCE),
+}
+
+# "SCAN <table>" without an index is a full table scan; scans of an index, of
+# the rowid range or of an FTS table's own index are fine
+_FULL_SCAN = re.compile(r"^SCAN (?!.*\b(USING|VIRTUAL TABLE)\b)")
+
+# Sorting every matching row; the other hot queries read their index in order
+_SORT = "USE TEMP B-TREE FOR ORDER BY"
+# Searches order their matches by bm25() rank, which no index holds
+SORTED_QUERIES = {"GET /search/tickets", "GET /search/feature-requests"}
+
+def is_full_scan(step: str) -> bool:
+    """Whether an EXPLAIN QUERY PLAN step reads a whole table"""
+    return bool(_FULL_SCAN.match(step))
+
+def explain(connection: Connection, statement) -> List[str]:
+    """EXPLAIN QUERY PLAN details for a statement (SQLite)"""
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+
+def check_query_plans(connection: Connection) -> Dict[str, List[str]]:
+    """Full table scans, and sorts outside SORTED_QUERIES, in the plans of
+    HOT_QUERIES, by query name"""
+    scans = {}
+    for name, build in HOT_QUERIES.items():
+        steps = [
+            step for step in explain(connection, build())
+            if is_full_scan(step) or (step.startswith(_SORT) and name not in SORTED_QUERIES)
+        ]
+        if steps:
+            scans[name] = steps
+    return scans
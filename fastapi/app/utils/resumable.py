@@ -0,0 +1,240 @@
+import base64
+import binascii
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.upload_session import UploadChunk, UploadSession
+from app.utils import jobs
+from app.utils.uploads import UPLOAD_TMP_DIR, UploadTooLarge, _fsync_directory
+
+# Resumable uploads (tus-style): a session preallocates one sparse data file
+# of the declared length, and every chunk is written straight to its offset in
+# that file, so nothing is copied or concatenated when the upload completes.
+# Chunks are reserved in upload_chunks before their bytes are written (which
+# rejects overlapping writes from parallel requests) and marked done with
+# their SHA-256 once the data is fsynced.
+#
+# The attachment's SHA-256 is computed while the chunks arrive: a chunk that
+# starts where the hashed prefix ends extends it, and on completion only the
+# bytes past that prefix (chunks that arrived out of order, or in another
+# process) are read back from disk.
+
+RESUMABLE_MAX_SIZE = int(os.getenv("RESUMABLE_UPLOAD_MAX_SIZE", str(2 * 1024 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+
+COLLECT_TASK = "upload_sessions.collect"
+
+_SUFFIX = ".upload"
+_CHUNK_SIZE = 1024 * 1024
+
+class ChecksumMismatch(Exception):
+    pass
+
+def data_path(session_id: str) -> str:
+    return os.path.join(UPLOAD_TMP_DIR, session_id + _SUFFIX)
+
+def create_data_file(session_id: str, length: int) -> str:
+    """Create the (sparse) data file of a new session"""
+    path = data_path(session_id)
+    with open(path, "xb") as file:
+        file.truncate(length)
+    return path
+
+def remove_data_file(session_id: str) -> None:
+    forget_prefix(session_id)
+    try:
+        os.remove(data_path(session_id))
+    except FileNotFoundError:
+        pass
+
+def parse_checksum(header: str) -> str:
+    """Hex digest from an 'Upload-Checksum: sha256 <base64>' header.
+
+    Raises ValueError for other algorithms or a malformed digest.
+    """
+    algorithm, _, value = header.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise ValueError(f"Unsupported checksum algorithm '{algorithm}'")
+    try:
+        digest = base64.b64decode(value.strip(), validate=True)
+    except binascii.Error:
+        raise ValueError("Malformed checksum")
+    if len(digest) != hashlib.sha256().digest_size:
+        raise ValueError("Malformed checksum")
+    return digest.hex()
+
+# Hashed prefix of each session in this process: the running hash, the offset
+# it has reached and the (offset, sha256) of the chunks fed into it
+_prefixes: Dict[str, tuple] = {}
+_prefixes_lock = threading.Lock()
+
+def forget_prefix(session_id: str) -> None:
+    with _prefixes_lock:
+        _prefixes.pop(session_id, None)
+
+def _prefix_hash_at(session_id: str, offset: int):
+    """A copy of the session's running hash if it has reached exactly offset"""
+    with _prefixes_lock:
+        if offset == 0:
+            return hashlib.sha256()
+        prefix = _prefixes.get(session_id)
+        if prefix and prefix[1] == offset:
+            return prefix[0].copy()
+    return None
+
+def _extend_prefix(session_id: str, offset: int, digest, end: int, sha256: str) -> None:
+    with _prefixes_lock:
+        prefix = _prefixes.get(session_id)
+        if offset == 0:
+            _prefixes[session_id] = (digest, end, [(offset, sha256)])
+        elif prefix and prefix[1] == offset:
+            _prefixes[session_id] = (digest, end, prefix[2] + [(offset, sha256)])
+
+class ChunkWriter:
+    """Writes one chunk at its offset in a session's data file, hashing it.
+
+    All methods block on disk I/O; async callers run them on the threadpool.
+    Raises FileNotFoundError if the session's data file is gone.
+    """
+
+    def __init__(self, session_id: str, offset: int, length: int):
+        self.session_id = session_id
+        self.offset = offset
+        self.length = length
+        self.size = 0
+        self._file = open(data_path(session_id), "r+b")
+        self._file.seek(offset)
+        self._hash = hashlib.sha256()
+        self._prefix = _prefix_hash_at(session_id, offset)
+
+    def write(self, data: bytes) -> None:
+        """Write the next part of the chunk, or raise UploadTooLarge past its length"""
+        self.size += len(data)
+        if self.size > self.length:
+            raise UploadTooLarge(self.size)
+        self._hash.update(data)
+        if self._prefix is not None:
+            self._prefix.update(data)
+        self._file.write(data)
+
+    def finish(self, expected_sha256: Optional[str] = None) -> str:
+        """fsync the chunk and return its SHA-256.
+
+        Raises ValueError if fewer bytes than announced were written, and
+        ChecksumMismatch if they don't hash to expected_sha256.
+        """
+        try:
+            if self.size != self.length:
+                raise ValueError(f"Received {self.size} of {self.length} bytes")
+            sha256 = self._hash.hexdigest()
+            if expected_sha256 is not None and sha256 != expected_sha256:
+                raise ChecksumMismatch(sha256)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+        if self._prefix is not None:
+            _extend_prefix(self.session_id, self.offset, self._prefix, self.offset + self.length, sha256)
+        return sha256
+
+    def close(self) -> None:
+        self._file.close()
+
+def received_ranges(chunks: List[UploadChunk]) -> List[Tuple[int, int]]:
+    """Merged [start, end) ranges covered by the finished chunks"""
+    ranges = []
+    for chunk in sorted((c for c in chunks if c.sha256), key=lambda c: c.offset):
+        end = chunk.offset + chunk.length
+        if ranges and ranges[-1][1] == chunk.offset:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((chunk.offset, end))
+    return ranges
+
+def current_offset(chunks: List[UploadChunk]) -> int:
+    """How many bytes from the start of the file have been received"""
+    ranges = received_ranges(chunks)
+    return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+class AssembledUpload:
+    """A completed session's data file, ready for app.utils.blobs.store_upload"""
+
+    def __init__(self, session_id: str, size: int, sha256: str):
+        self.temp_path = data_path(session_id)
+        self.size = size
+        self.sha256 = sha256
+
+    def commit(self, path: str) -> str:
+        """Atomically move the file to path (its chunks are already fsynced)"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        os.replace(self.temp_path, path)
+        _fsync_directory(directory)
+        return path
+
+    def discard(self) -> None:
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+def assemble(session: UploadSession, chunks: List[UploadChunk]) -> AssembledUpload:
+    """Hash a fully received session's data file.
+
+    Only the bytes past the prefix hashed while the chunks arrived are read
+    back. Raises FileNotFoundError if the data file is gone.
+    """
+    recorded = {chunk.offset: chunk.sha256 for chunk in chunks}
+    with _prefixes_lock:
+        prefix = _prefixes.get(session.id)
+    digest, offset = hashlib.sha256(), 0
+    # A chunk rewritten since it was hashed invalidates the running hash
+    if prefix and all(recorded.get(start) == sha256 for start, sha256 in prefix[2]):
+        digest, offset = prefix[0].copy(), prefix[1]
+    with open(data_path(session.id), "rb") as file:
+        file.seek(offset)
+        for data in iter(lambda: file.read(_CHUNK_SIZE), b""):
+            digest.update(data)
+    return AssembledUpload(session.id, session.length, digest.hexdigest())
+
+def abandoned_sessions_statement(cutoff: datetime):
+    """Ids of the upload sessions last touched before cutoff"""
+    return select(UploadSession.id).where(UploadSession.updated_at < cutoff)
+
+def collect_abandoned(connection: Connection) -> int:
+    """Delete sessions idle for longer than UPLOAD_SESSION_TTL and their files.
+
+    Also removes data files without a session and temp files left behind by
+    interrupted single-request uploads. Returns the number of sessions removed.
+    """
+    cutoff = datetime.utcnow() - UPLOAD_SESSION_TTL
+    expired = connection.execute(abandoned_sessions_statement(cutoff)).scalars().all()
+    if expired:
+        connection.execute(delete(UploadChunk).where(UploadChunk.session_id.in_(expired)))
+        connection.execute(delete(UploadSession).where(UploadSession.id.in_(expired)))
+    for session_id in expired:
+        remove_data_file(session_id)
+
+    live = set(connection.execute(select(UploadSession.id)).scalars())
+    stale = time.time() - UPLOAD_SESSION_TTL.total_seconds()
+    for entry in os.scandir(UPLOAD_TMP_DIR):
+        name, suffix = os.path.splitext(entry.name)
+        if suffix == _SUFFIX and name in live:
+            continue
+        if suffix not in (_SUFFIX, ".part") or entry.stat().st_mtime >= stale:
+            continue
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+    return len(expired)
+
+@jobs.task(COLLECT_TASK)
+def _collect_abandoned_job(db: Session) -> None:
+    collect_abandoned(db.connection())
@@ -0,0 +1,179 @@
+import re
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import Float, event, false, func, literal, literal_column, or_, select, table, column, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.orm import Query
+from app.database import Base, engine
+from app.models.ticket import Ticket
+from app.models.feature_request import FeatureRequest
+from app.models.user import User
+
+# Full-text search is backed by SQLite FTS5 tables that mirror the searchable
+# columns of tickets and feature requests (title, description and the
+# author's username). The rowid of each FTS row is the id of the source row,
+# and triggers keep both sides in sync on insert, update and delete. The
+# list endpoints' search= filter matches title and description only, as it
+# always has; the /search endpoints match the author's username too.
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# bm25() column weights: title, description, username
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+# FTS5 column filter for matching without the author's username
+TEXT_COLUMNS = "{title description}"
+
+SEARCH_INDEXES = {
+    "tickets_fts": {"source": "tickets", "owner": "user_id"},
+    "feature_requests_fts": {"source": "feature_requests", "owner": "requester_id"},
+}
+
+def _index_ddl(name: str, source: str, owner: str) -> list:
+    """Build the CREATE statements for one FTS table and its sync triggers"""
+    row_values = (
+        f"new.id, new.title, new.description, "
+        f"(SELECT username FROM users WHERE users.id = new.{owner})"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+        f"title, description, username, tokenize = 'unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {name}(rowid, title, description, username) VALUES ({row_values}); "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {name} WHERE rowid = old.id; "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF id, title, description, {owner} "
+        f"ON {source} BEGIN "
+        f"DELETE FROM {name} WHERE rowid = old.id; "
+        f"INSERT INTO {name}(rowid, title, description, username) VALUES ({row_values}); "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_user_au AFTER UPDATE OF username ON users BEGIN "
+        f"UPDATE {name} SET username = new.username "
+        f"WHERE rowid IN (SELECT id FROM {source} WHERE {owner} = new.id); "
+        f"END",
+    ]
+
+def create_search_index(connection: Connection) -> None:
+    """Create the FTS tables and triggers, backfilling any table that is new"""
+    for name, spec in SEARCH_INDEXES.items():
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": name}
+        ).first()
+        for statement in _index_ddl(name, **spec):
+            connection.execute(text(statement))
+        if not exists:
+            _backfill(connection, name, **spec)
+
+def drop_search_triggers(connection: Connection, name: str) -> None:
+    """Drop one FTS table's sync triggers, leaving the table searchable"""
+    for suffix in ("ai", "ad", "au", "user_au"):
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}_{suffix}"))
+
+def drop_search_index(connection: Connection) -> None:
+    """Drop the FTS tables and their sync triggers"""
+    for name in SEARCH_INDEXES:
+        drop_search_triggers(connection, name)
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+def _backfill(connection: Connection, name: str, source: str, owner: str) -> None:
+    connection.execute(text(
+        f"INSERT INTO {name}(rowid, title, description, username) "
+        f"SELECT {source}.id, {source}.title, {source}.description, users.username "
+        f"FROM {source} LEFT JOIN users ON users.id = {source}.{owner}"
+    ))
+
+def rebuild_search_index(connection: Connection, names: Optional[Iterable[str]] = None) -> dict:
+    """Repopulate the FTS tables (all by default) from their source tables,
+    recreating missing triggers, and return row counts"""
+    counts = {}
+    for name in names or SEARCH_INDEXES:
+        spec = SEARCH_INDEXES[name]
+        for statement in _index_ddl(name, **spec):
+            connection.execute(text(statement))
+        connection.execute(text(f"DELETE FROM {name}"))
+        _backfill(connection, name, **spec)
+        connection.execute(text(f"INSERT INTO {name}({name}) VALUES ('optimize')"))
+        counts[name] = connection.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+    return counts
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        create_search_index(connection)
+
+@event.listens_for(Base.metadata, "before_drop")
+def _before_drop(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        drop_search_index(connection)
+
+def build_match_query(search: str) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression of quoted prefix terms.
+
+    Each word must match (implicit AND), and each word also matches longer
+    words it is a prefix of. Returns None when the text contains no words.
+    """
+    tokens = TOKEN_PATTERN.findall(search)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def _match(query: Query, model, name: str, owner_column, search: str, ranked: bool, authors: bool):
+    # query may also be a select() headed for an AsyncSession, which has no
+    # session to ask, so go by the configured engine
+    if engine.dialect.name != "sqlite":
+        # No FTS5 outside SQLite; keep the old substring semantics
+        conditions = [model.title.ilike(f"%{search}%"), model.description.ilike(f"%{search}%")]
+        if authors:
+            query = query.join(User, owner_column == User.id)
+            conditions.append(User.username.ilike(f"%{search}%"))
+        return query.filter(or_(*conditions)), literal(0)
+
+    match = build_match_query(search)
+    if match is None:
+        return query.filter(false()), literal(0)
+    if not authors:
+        match = f"{TEXT_COLUMNS} : ({match})"
+
+    fts = table(name, column("rowid"))
+    if not ranked:
+        matching_ids = select(fts.c.rowid).where(literal_column(name).op("MATCH")(match))
+        return query.filter(model.id.in_(matching_ids)), None
+
+    hits = select(
+        fts.c.rowid.label("id"),
+        func.bm25(literal_column(name), *BM25_WEIGHTS, type_=Float).label("rank")
+    ).where(literal_column(name).op("MATCH")(match)).subquery()
+    return query.join(hits, hits.c.id == model.id), hits.c.rank
+
+def filter_tickets(query: Query, search: str, authors: bool = False) -> Query:
+    """Restrict a Ticket query to full-text matches on title and description
+    (and the author's username with authors=True)"""
+    return _match(query, Ticket, "tickets_fts", Ticket.user_id, search, ranked=False, authors=authors)[0]
+
+def filter_feature_requests(query: Query, search: str, authors: bool = False) -> Query:
+    """Restrict a FeatureRequest query to full-text matches on title and
+    description (and the author's username with authors=True)"""
+    return _match(
+        query, FeatureRequest, "feature_requests_fts", FeatureRequest.requester_id, search,
+        ranked=False, authors=authors
+    )[0]
+
+def search_tickets(query: Query, search: str) -> Tuple[Query, ColumnElement]:
+    """Restrict a Ticket query to full-text matches, the author's username
+    included, and return it with its rank.
+
+    bm25() is lower for better matches, so ordering by rank ascending puts
+    the best matches first.
+    """
+    return _match(query, Ticket, "tickets_fts", Ticket.user_id, search, ranked=True, authors=True)
+
+def search_feature_requests(query: Query, search: str) -> Tuple[Query, ColumnElement]:
+    """Restrict a FeatureRequest query to full-text matches, the author's
+    username included, and return it with its rank"""
+    return _match(
+        query, FeatureRequest, "feature_requests_fts", FeatureRequest.requester_id, search,
+        ranked=True, authors=True
+    )
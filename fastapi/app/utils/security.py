@@ -1,15 +1,37 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from starlette.concurrency import run_in_threadpool
+from app.database import ReadSessionLocal, get_async_read_db, get_read_db
 from app.models.user import User
 from passlib.context import CryptContext
-from typing import Optional
+from typing import Optional, Tuple
+from pydantic import BaseModel
+from app.utils.cache import TTLCache
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Raising BCRYPT_ROUNDS takes effect without downtime:
+# existing hashes are upgraded transparently the next time their user logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt holds the CPU for tens of milliseconds per call, so async routes hand
+# it to a small dedicated pool instead of tying up the shared request
+# threadpool (the bcrypt C extension releases the GIL while it works). Calls
+# beyond the pending limit are rejected with 503 rather than queued forever.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_pending = 0
+_hash_pending_lock = threading.Lock()
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
@@ -27,6 +49,42 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def _run_password_job(func, *args):
+    global _hash_pending
+    with _hash_pending_lock:
+        if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        with _hash_pending_lock:
+            _hash_pending -= 1
+
+async def hash_password(password: str) -> str:
+    """Generate password hash on the password hashing pool"""
+    return await _run_password_job(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the password hashing pool.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash uses
+    outdated settings (e.g. fewer bcrypt rounds) and should be replaced.
+    """
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def password_hash_stats() -> dict:
+    """Pending jobs and capacity of the password hashing pool"""
+    return {
+        "pending": _hash_pending,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "workers": PASSWORD_HASH_WORKERS,
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a new JWT access token"""
     to_encode = data.copy()
@@ -37,29 +95,111 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get the current authenticated user"""
-    credentials_exception = HTTPException(
+class AuthenticatedUser(BaseModel):
+    """Snapshot of the authenticated user's identity, safe to share between requests"""
+    id: int
+    username: str
+    email: str
+    role: str
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+# Decoded tokens (token -> email) and resolved users (email -> identity) are
+# cached so most authenticated requests skip both the JWT signature check and
+# the users lookup. Each process has its own caches: update_user and
+# delete_user invalidate them locally, and the TTL bounds how long another
+# worker may keep serving a stale role or a deleted user.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+token_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES)
+user_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES)
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Drop a user's cached identity after it was updated or deleted"""
+    user_cache.discard_where(lambda user: user.id == user_id)
+
+def auth_cache_stats() -> dict:
+    """Hit/miss counters and sizes of the authentication caches"""
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(User).filter(User.email == email).first()
+def _token_email(token: str) -> str:
+    """Decode the token's subject (email), through the token cache"""
+    email = token_cache.get(token)
+    if email is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise _credentials_exception()
+        except JWTError:
+            raise _credentials_exception()
+        # Never keep a token cached past its own expiry
+        ttl = AUTH_CACHE_TTL_SECONDS
+        if payload.get("exp"):
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            token_cache.set(token, email, ttl)
+    return email
+
+def _cache_user(email: str, db_user: Optional[User]) -> AuthenticatedUser:
+    if db_user is None:
+        raise _credentials_exception()
+    user = AuthenticatedUser.model_validate(db_user)
+    user_cache.set(email, user, AUTH_CACHE_TTL_SECONDS)
+    return user
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> AuthenticatedUser:
+    """Get the current authenticated user"""
+    email = _token_email(token)
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = _cache_user(email, db.query(User).filter(User.email == email).first())
+    return user
 
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_read_db)
+) -> AuthenticatedUser:
+    """Get the current authenticated user (async routes)"""
+    email = _token_email(token)
+    user = user_cache.get(email)
+    if user is None:
+        result = await db.execute(select(User).where(User.email == email))
+        user = _cache_user(email, result.scalars().first())
+    return user
+
+def _load_user(email: str) -> AuthenticatedUser:
+    with ReadSessionLocal() as db:
+        return _cache_user(email, db.query(User).filter(User.email == email).first())
+
+async def authenticate_token(token: Optional[str]) -> AuthenticatedUser:
+    """Resolve a bearer token outside of the route dependencies, for
+    long-lived connections that must not hold a database session"""
+    if not token:
+        raise _credentials_exception()
+    email = _token_email(token)
+    user = user_cache.get(email)
+    if user is None:
+        user = await run_in_threadpool(_load_user, email)
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def token_expires_at(token: str) -> Optional[float]:
+    """Expiry (epoch seconds) of a token that has already been validated"""
+    return jwt.get_unverified_claims(token).get("exp")
+
+def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
     """Get the current active user"""
     if not current_user:
         raise HTTPException(status_code=400, detail="Inactive user")
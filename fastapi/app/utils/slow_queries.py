@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import List, Mapping, Optional
+from app.utils.query_plans import is_full_scan
+from app.utils.sql_context import RequestSQL, statement_hook
+
+# A log of the SQL statements slower than SLOW_QUERY_THRESHOLD_MS, grouped by
+# fingerprint: the statement with its literals, placeholders and IN/VALUES
+# lists collapsed, so one query shape is one entry whatever its parameters.
+# Each entry counts the runs and their total and max time, the routes that
+# issued them (from the app.utils.sql_context RequestSQL the statement ran
+# in) and the types of the bound parameters (never their values). The
+# first time a shape is slow, and whenever it sets a new max, its plan is
+# captured with EXPLAIN QUERY PLAN (EXPLAIN on PostgreSQL) on the same
+# connection and parameters. Kept in memory per worker process, for
+# GET /admin/slow-queries.
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG", "1") == "1"
+SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100")) / 1000
+# Shapes kept; the least recently slow one makes room for a new one
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "200"))
+_MAX_ROUTES = 10
+_MAX_EXAMPLE_LENGTH = 4000
+
+BACKGROUND = "background"
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Driver placeholders: ?, :name, %(name)s, %s, $1
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_LIST = re.compile(r"\(\?(?:, \?)*\)")
+_REPEATED_LISTS = re.compile(r"\(\?\)(?:, \(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+_EXPLAIN = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+def normalize(statement: str) -> str:
+    """The statement with every literal and placeholder as ? and every
+    (?, ?, ...) list, and run of them, as a single (?)"""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _LIST.sub("(?)", normalized)
+    return _REPEATED_LISTS.sub("(?)", normalized)
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+def _type_name(value) -> str:
+    return "None" if value is None else type(value).__name__
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Types of the bound parameters, e.g. "(int, str)" or "3 x {id: int}" """
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {parameter_shape(rows[0], False)}" if rows else "0 x ()"
+    if isinstance(parameters, Mapping):
+        return "{" + ", ".join(f"{name}: {_type_name(value)}" for name, value in parameters.items()) + "}"
+    return "(" + ", ".join(_type_name(value) for value in parameters or ()) + ")"
+
+class SlowQuery:
+    """Aggregate of one statement fingerprint"""
+
+    def __init__(self, key: str, normalized: str, statement: str):
+        self.fingerprint = key
+        self.sql = normalized
+        self.example = statement[:_MAX_EXAMPLE_LENGTH]
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.first_seen = datetime.utcnow()
+        self.last_seen = self.first_seen
+        self.routes: "Counter[str]" = Counter()
+        self.parameter_shapes: "Counter[str]" = Counter()
+        # Captured for the slowest run
+        self.plan: Optional[List[str]] = None
+        self.plan_error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "sql": self.sql,
+            "example": self.example,
+            "count": self.count,
+            "total_seconds": self.total_seconds,
+            "max_seconds": self.max_seconds,
+            "mean_seconds": self.total_seconds / self.count if self.count else 0.0,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "routes": dict(self.routes.most_common()),
+            "parameter_shapes": dict(self.parameter_shapes.most_common()),
+            "plan": self.plan,
+            "full_scan": any(is_full_scan(step) for step in self.plan or ()),
+            "plan_error": self.plan_error,
+        }
+
+class SlowQueryLog:
+    """Thread-safe, bounded map of fingerprint to SlowQuery"""
+
+    def __init__(self, max_fingerprints: int):
+        self.max_fingerprints = max_fingerprints
+        self._entries: "OrderedDict[str, SlowQuery]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, seconds: float, route: str, shape: str) -> tuple:
+        """Count a slow run; returns (entry, whether its plan should be captured)"""
+        normalized = normalize(statement)
+        key = fingerprint(normalized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = SlowQuery(key, normalized, statement)
+                while len(self._entries) > self.max_fingerprints:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(key)
+            slowest = seconds > entry.max_seconds
+            entry.count += 1
+            entry.total_seconds += seconds
+            entry.max_seconds = max(entry.max_seconds, seconds)
+            entry.last_seen = datetime.utcnow()
+            if route in entry.routes or len(entry.routes) < _MAX_ROUTES:
+                entry.routes[route] += 1
+            if shape in entry.parameter_shapes or len(entry.parameter_shapes) < _MAX_ROUTES:
+                entry.parameter_shapes[shape] += 1
+        return entry, slowest
+
+    def entries(self, sort: str = "total_seconds", limit: int = 50) -> List[dict]:
+        with self._lock:
+            entries = [entry.as_dict() for entry in self._entries.values()]
+        return sorted(entries, key=lambda entry: entry[sort], reverse=True)[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MAX_FINGERPRINTS)
+
+def _route(sql: Optional[RequestSQL]) -> str:
+    if sql is None or sql.scope is None:
+        return BACKGROUND
+    route = getattr(sql.scope.get("route"), "path_format", None) or "<unmatched>"
+    return f"{sql.scope['method']} {route}"
+
+def _explain(conn, statement: str, parameters, executemany: bool) -> List[str]:
+    prefix = _EXPLAIN[conn.dialect.name]
+    if executemany:
+        parameters = parameters[0]
+    if conn.dialect.name == "postgresql":
+        # A failing EXPLAIN must not abort the request's transaction
+        with conn.begin_nested():
+            return [row[0] for row in conn.exec_driver_sql(prefix + statement, parameters)]
+    return [row[-1] for row in conn.exec_driver_sql(prefix + statement, parameters)]
+
+def _record_statement(conn, statement, parameters, executemany, seconds, sql):
+    if seconds < SLOW_QUERY_THRESHOLD or statement.startswith("EXPLAIN"):
+        return
+    entry, slowest = slow_query_log.add(
+        statement, seconds, _route(sql), parameter_shape(parameters, executemany)
+    )
+    if not slowest:
+        return
+    logger.warning("Slow query (%.0f ms, %s): %s", seconds * 1000, entry.fingerprint, entry.sql)
+    if conn.dialect.name in _EXPLAIN and entry.sql.lstrip("( ").upper().startswith(_EXPLAINABLE):
+        try:
+            entry.plan, entry.plan_error = _explain(conn, statement, parameters, executemany), None
+        except Exception as error:
+            entry.plan_error = str(error)
+
+if SLOW_QUERY_LOG_ENABLED:
+    statement_hook(_record_statement)
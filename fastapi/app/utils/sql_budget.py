@@ -0,0 +1,47 @@
+import os
+from app.utils.sql_context import current_sql
+
+# Each hot endpoint declares the most SQL statements one request may issue.
+# With SQL_STATEMENT_BUDGETS=1 (meant for test runs) a middleware counts the
+# statements each request executes, from its app.utils.sql_context
+# RequestSQL, and fails the request when an endpoint goes over its budget,
+# which is how a new lazy load (N+1) gets caught.
+
+SQL_STATEMENT_BUDGETS_ENABLED = os.getenv("SQL_STATEMENT_BUDGETS", "0") == "1"
+
+class StatementBudgetExceeded(AssertionError):
+    pass
+
+def statement_budget(max_statements: int):
+    """Declare the most SQL statements a route may run per request.
+
+    Apply it below the router decorator so the registered endpoint carries it.
+    """
+    def decorator(endpoint):
+        endpoint.sql_statement_budget = max_statements
+        return endpoint
+    return decorator
+
+class StatementBudgetMiddleware:
+    """Fail any request that runs more statements than its route's budget"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sql = current_sql()
+        sql.keep_log()
+        started, logged = sql.statements, len(sql.log)
+        await self.app(scope, receive, send)
+
+        count = sql.statements - started
+        budget = getattr(scope.get("endpoint"), "sql_statement_budget", None)
+        if budget is not None and count > budget:
+            raise StatementBudgetExceeded(
+                f"{scope['method']} {scope['path']} ran {count} SQL statements, "
+                f"budget is {budget}:\n" + "\n".join(statement for statement, _, _ in sql.log[logged:])
+            )
@@ -0,0 +1,86 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The SQL each request runs, recorded by one pair of cursor hooks into the
+# request's RequestSQL (opened by SQLContextMiddleware). Metrics, profiling,
+# statement budgets and the slow query log read it rather than hooking the
+# engine; statement hooks see every statement, in a request or not.
+
+# Statements kept per request when a reader asks for them with keep_log()
+MAX_LOGGED_STATEMENTS = 500
+
+# (statement, seconds, started): started is a perf_counter() value
+LoggedStatement = Tuple[str, float, float]
+
+class RequestSQL:
+    """Count, time and (on request) text of the statements a request runs"""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.statements = 0
+        self.seconds = 0.0
+        self.log: Optional[List[LoggedStatement]] = None
+        self.dropped = 0
+
+    def keep_log(self) -> None:
+        """Keep the text and timing of the statements run from now on"""
+        if self.log is None:
+            self.log = []
+
+    def add(self, statement: str, seconds: float, started: float) -> None:
+        self.statements += 1
+        self.seconds += seconds
+        if self.log is not None:
+            if len(self.log) < MAX_LOGGED_STATEMENTS:
+                self.log.append((statement, seconds, started))
+            else:
+                self.dropped += 1
+
+_current_sql: ContextVar[Optional[RequestSQL]] = ContextVar("request_sql", default=None)
+
+def current_sql() -> Optional[RequestSQL]:
+    """The RequestSQL of the request being served, or None outside of one"""
+    return _current_sql.get()
+
+# function(conn, statement, parameters, executemany, seconds, request_sql)
+_statement_hooks: List[Callable] = []
+
+def statement_hook(function: Callable) -> Callable:
+    """Register a function called after every statement, with its timing and
+    the RequestSQL it ran in (None for background work)"""
+    _statement_hooks.append(function)
+    return function
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    context._sql_started = perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    started = context._sql_started
+    seconds = perf_counter() - started
+    sql = _current_sql.get()
+    if sql is not None:
+        sql.add(statement, seconds, started)
+    for hook in _statement_hooks:
+        hook(conn, statement, parameters, executemany, seconds, sql)
+
+class SQLContextMiddleware:
+    """Give every HTTP request its RequestSQL (add it last, so it runs first)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_sql.set(RequestSQL(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_sql.reset(token)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app.models.comment import Comment
+from app.models.ticket import Ticket
+
+# Change notifications for GET /api/stream and WS /api/stream/ws, published
+# when the write commits. The hub is per process.
+
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "256"))
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "10000"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+class Subscription:
+    """One connection's queue of encoded events"""
+
+    def __init__(self, user_id: int, is_admin: bool, buffer_size: int = STREAM_BUFFER_SIZE):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.buffer_size = buffer_size
+        self.closed: Optional[str] = None  # Why the hub ended the subscription
+        self._events = deque()
+        # A bare future rather than asyncio.Event + wait_for, which would
+        # cost every idle connection an extra task per wait
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def push(self, data: str) -> bool:
+        """Queue an event; False (and nothing queued) when the buffer is full"""
+        if len(self._events) >= self.buffer_size:
+            return False
+        self._events.append(data)
+        self._wake()
+        return True
+
+    def close(self, reason: str) -> None:
+        self.closed = reason
+        self._events.clear()
+        self._wake()
+
+    async def next_batch(self, timeout: float) -> List[str]:
+        """Every event queued so far, waiting up to timeout for the first one
+        ([] on timeout or once closed)"""
+        if not self._events and not self.closed:
+            loop = asyncio.get_running_loop()
+            self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, self._wake)
+            try:
+                await self._waiter
+            finally:
+                timer.cancel()
+                self._waiter = None
+        batch = list(self._events)
+        self._events.clear()
+        return batch
+
+class Hub:
+    """In-process fan-out from committed writes to stream connections.
+
+    publish() may be called from any thread; delivery happens on the event
+    loop the subscriptions live on.
+    """
+
+    def __init__(self, max_connections: int = STREAM_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._by_user: Dict[int, Set[Subscription]] = {}
+        self._admins: Set[Subscription] = set()
+        self._count = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.evicted = 0
+
+    def subscribe(self, user_id: int, is_admin: bool) -> Optional[Subscription]:
+        """Register a connection (on the event loop); None when the hub is full"""
+        if self._count >= self.max_connections:
+            return None
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, is_admin)
+        with self._lock:
+            self._by_user.setdefault(user_id, set()).add(subscription)
+            if is_admin:
+                self._admins.add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._by_user.get(subscription.user_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._by_user[subscription.user_id]
+            self._admins.discard(subscription)
+            self._count -= 1
+
+    def publish(self, events: Iterable[tuple]) -> None:
+        """Deliver (event, audience) pairs; audience is the ids of the users
+        allowed to see the event besides admins, or None for everyone"""
+        if not self._count or self._loop is None:
+            return
+        batch = [(json.dumps(payload, default=str), audience) for payload, audience in events]
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, batch)
+        except RuntimeError:
+            # The loop has been closed (shutdown)
+            pass
+
+    def _recipients(self, audience: Optional[Set[int]]) -> Set[Subscription]:
+        with self._lock:
+            if audience is None:
+                return {subscription for subscriptions in self._by_user.values() for subscription in subscriptions}
+            recipients = set(self._admins)
+            for user_id in audience:
+                recipients.update(self._by_user.get(user_id, ()))
+            return recipients
+
+    def _deliver(self, batch: List[tuple]) -> None:
+        for data, audience in batch:
+            self.published += 1
+            for subscription in self._recipients(audience):
+                if subscription.closed:
+                    continue
+                if subscription.push(data):
+                    self.delivered += 1
+                else:
+                    # Slow consumer: drop it instead of buffering without bound
+                    self.evicted += 1
+                    subscription.close("slow consumer")
+                    self.unsubscribe(subscription)
+
+    def close_all(self, reason: str = "shutting down") -> None:
+        with self._lock:
+            subscriptions = [subscription for subscriptions in self._by_user.values() for subscription in subscriptions]
+        for subscription in subscriptions:
+            subscription.close(reason)
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self._count,
+            "max_connections": self.max_connections,
+            "users": len(self._by_user),
+            "published": self.published,
+            "delivered": self.delivered,
+            "evicted": self.evicted,
+        }
+
+hub = Hub()
+
+def _audience(*user_ids: Optional[int]) -> Set[int]:
+    return {user_id for user_id in user_ids if user_id is not None}
+
+def _event(type_: str, **fields) -> dict:
+    return {"type": type_, **fields, "at": datetime.utcnow().isoformat()}
+
+def record(db: Session, type_: str, audience: Optional[Iterable[int]] = None, **fields) -> None:
+    """Publish an event when db's transaction commits. audience is the users
+    allowed to see it besides admins (None: everyone)"""
+    db.info.setdefault("stream_events", []).append(
+        (_event(type_, **fields), None if audience is None else _audience(*audience))
+    )
+
+def record_ticket_update(db: Session, ticket_id: int, owner_id: int, old_assignee: Optional[int], changes: dict) -> None:
+    """ticket.assigned when the assignee changed, otherwise ticket.updated"""
+    fields = sorted(key for key in changes if key != "updated_at")
+    if "assigned_to" in changes and changes["assigned_to"] != old_assignee:
+        record(
+            db, "ticket.assigned", (owner_id, old_assignee, changes["assigned_to"]),
+            ticket_id=ticket_id, assigned_to=changes["assigned_to"], fields=fields
+        )
+    else:
+        assignee = changes.get("assigned_to", old_assignee)
+        record(db, "ticket.updated", (owner_id, assignee), ticket_id=ticket_id, fields=fields)
+
+def _ticket_audience(session: Session, ticket_id: int) -> Set[int]:
+    ticket = session.identity_map.get(session.identity_key(Ticket, ticket_id))
+    if ticket is not None:
+        return _audience(ticket.user_id, ticket.assigned_to)
+    row = session.execute(select(Ticket.user_id, Ticket.assigned_to).where(Ticket.id == ticket_id)).first()
+    return _audience(*row) if row else set()
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            record(session, "ticket.created", (obj.user_id, obj.assigned_to), ticket_id=obj.id)
+        elif isinstance(obj, Comment):
+            record(
+                session, "ticket.commented", _ticket_audience(session, obj.ticket_id),
+                ticket_id=obj.ticket_id, comment_id=obj.id, user_id=obj.user_id
+            )
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and obj not in session.deleted:
+            attrs = inspect(obj).attrs
+            changes = {
+                attr.key: attr.value for attr in attrs
+                if attr.key in Ticket.__table__.c and attr.history.has_changes()
+            }
+            if set(changes) - {"updated_at"}:
+                old_assignee = (attrs.assigned_to.history.deleted or [obj.assigned_to])[0]
+                record_ticket_update(session, obj.id, obj.user_id, old_assignee, changes)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            record(session, "ticket.deleted", (obj.user_id, obj.assigned_to), ticket_id=obj.id)
+
+@event.listens_for(Session, "after_commit")
+def _publish_recorded(session):
+    events = session.info.pop("stream_events", None)
+    if events:
+        hub.publish(events)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_recorded(session):
+    session.info.pop("stream_events", None)
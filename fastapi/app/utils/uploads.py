@@ -0,0 +1,197 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+import multipart
+from multipart.exceptions import FormParserError
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+# Attachments are streamed straight from the request body into a temp file
+# next to their final location: the size limit is enforced while the body
+# arrives, the SHA-256 is computed in the same pass, all disk I/O runs on the
+# threadpool, and the finished file is fsynced and renamed into place, so a
+# partially written upload is never visible under its final name.
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_TMP_DIR = os.path.join(UPLOAD_DIR, ".tmp")
+MAX_UPLOAD_SIZE = int(os.getenv("ATTACHMENT_MAX_SIZE", str(10 * 1024 * 1024)))
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+
+class UploadTooLarge(Exception):
+    pass
+
+def _fsync_directory(path: str) -> None:
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class StreamingUpload:
+    """A temp file that counts and hashes what is written to it.
+
+    All methods block on disk I/O; async callers run them on the threadpool.
+    """
+
+    def __init__(self, max_size: int = MAX_UPLOAD_SIZE, directory: str = UPLOAD_TMP_DIR):
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, data: bytes) -> None:
+        """Append data, or raise UploadTooLarge once max_size is crossed"""
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadTooLarge(self.size)
+        self._hash.update(data)
+        self._file.write(data)
+
+    def commit(self, path: str) -> str:
+        """fsync the file and atomically move it to path"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        os.replace(self.temp_path, path)
+        _fsync_directory(directory)
+        return path
+
+    def discard(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+def _format_size(size: int) -> str:
+    if size % (1024 * 1024) == 0:
+        return f"{size // (1024 * 1024)}MB"
+    return f"{size} bytes"
+
+@dataclass
+class ReceivedFile:
+    filename: str
+    content_type: str
+    upload: StreamingUpload
+
+class _FilePartReader:
+    """python-multipart callbacks that pick one file field out of the body"""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.pending: List[bytes] = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if name == self.field_name and b"filename" in options and self.filename is None:
+            self._in_file = True
+            self.filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+            content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+            self.content_type = content_type or "application/octet-stream"
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        self._in_file = False
+
+async def receive_upload(request: Request, field_name: str = "file", max_size: int = MAX_UPLOAD_SIZE) -> ReceivedFile:
+    """Stream the named file field of a multipart request into a StreamingUpload.
+
+    Raises 413 as soon as the file (or a declared Content-Length) exceeds
+    max_size. The caller commits the returned upload or discards it.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size is {_format_size(max_size)}."
+    )
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data body"
+        )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise too_large
+
+    reader = _FilePartReader(field_name)
+    parser = multipart.MultipartParser(params[b"boundary"], reader.callbacks())
+    upload = await run_in_threadpool(StreamingUpload, max_size)
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if reader.pending:
+                data = b"".join(reader.pending)
+                reader.pending.clear()
+                await run_in_threadpool(upload.write, data)
+        parser.finalize()
+    except UploadTooLarge:
+        await run_in_threadpool(upload.discard)
+        raise too_large
+    except FormParserError:
+        await run_in_threadpool(upload.discard)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed multipart body"
+        )
+    except BaseException:
+        await run_in_threadpool(upload.discard)
+        raise
+
+    if reader.filename is None:
+        await run_in_threadpool(upload.discard)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Missing file field '{field_name}'"
+        )
+    return ReceivedFile(filename=reader.filename, content_type=reader.content_type, upload=upload)
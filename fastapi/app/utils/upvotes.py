@@ -0,0 +1,104 @@
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.feature_request import FeatureRequest, feature_request_upvotes
+from app.utils import changes, stream
+
+# Every change to feature_request_upvotes goes through these helpers, which
+# move FeatureRequest.upvotes_count in the same transaction
+
+def has_upvoted(db: Session, request_id: int, user_id: int) -> bool:
+    """Primary-key lookup on feature_request_upvotes"""
+    return db.execute(
+        select(feature_request_upvotes.c.user_id).where(
+            feature_request_upvotes.c.feature_request_id == request_id,
+            feature_request_upvotes.c.user_id == user_id
+        )
+    ).first() is not None
+
+def add_upvote(db: Session, request_id: int, user_id: int) -> None:
+    """Record an upvote and bump the counter.
+
+    Raises IntegrityError if the user has already upvoted the request.
+    """
+    db.execute(insert(feature_request_upvotes).values(
+        feature_request_id=request_id, user_id=user_id
+    ))
+    row = db.execute(
+        update(FeatureRequest)
+        .where(FeatureRequest.id == request_id)
+        .values(upvotes_count=FeatureRequest.upvotes_count + 1)
+        .returning(FeatureRequest.upvotes_count, FeatureRequest.requester_id)
+        .execution_options(synchronize_session=False)
+    ).one()
+    stream.record(db, "feature_request.upvoted", feature_request_id=request_id, upvotes_count=row.upvotes_count)
+    changes.record(db, FeatureRequest, request_id, changes.UPDATED, row._mapping, ["upvotes_count"])
+
+def remove_upvote(db: Session, request_id: int, user_id: int) -> bool:
+    """Remove an upvote and drop the counter; False if there was none"""
+    result = db.execute(delete(feature_request_upvotes).where(
+        feature_request_upvotes.c.feature_request_id == request_id,
+        feature_request_upvotes.c.user_id == user_id
+    ))
+    if not result.rowcount:
+        return False
+    row = db.execute(
+        update(FeatureRequest)
+        .where(FeatureRequest.id == request_id)
+        .values(upvotes_count=FeatureRequest.upvotes_count - 1)
+        .returning(FeatureRequest.upvotes_count, FeatureRequest.requester_id)
+        .execution_options(synchronize_session=False)
+    ).one()
+    stream.record(db, "feature_request.upvote_removed", feature_request_id=request_id, upvotes_count=row.upvotes_count)
+    changes.record(db, FeatureRequest, request_id, changes.UPDATED, row._mapping, ["upvotes_count"])
+    return True
+
+def clear_upvotes(db: Session, request_id: int) -> None:
+    """Delete every upvote of a feature request, e.g. before deleting it.
+
+    Doing this in one statement keeps the ORM from loading every upvoting
+    user just to empty the upvoted_by collection.
+    """
+    db.execute(delete(feature_request_upvotes).where(
+        feature_request_upvotes.c.feature_request_id == request_id
+    ))
+
+def upvoted_by(user_id: int):
+    """Ids of the feature requests a user has upvoted"""
+    return select(feature_request_upvotes.c.feature_request_id).where(
+        feature_request_upvotes.c.user_id == user_id
+    )
+
+def remove_user_upvotes(db: Session, user_id: int) -> None:
+    """Withdraw every upvote a user has cast, e.g. before deleting the user"""
+    upvoted = upvoted_by(user_id)
+    for row in db.execute(
+        update(FeatureRequest)
+        .where(FeatureRequest.id.in_(upvoted))
+        .values(upvotes_count=FeatureRequest.upvotes_count - 1)
+        .returning(FeatureRequest.id, FeatureRequest.requester_id)
+        .execution_options(synchronize_session=False)
+    ):
+        changes.record(db, FeatureRequest, row.id, changes.UPDATED, row._mapping, ["upvotes_count"])
+    db.execute(delete(feature_request_upvotes).where(
+        feature_request_upvotes.c.user_id == user_id
+    ))
+
+def recount_upvotes(connection: Connection) -> int:
+    """Recompute every upvotes_count from feature_request_upvotes.
+
+    Returns the number of feature requests whose counter was wrong.
+    """
+    actual = (
+        select(func.count())
+        .select_from(feature_request_upvotes)
+        .where(feature_request_upvotes.c.feature_request_id == FeatureRequest.id)
+        .scalar_subquery()
+    )
+    result = connection.execute(
+        update(FeatureRequest)
+        .where(FeatureRequest.upvotes_count != actual)
+        .values(upvotes_count=actual)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+# Point the app at a scratch database and upload directory before anything
+# imports it, and enforce the routes' SQL statement budgets
+_scratch = tempfile.mkdtemp(prefix="supportsync-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_scratch, "uploads")
+os.environ["SQL_STATEMENT_BUDGETS"] = "1"
+# A request stuck waiting for a pooled connection fails fast
+os.environ["DATABASE_POOL_TIMEOUT"] = "5"
+
+import pytest
+from fastapi.testclient import TestClient
+from app.database import SessionLocal
+from app.main import app
+from app.models.user import User
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+def _login(client: TestClient, username: str, role: str = "user") -> dict:
+    client.post("/api/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret"})
+    if role != "user":
+        with SessionLocal() as db:
+            db.query(User).filter(User.username == username).update({"role": role})
+            db.commit()
+    response = client.post("/api/auth/login", data={"username": f"{username}@example.com", "password": "secret"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return _login(client, "admin", "admin")
+
+@pytest.fixture(scope="session")
+def user_headers(client):
+    return _login(client, "user")
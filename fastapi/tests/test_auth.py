@@ -0,0 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+
+def test_concurrent_logins_do_not_block_each_other(client):
+    # Each login awaits bcrypt; none may hold a (writer) connection meanwhile
+    emails = [f"concurrent{i}@example.com" for i in range(3)]
+    for i, email in enumerate(emails):
+        response = client.post("/api/auth/register", json={"username": f"concurrent{i}", "email": email, "password": "secret"})
+        assert response.status_code == 200, response.text
+
+    with ThreadPoolExecutor(max_workers=len(emails)) as executor:
+        responses = list(executor.map(
+            lambda email: client.post("/api/auth/login", data={"username": email, "password": "secret"}), emails
+        ))
+    assert [response.status_code for response in responses] == [200] * len(emails)
+
+def test_login_rejects_a_wrong_password(client, user_headers):
+    response = client.post("/api/auth/login", data={"username": "user@example.com", "password": "wrong"})
+    assert response.status_code == 401
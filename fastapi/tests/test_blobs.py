@@ -0,0 +1,58 @@
+import hashlib
+import os
+import uuid
+import pytest
+from app.database import SessionLocal, engine
+from app.models.attachment import Attachment
+from app.models.blob import Blob
+from app.utils import blobs
+from app.utils.uploads import UPLOAD_DIR
+
+def _legacy_attachment(db, user_id: int, content: bytes) -> Attachment:
+    path = os.path.join(UPLOAD_DIR, str(user_id), f"{uuid.uuid4().hex}.txt")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+    attachment = Attachment(filename="legacy.txt", file_path=path, file_type="text/plain",
+                            file_size=len(content), user_id=user_id)
+    db.add(attachment)
+    return attachment
+
+def test_migrated_attachments_are_referenced_as_they_move(client, user_headers, monkeypatch):
+    user_id = client.get("/api/auth/me", headers=user_headers).json()["id"]
+    content = uuid.uuid4().bytes
+    with SessionLocal() as db:
+        first, second = (_legacy_attachment(db, user_id, content) for _ in range(2))
+        db.commit()
+        legacy_paths = [first.file_path, second.file_path]
+
+    # Interrupt the migration after the first attachment has moved
+    hash_file = blobs._hash_file
+    calls = []
+    def interrupted(path):
+        calls.append(path)
+        if len(calls) > 1:
+            raise KeyboardInterrupt
+        return hash_file(path)
+    monkeypatch.setattr(blobs, "_hash_file", interrupted)
+    with engine.connect() as connection, pytest.raises(KeyboardInterrupt):
+        blobs.migrate_uploads(connection)
+
+    sha256 = hashlib.sha256(content).hexdigest()
+    with SessionLocal() as db:
+        assert db.get(Blob, sha256).ref_count == 1
+        assert sum(os.path.exists(path) for path in legacy_paths) == 1
+
+    monkeypatch.setattr(blobs, "_hash_file", hash_file)
+    with engine.connect() as connection:
+        blobs.migrate_uploads(connection)
+    with SessionLocal() as db:
+        assert db.get(Blob, sha256).ref_count == 2
+        assert not any(os.path.exists(path) for path in legacy_paths)
+
+        # The last reference going away removes the file
+        for attachment in db.query(Attachment).filter(Attachment.content_sha256 == sha256):
+            db.delete(attachment)
+        db.commit()
+        assert db.get(Blob, sha256) is None
+    assert not os.path.exists(blobs.blob_path(sha256))
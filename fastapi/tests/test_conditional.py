@@ -0,0 +1,31 @@
+import pytest
+
+# (collection, fields for a new item, an update to one) per entity
+ENTITIES = {
+    "ticket": ("/api/tickets", {"title": "stale etag", "description": "first"}, {"description": "second"}),
+    "feature_request": ("/api/feature-requests", {"title": "stale etag", "description": "first"}, {"description": "second"}),
+}
+
+@pytest.mark.parametrize("kind", sorted(ENTITIES))
+def test_update_within_the_same_second_changes_the_etag(client, user_headers, kind):
+    collection, fields, changes = ENTITIES[kind]
+    item_url = f"{collection}/{client.post(collection, json=fields, headers=user_headers).json()['id']}"
+    # A first update, so the second lands on a row that already has an updated_at
+    client.put(item_url, json={"title": "stale etag, edited"}, headers=user_headers)
+    item_etag = client.get(item_url, headers=user_headers).headers["etag"]
+    page_etag = client.get(collection, headers=user_headers).headers["etag"]
+
+    response = client.put(item_url, json=changes, headers=user_headers)
+    assert response.status_code == 200, response.text
+
+    response = client.get(item_url, headers={**user_headers, "If-None-Match": item_etag})
+    assert response.status_code == 200
+    assert response.json()["description"] == "second"
+    response = client.get(collection, headers={**user_headers, "If-None-Match": page_etag})
+    assert response.status_code == 200
+
+def test_unchanged_item_is_not_modified(client, user_headers):
+    created = client.post("/api/feature-requests", json={"title": "cached", "description": "as is"}, headers=user_headers)
+    item_url = f"/api/feature-requests/{created.json()['id']}"
+    etag = client.get(item_url, headers=user_headers).headers["etag"]
+    assert client.get(item_url, headers={**user_headers, "If-None-Match": etag}).status_code == 304
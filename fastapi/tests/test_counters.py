@@ -0,0 +1,26 @@
+from datetime import datetime, time, timedelta
+import pytest
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models.ticket import Ticket
+from app.utils import counters
+
+DAYS = 7
+
+@pytest.mark.parametrize("now_time", [time(0, 0), time(0, 0, 1), time(12, 0), time(23, 59, 59)])
+def test_recent_activity_matches_the_rolling_window(client, user_headers, now_time):
+    user_id = client.get("/api/auth/me", headers=user_headers).json()["id"]
+    now = datetime.combine(datetime.utcnow().date(), now_time)
+    since = now - timedelta(days=DAYS)
+    day_start = datetime.combine(since.date() + timedelta(days=1), time())
+    with SessionLocal() as db:
+        # Rows on both sides of the window's start and of the next midnight
+        for created_at in (since - timedelta(seconds=1), since, since + timedelta(seconds=1),
+                           day_start - timedelta(seconds=1), day_start, now):
+            db.add(Ticket(title="window", description="edge", user_id=user_id, created_at=created_at))
+        db.commit()
+
+        # The dashboard's recent-activity query before the counters
+        rolling = db.query(func.count(Ticket.id)).filter(Ticket.created_at >= since).scalar()
+        counts = counters.read_counters(db, "tickets", days=DAYS, now=now)
+        assert counters.recent(counts, "tickets") == rolling
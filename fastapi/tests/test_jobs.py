@@ -0,0 +1,43 @@
+import sqlite3
+import threading
+import pytest
+from sqlalchemy import select
+from app.database import JobSessionLocal, SessionLocal, job_engine
+from app.models.job import Job
+from app.utils import jobs
+
+HOLD_TASK = "tests.hold_connection"
+_started = threading.Event()
+_release = threading.Event()
+
+@jobs.task(HOLD_TASK)
+def _hold_connection(db):
+    # A connection from the job's own pool, checked out between transactions
+    with db.get_bind().connect():
+        _started.set()
+        _release.wait(30)
+
+def test_running_job_does_not_block_a_concurrent_write(client, user_headers):
+    with SessionLocal() as db:
+        jobs.enqueue(db, HOLD_TASK)
+        db.commit()
+    assert _started.wait(10), "the job never started"
+    try:
+        # The job is still running, with its connection checked out
+        response = client.post("/api/tickets", json={"title": "job running", "description": "write anyway"}, headers=user_headers)
+        assert response.status_code == 200, response.text
+        assert not _release.is_set()
+    finally:
+        _release.set()
+
+def test_job_transaction_takes_the_write_lock_up_front(client):
+    other = sqlite3.connect(job_engine.url.database, timeout=0)
+    try:
+        with JobSessionLocal() as db:
+            # A job that reads first must not fail later upgrading to a writer
+            db.execute(select(Job.id)).all()
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                other.execute("BEGIN IMMEDIATE")
+        other.execute("BEGIN IMMEDIATE")
+    finally:
+        other.close()
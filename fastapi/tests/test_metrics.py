@@ -0,0 +1,19 @@
+import re
+
+def _sample(text: str, name: str) -> float:
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{name} not in /metrics"
+    return float(match.group(1))
+
+def test_request_sql_is_counted_under_its_route(client, admin_headers):
+    count = 'http_request_sql_statements_count{method="GET",route="/api/dashboard/summary"}'
+    total = 'http_request_sql_statements_sum{method="GET",route="/api/dashboard/summary"}'
+    before = client.get("/metrics").text
+    requests, statements = (_sample(before, count), _sample(before, total)) if count in before else (0, 0)
+
+    assert client.get("/api/dashboard/summary", headers=admin_headers).status_code == 200
+
+    after = client.get("/metrics").text
+    assert _sample(after, count) == requests + 1
+    assert _sample(after, total) > statements
+    assert _sample(after, "sql_statements_total") >= _sample(after, total)
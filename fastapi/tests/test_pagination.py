@@ -0,0 +1,37 @@
+import base64
+import json
+import pytest
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+def _cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).rstrip(b"=").decode()
+
+@pytest.mark.parametrize("path, values", [
+    ("/api/tickets", [{}]),
+    ("/api/tickets", ["1"]),
+    ("/api/tickets", [True]),
+    ("/api/tickets", [1, 2]),
+    ("/api/search/tickets?query=printer", ["x", {}]),
+    ("/api/search/tickets?query=printer", [-1.5, "1"]),
+    ("/api/search/feature-requests?query=export", [None, 1]),
+])
+def test_malformed_cursor_is_rejected(client, admin_headers, path, values):
+    response = client.get(path, params={"cursor": _cursor(values)}, headers=admin_headers)
+    assert response.status_code == 400, response.text
+
+def test_cursor_pages_follow_on(client, user_headers):
+    for number in range(3):
+        client.post("/api/tickets", json={"title": f"paged {number}", "description": "cursor"}, headers=user_headers)
+    first = client.get("/api/tickets/me", params={"limit": 2}, headers=user_headers)
+    second = client.get("/api/tickets/me", params={"limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=user_headers)
+    assert second.status_code == 200
+    assert second.json()[0]["id"] > first.json()[-1]["id"]
+
+    # Search pages are keyed on the float bm25() rank
+    first = client.get("/api/search/tickets", params={"query": "paged", "limit": 2}, headers=user_headers)
+    second = client.get(
+        "/api/search/tickets", params={"query": "paged", "limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]},
+        headers=user_headers
+    )
+    assert second.status_code == 200
+    assert {ticket["id"] for ticket in first.json()}.isdisjoint(ticket["id"] for ticket in second.json())
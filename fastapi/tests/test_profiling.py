@@ -0,0 +1,12 @@
+def test_profiled_request_keeps_its_sql_statements(client, admin_headers):
+    response = client.get("/api/dashboard/summary", headers={**admin_headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    profile = client.get(f"/api/admin/profiles/{profile_id}", headers=admin_headers).json()
+    assert profile["statements"] == len(profile["statement_log"]) > 0
+    assert all(statement["seconds"] >= 0 and statement["at"] >= 0 for statement in profile["statement_log"])
+
+def test_unprofiled_request_gets_no_profile(client, admin_headers):
+    response = client.get("/api/dashboard/summary", headers=admin_headers)
+    assert "x-profile-id" not in response.headers
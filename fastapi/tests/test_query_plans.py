@@ -0,0 +1,7 @@
+from app.database import engine
+from app.utils.query_plans import check_query_plans
+
+def test_hot_queries_use_an_index(client):
+    # client: the app has started, so the tables and indexes exist
+    with engine.connect() as connection:
+        assert check_query_plans(connection) == {}
@@ -0,0 +1,19 @@
+def _login(client, username: str) -> dict:
+    client.post("/api/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret"})
+    response = client.post("/api/auth/login", data={"username": f"{username}@example.com", "password": "secret"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_list_search_matches_title_and_description_only(client, admin_headers):
+    author = _login(client, "zanzibar")
+    for collection in ("/api/tickets", "/api/feature-requests"):
+        written = client.post(collection, json={"title": "Printer offline", "description": "zanzibar wing"}, headers=author).json()
+        client.post(collection, json={"title": "Scanner offline", "description": "third floor"}, headers=author)
+
+        listed = client.get(collection, params={"search": "zanzibar"}, headers=admin_headers).json()
+        assert [item["id"] for item in listed] == [written["id"]]
+
+    # The search endpoints still match the author, as they always have
+    found = client.get("/api/search/tickets", params={"query": "zanzibar"}, headers=admin_headers).json()
+    assert len(found) == 2
+    found = client.get("/api/search/feature-requests", params={"query": "zanzibar"}, headers=admin_headers).json()
+    assert len(found) == 2
@@ -0,0 +1,12 @@
+from app.utils import slow_queries
+
+def test_slow_statement_is_logged_under_its_route(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_THRESHOLD", 0.0)
+    client.delete("/api/admin/slow-queries", headers=admin_headers)
+
+    assert client.get("/api/dashboard/summary", headers=admin_headers).status_code == 200
+
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_THRESHOLD", float("inf"))
+    entries = client.get("/api/admin/slow-queries", params={"limit": 500}, headers=admin_headers).json()
+    assert any("GET /api/dashboard/summary" in entry["routes"] for entry in entries)
+    assert all(entry["plan"] or entry["plan_error"] for entry in entries if entry["sql"].startswith("SELECT"))
@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_app_imports_inside_a_running_event_loop():
+    # uvicorn imports the app from its event loop, where the sync pools
+    # refuse checkouts; a fresh interpreter, since the suite imported it already
+    code = "import asyncio\n\nasync def main():\n    import app.main\n\nasyncio.run(main())\n"
+    result = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,65 @@
+import pytest
+from fastapi.routing import APIRoute
+from app.main import app
+
+# Every route carrying a @statement_budget, with the request that exercises
+# it; {ticket_id} and {request_id} are filled in from the seeded data. Run
+# the suite again with DATABASE_ASYNC=1 to check the async routers.
+BUDGETED_REQUESTS = {
+    "/api/tickets": "/api/tickets?limit=20",
+    "/api/tickets/me": "/api/tickets/me",
+    "/api/tickets/assigned": "/api/tickets/assigned",
+    "/api/tickets/{ticket_id}": "/api/tickets/{ticket_id}",
+    "/api/tickets/{ticket_id}/comments": "/api/tickets/{ticket_id}/comments",
+    "/api/feature-requests": "/api/feature-requests",
+    "/api/feature-requests/{request_id}": "/api/feature-requests/{request_id}",
+    "/api/feature-requests/{request_id}/comments": "/api/feature-requests/{request_id}/comments",
+    "/api/search/tickets": "/api/search/tickets?query=printer",
+    "/api/search/feature-requests": "/api/search/feature-requests?query=export",
+    "/api/search/users": "/api/search/users?query=user",
+    "/api/dashboard/summary": "/api/dashboard/summary",
+    "/api/dashboard/activity": "/api/dashboard/activity",
+    "/api/auth/users": "/api/auth/users",
+}
+
+# Several rows with several children each, so a per-row lazy load (N+1)
+# runs more statements than the budget allows
+ROWS = 5
+
+def _budgeted_paths() -> set:
+    return {
+        route.path for route in app.routes
+        if isinstance(route, APIRoute) and hasattr(route.endpoint, "sql_statement_budget")
+    }
+
+@pytest.fixture(scope="module")
+def seeded(client, admin_headers, user_headers):
+    assignee = client.get("/api/auth/me", headers=admin_headers).json()["id"]
+    ticket_ids, request_ids = [], []
+    for i in range(ROWS):
+        ticket = client.post("/api/tickets", json={"title": f"printer jam {i}", "description": "paper stuck"}, headers=user_headers).json()
+        ticket_ids.append(ticket["id"])
+        feature_request = client.post(
+            "/api/feature-requests", json={"title": f"export to csv {i}", "description": "for reports"}, headers=user_headers
+        ).json()
+        request_ids.append(feature_request["id"])
+        for _ in range(2):
+            client.post(f"/api/tickets/{ticket['id']}/comments", json={"content": "any news?"}, headers=user_headers)
+            client.post(f"/api/feature-requests/{feature_request['id']}/comments", json={"content": "+1"}, headers=user_headers)
+        client.post(f"/api/feature-requests/{feature_request['id']}/upvote", headers=admin_headers)
+    client.patch(
+        "/api/tickets/bulk",
+        json={"tickets": [{"id": ticket_id, "assigned_to": assignee} for ticket_id in ticket_ids]},
+        headers=admin_headers,
+    )
+    return {"ticket_id": ticket_ids[0], "request_id": request_ids[0]}
+
+def test_every_budgeted_route_is_exercised():
+    assert _budgeted_paths() == set(BUDGETED_REQUESTS)
+
+@pytest.mark.parametrize("path", sorted(BUDGETED_REQUESTS))
+def test_route_stays_within_its_statement_budget(client, admin_headers, seeded, path):
+    # StatementBudgetMiddleware raises StatementBudgetExceeded, listing the
+    # statements, when the request runs more than the route's budget
+    response = client.get(BUDGETED_REQUESTS[path].format(**seeded), headers=admin_headers)
+    assert response.status_code == 200, response.text